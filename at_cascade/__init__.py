@@ -47,6 +47,7 @@ constant_table_list = [
     at_cascade/check_cascade_node.py
     at_cascade/check_log.py
     at_cascade/clear_shared.py
+    at_cascade/com_all_cov_reference.py
     at_cascade/com_cov_reference.py
     at_cascade/continue_cascade.py
     at_cascade/copy_other_tbl.py
@@ -70,10 +71,12 @@ constant_table_list = [
     at_cascade/get_parent_node.py
     at_cascade/get_var_id.py
     at_cascade/job_descendant.py
+    at_cascade/job_table_class.py
     at_cascade/map_shared.py
     at_cascade/move_table.py
     at_cascade/no_ode_fit.py
     at_cascade/omega_constraint.py
+    at_cascade/shared_data_class.py
     at_cascade/table_exists.py
     at_cascade/table_name2id.py
 }
@@ -89,11 +92,14 @@ constant_table_list = [
 from .                      import csv
 from .add_log_entry         import add_log_entry
 from .avgint_parent_grid    import avgint_parent_grid
+from .bilinear              import batch_eval
 from .bilinear              import bilinear
+from .bilinear              import grid_spline
 from .cascade_root_node     import cascade_root_node
 from .check_cascade_node    import check_cascade_node
 from .check_log             import check_log
 from .clear_shared          import clear_shared
+from .com_all_cov_reference import com_all_cov_reference
 from .com_cov_reference     import com_cov_reference
 from .continue_cascade      import continue_cascade
 from .copy_other_tbl        import copy_other_tbl
@@ -117,10 +123,12 @@ from .get_freeze_dict       import get_freeze_dict
 from .get_parent_node       import get_parent_node
 from .get_var_id            import get_var_id
 from .job_descendant        import job_descendant
+from .job_table_class       import job_table_class
 from .map_shared            import map_shared
 from .move_table            import move_table
 from .no_ode_fit            import no_ode_fit
 from .omega_constraint      import omega_constraint
+from .shared_data_class     import shared_data_class
 from .table_exists          import table_exists
 from .table_name2id         import table_name2id
 # END_SORT_THIS_LINE_MINUS_1
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 '''
 {xrst_begin add_log_entry}
@@ -20,7 +20,7 @@ Prototype
 
 Purpose
 *******
-Change the name of a table in the database.
+Add one or more at_cascade messages at the end of the log table.
 
 connection
 **********
@@ -29,20 +29,30 @@ is a dismod_at open connection to the database.
 message
 *******
 is a ``str`` containing the message that is added at
-the end of the log table
+the end of the log table.
+It can also be a ``list`` of ``str`` , in which case each element of the list
+is added as a separate row (in the order they appear in the list).
+All the rows are inserted using one SQL statement and one commit.
 
 Log Table
 *********
-As row is added at the end of the log table with the
+If the log table does not exist, it is created.
+A row is added at the end of the log table with the
 following columns values:
 
-1. *log_id* : is the integer length of the log table before the message
+1. *log_id* : is one greater than the maximum log_id in the log table
+   (zero if the table is empty). If the log_id values are
+   0, 1, ..., this is the length of the log table before the message.
 2. *message_type* : is the text ``at_cascade``
 3. *table_name* : is null
 4. *row_id* : is null
 5. *unix_time* : is the integer unit time
 6. *message* : is the text message
 
+The log table is not read by this routine and
+the message is passed to SQL as a parameter; i.e., it may contain
+any characters including quotes.
+
 {xrst_end   add_log_entry}
 '''
 import time
@@ -51,9 +61,17 @@ import dismod_at
 # BEGIN_DEF
 # at_cascade.add_log_entry
 def add_log_entry(connection, message) :
-    assert type(message) == str
+    assert type(message) in [ str, list ]
     # END_DEF
     #
+    # message_list
+    if type(message) == str :
+        message_list = [ message ]
+    else :
+        message_list = message
+    for message in message_list :
+        assert type(message) == str
+    #
     # cmd
     cmd  = 'create table if not exists log('
     cmd += 'log_id       integer primary key,'
@@ -62,10 +80,7 @@ def add_log_entry(connection, message) :
     cmd += 'row_id       integer,'
     cmd += 'unix_time    integer,'
     cmd += 'message      text)'
-    dismod_at.sql_command(connection, cmd)
-    #
-    # log_table
-    log_table = dismod_at.get_table_dict(connection, 'log')
+    connection.execute(cmd)
     #
     # seconds
     seconds   = int( time.time() )
@@ -74,12 +89,14 @@ def add_log_entry(connection, message) :
     message_type = 'at_cascade'
     #
     # cmd
-    cmd = 'insert into log'
-    cmd += ' (log_id,message_type,table_name,row_id,unix_time,message) values('
-    cmd += str( len(log_table) ) + ','     # log_id
-    cmd += f'"{message_type}",'            # message_type
-    cmd += 'null,'                         # table_name
-    cmd += 'null,'                         # row_id
-    cmd += str(seconds) + ','              # unix_time
-    cmd += f'"{message}")'                 # message
-    dismod_at.sql_command(connection, cmd)
+    # log_id is the integer primary key, so its maximum is found using the
+    # primary key index instead of reading the log table.
+    cmd  = 'insert into log'
+    cmd += ' (log_id,message_type,table_name,row_id,unix_time,message)'
+    cmd += ' values((select ifnull(max(log_id) + 1, 0) from log),'
+    cmd += '?,null,null,?,?)'
+    value_list = [
+        (message_type, seconds, message) for message in message_list
+    ]
+    connection.executemany(cmd, value_list)
+    connection.commit()
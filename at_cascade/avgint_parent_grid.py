@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin avgint_parent_grid}
@@ -255,7 +255,8 @@ def avgint_parent_grid(
 ) :
     assert type(all_node_database)  == str
     assert type(fit_database) == str
-    assert type(job_table) == list or job_table == None
+    assert type(job_table) in [ list, at_cascade.job_table_class ] or \
+        job_table == None
     assert type(fit_job_id) == int or fit_job_id == None
     # END_DEF
     #
@@ -75,6 +75,34 @@ sets z to the value of the spline for *z_name* .
 #. The function is extended as constant with respect to x (y)
    for values of x (y) outside the limits of x_grid (y_grid).
 
+Batched Evaluation
+==================
+The function call
+{xrst_code py}
+    z = spline_dict[z_name].batch(x, y)
+{xrst_code}
+evaluates the spline at many points using one call.
+
+#. The values x and y are numpy arrays (or lists) with the same shape.
+#. The value z is a numpy ``float`` array with the same shape as x and y.
+#. For each index i, z[i] is equal to spline_dict[z_name](x[i], y[i]) .
+
+Many z Variables
+================
+The function call
+{xrst_code py}
+    z = at_cascade.batch_eval(spline_list, x, y)
+{xrst_code}
+evaluates many splines at the same points using one call.
+
+#. The value spline_list is a ``list`` of splines; e.g.,
+   values in *spline_dict* .
+#. The values x and y are one dimensional numpy arrays (or lists)
+   with the same length.
+#. The value z is a numpy ``float`` array with shape
+   ( len(x) , len( *spline_list* ) ) and z[i, k] is equal to
+   *spline_list* [k] ( x[i], y[i] ) .
+
 Example
 *******
 :ref:`example_bilinear-name`
@@ -121,6 +149,97 @@ class spline_wrapper :
         result = result.flatten()
         result = result[0]
         return result
+    #
+    # batch
+    def batch(self, x, y) :
+        #
+        # x, y
+        x = numpy.asarray(x, dtype = float)
+        y = numpy.asarray(y, dtype = float)
+        assert x.shape == y.shape
+        #
+        # x, y
+        x = numpy.clip(x, self.box['x_min'], self.box['x_max'])
+        y = numpy.clip(y, self.box['y_min'], self.box['y_max'])
+        #
+        # result
+        if x.size == 0 :
+            result = numpy.empty(x.shape, dtype = float)
+        elif self.const_x and self.const_y :
+            result = numpy.full(x.shape, float(self.spline), dtype = float)
+        elif self.const_x :
+            result = self.spline( y.flatten() ).reshape(x.shape)
+        elif self.const_y :
+            result = self.spline( x.flatten() ).reshape(x.shape)
+        else :
+            result = self.spline.ev( x.flatten(), y.flatten() )
+            result = result.reshape(x.shape)
+        return result
+# ----------------------------------------------------------------------------
+# z = batch_eval(spline_list, x, y)
+# see Many z Variables in the documentation above.
+def batch_eval(spline_list, x, y) :
+    assert type(spline_list) == list
+    #
+    # x, y
+    x = numpy.asarray(x, dtype = float)
+    y = numpy.asarray(y, dtype = float)
+    assert len(x.shape) == 1
+    assert x.shape == y.shape
+    #
+    # z
+    z = numpy.empty( (len(x), len(spline_list)), dtype = float )
+    for (k, spline) in enumerate(spline_list) :
+        z[:, k] = spline.batch(x, y)
+    return z
+
+# ----------------------------------------------------------------------------
+# spline = grid_spline(x_grid, y_grid, z_grid)
+#
+# x_grid, y_grid
+# are sorted lists of float values.
+#
+# z_grid
+# is a numpy array with shape (len(x_grid), len(y_grid)).
+# z_grid[i, j] is the z value corresponding to x_grid[i], y_grid[j].
+#
+# spline
+# is a spline_wrapper that evaluates z = spline(x, y) using bilinear
+# interpolation of z_grid; see spline_dict below.
+#
+def grid_spline(x_grid, y_grid, z_grid) :
+    #
+    # n_x, n_y
+    n_x = len(x_grid)
+    n_y = len(y_grid)
+    assert z_grid.shape == (n_x, n_y)
+    #
+    # const_x, const_y
+    const_x = bool( numpy.all( z_grid == z_grid[0:1, :] ) )
+    const_y = bool( numpy.all( z_grid == z_grid[:, 0:1] ) )
+    #
+    # spline
+    if const_x and const_y :
+        spline = numpy.array( z_grid[0, 0] )
+    elif const_x :
+        spline = scipy.interpolate.UnivariateSpline(
+            y_grid, z_grid[0,:], k=1, s=0
+        )
+    elif const_y :
+        spline = scipy.interpolate.UnivariateSpline(
+            x_grid, z_grid[:,0], k=1, s=0
+        )
+    else :
+        spline = scipy.interpolate.RectBivariateSpline(
+            x_grid, y_grid, z_grid, kx=1, ky=1, s=0
+        )
+    box = {
+        'x_min' : x_grid[0],
+        'x_max' : x_grid[-1],
+        'y_min' : y_grid[0],
+        'y_max' : y_grid[-1],
+    }
+    return spline_wrapper(spline , box, const_x, const_y)
 
 # BEGIN_DEF
 # at_cascade.bilinear
@@ -139,100 +258,52 @@ def bilinear(
     if len(table) == 0 :
         return (list(), list(), None)
     #
-    # x_set, y_set
-    x_set       = set()
-    y_set       = set()
-    for row in table :
-        x      = float( row[x_name] )
-        y      = float( row[y_name] )
-        x_set.add(x)
-        y_set.add(y)
-    #
-    # triple_list
-    triple_list = list()
-    for row in table :
-        x      = float( row[x_name] )
-        y      = float( row[y_name] )
-        triple = (x, y, row)
-        triple_list.append( triple )
-        #
+    # x, y, z
+    # z[i, k] is the value for the k-th name in z_list in the i-th row
+    n_row = len(table)
+    x     = numpy.array( [ float( row[x_name] ) for row in table ] )
+    y     = numpy.array( [ float( row[y_name] ) for row in table ] )
+    z     = numpy.empty( (n_row, len(z_list)), dtype = float )
+    for (k, z_name) in enumerate(z_list) :
+        z[:, k] = [ float( row[z_name] ) for row in table ]
+    #
+    # x_grid, y_grid
+    x_grid = numpy.unique(x)
+    y_grid = numpy.unique(y)
     #
     # n_x, n_y
-    n_x = len(x_set)
-    n_y = len(y_set)
+    n_x = len(x_grid)
+    n_y = len(y_grid)
     #
     # x_grid, y_grid
-    x_grid = sorted(x_set)
-    y_grid = sorted(y_set)
+    x_grid = x_grid.tolist()
+    y_grid = y_grid.tolist()
     #
-    if len(triple_list) != n_x * n_y :
+    if n_row != n_x * n_y :
         return (x_grid, y_grid, None)
     #
-    # triple_list
-    triple_list = sorted(triple_list)
+    # order
+    # sorts the rows by x and then by y
+    order = numpy.lexsort( (y, x) )
+    #
+    # check that each (x, y) pair in the grid appears once
+    x_order = x[order].reshape( (n_x, n_y) )
+    y_order = y[order].reshape( (n_x, n_y) )
+    if not numpy.all( x_order == numpy.array(x_grid)[:, numpy.newaxis] ) :
+        return(x_grid, y_grid, None)
+    if not numpy.all( y_order == numpy.array(y_grid)[numpy.newaxis, :] ) :
+        return(x_grid, y_grid, None)
+    #
+    # z_all
+    # z_all[i, j, k] is the value for the k-th name in z_list
+    # at x_grid[i] and y_grid[j]
+    z_all = z[order, :].reshape( (n_x, n_y, len(z_list)) )
     #
     # spline_dict
     spline_dict = dict()
-    #
-    # z_name
-    for z_name in z_list :
-        #
-        # z_grid
-        z_grid    = numpy.empty( (n_x, n_y) )
-        z_grid[:] = numpy.nan
-        #
-        # index, triple
-        for (index, triple) in enumerate( triple_list ) :
-            #
-            # x_index, y_index
-            x        = triple[0]
-            y        = triple[1]
-            x_index  = int( index / n_y )
-            y_index  = index % n_y
-            if x != x_grid[x_index] :
-                return(x_grid, y_grid, None)
-            if y != y_grid[y_index] :
-                return(x_grid, y_grid, None)
-            #
-            # z_grid
-            row                      = triple[2]
-            value                    = float( row[z_name] )
-            z_grid[x_index, y_index] =  value
-        #
-        # const_x
-        const_x = True
-        for y_index in range(n_y) :
-            const_col = numpy.all( z_grid[0, y_index] == z_grid[:, y_index] )
-            const_x   = const_x and const_col
-        #
-        # const_y
-        const_y = True
-        for x_index in range(n_x) :
-            const_row = numpy.all( z_grid[x_index, 0] == z_grid[x_index, :] )
-            const_y   = const_y and const_row
-        #
-        # spline
-        if const_x and const_y :
-            spline = numpy.array( z_grid[0, 0] )
-        elif const_x :
-            spline = scipy.interpolate.UnivariateSpline(
-                y_grid, z_grid[0,:], k=1, s=0
-            )
-        elif const_y :
-            spline = scipy.interpolate.UnivariateSpline(
-                x_grid, z_grid[:,0], k=1, s=0
-            )
-        else :
-            spline = scipy.interpolate.RectBivariateSpline(
-                x_grid, y_grid, z_grid, kx=1, ky=1, s=0
-            )
-        box = {
-            'x_min' : x_grid[0],
-            'x_max' : x_grid[-1],
-            'y_min' : y_grid[0],
-            'y_max' : y_grid[-1],
-        }
-        spline_dict[z_name] = spline_wrapper(spline , box, const_x, const_y)
+    for (k, z_name) in enumerate(z_list) :
+        z_grid              = numpy.array( z_all[:, :, k] )
+        spline_dict[z_name] = grid_spline(x_grid, y_grid, z_grid)
     #
     # BEGIN_RETURN
     # ...
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 '''
 {xrst_begin check_log}
@@ -70,15 +70,70 @@ is a non-empty ``list`` of ``str`` containing the messages for that job.
 If a *job_name* is not a *key* is in *message_dict*,
 there were no messages of the specified type for that job.
 
+Parallel Reads
+**************
+The fit databases are read in parallel using a pool of threads
+(most of the time is spent waiting for the file system).
+Only the message_type and message columns of the log table are read.
+
+Summary Cache
+*************
+The messages for all the message types, and the
+modification time and size of each fit database,
+are stored in the file ``check_log.json`` in the
+:ref:`option_all_table@result_dir` .
+If a fit database has the same modification time and size as in this file,
+its messages are taken from this file instead of reading the database.
+Hence repeated calls to check_log only read the databases that changed.
+This file is a cache and can be removed at any time.
+
 {xrst_end check_log}
 '''
 # ----------------------------------------------------------------------------
 import time
 import os
-import multiprocessing
+import json
+import concurrent.futures
 import dismod_at
 import at_cascade
 # ----------------------------------------------------------------------------
+#
+# all_message_type
+all_message_type = [ 'error', 'warning', 'at_cascade' ]
+#
+# read_log
+# summary is the cache entry for fit_database (None if it has no entry).
+# The return value is a new cache entry, or summary if it is up to date, or
+# None if fit_database does not exist.
+def read_log(fit_database, summary) :
+    #
+    # stat_key
+    try :
+        stat = os.stat(fit_database)
+    except FileNotFoundError :
+        return None
+    stat_key = [ stat.st_mtime_ns, stat.st_size ]
+    if summary != None and summary['stat_key'] == stat_key :
+        return summary
+    #
+    # log_table
+    connection = dismod_at.create_connection(
+                fit_database, new = False, readonly = True
+    )
+    command   = 'SELECT message_type, message FROM log ORDER BY log_id'
+    log_table = dismod_at.sql_command(connection, command)
+    connection.close()
+    #
+    # summary
+    message_list_dict = dict()
+    for message_type in all_message_type :
+        message_list_dict[message_type] = list()
+    for (message_type, message) in log_table :
+        if message_type in message_list_dict :
+            message_list_dict[message_type].append( message )
+    summary = { 'stat_key' : stat_key, 'message' : message_list_dict }
+    return summary
+# ----------------------------------------------------------------------------
 # BEGIN_DEF
 # at_cascade.check_log
 def check_log(
@@ -97,25 +152,13 @@ def check_log(
     assert max_job_depth == None or type(max_job_depth) == int
     # END_DEF
     #
-    assert message_type in [ 'error', 'warning', 'at_cascade' ]
-    #
-    # node_table, covariate_table
-    connection      = dismod_at.create_connection(
-        root_database, new = False, readonly = True
-    )
-    node_table      = dismod_at.get_table_dict(connection, 'node')
-    covariate_table = dismod_at.get_table_dict(connection, 'covariate')
-    connection.close()
+    assert message_type in all_message_type
     #
-    # split_reference_table, option_all_table, node_split_table
+    # option_all_table
     connection  = dismod_at.create_connection(
         all_node_database, new = False, readonly = True
     )
-    split_reference_table = dismod_at.get_table_dict(
-        connection, 'split_reference'
-    )
     option_all_table = dismod_at.get_table_dict(connection, 'option_all')
-    node_split_table = dismod_at.get_table_dict(connection, 'node_split')
     connection.close()
     #
     # root_node_name
@@ -136,24 +179,9 @@ def check_log(
         msg  = f'{all_node_database} root_node_name = {root_node_name}'
         assert False, msg
     #
-    # root_node_id
-    root_node_id = at_cascade.table_name2id(node_table, 'node', root_node_name)
-    #
-    if len(split_reference_table) == 0 :
-        root_split_reference_id = None
-    else :
-        cov_info = at_cascade.get_cov_info(
-            option_all_table, covariate_table, split_reference_table
-        )
-        root_split_reference_id = cov_info['split_reference_id']
-    #
-    # node_split_set
-    node_split_set = set()
-    for row in node_split_table :
-        node_split_set.add( row['node_id'] )
-    #
-    # message_dict
-    message_dict = dict()
+    # fit_database_dict
+    # maps job_name to fit_database for the jobs that are included
+    fit_database_dict = dict()
     #
     # job_id
     for job_id in range( len(job_table) ) :
@@ -173,44 +201,67 @@ def check_log(
             # job_name
             job_name = job_table[job_id]['job_name']
             #
-            # fit_node_id
-            fit_node_id = job_table[job_id]['fit_node_id']
-            #
-            # fit_split_reference_id
-            fit_split_reference_id = job_table[job_id]['split_reference_id']
-            #
             # fit_database
-            database_dir = at_cascade.get_database_dir(
-                node_table              = node_table,
-                split_reference_table   = split_reference_table,
-                node_split_set          = node_split_set,
-                root_node_id            = root_node_id,
-                root_split_reference_id = root_split_reference_id,
-                fit_node_id             = fit_node_id ,
-                fit_split_reference_id  = fit_split_reference_id,
+            database_dir = job_table[job_id]['database_dir']
+            fit_database = f'{result_dir}/{database_dir}/dismod.db'
+            fit_database_dict[job_name] = fit_database
+    #
+    # cache_file, cache
+    cache_file = f'{result_dir}/check_log.json'
+    cache      = dict()
+    if os.path.exists(cache_file) :
+        try :
+            with open(cache_file, 'r') as file_obj :
+                cache = json.load(file_obj)
+        except ( OSError, ValueError ) :
+            cache = dict()
+    #
+    # summary_dict
+    # maps job_name to the summary for the corresponding fit_database
+    summary_dict = dict()
+    with concurrent.futures.ThreadPoolExecutor() as executor :
+        future_dict = dict()
+        for job_name in fit_database_dict :
+            fit_database = fit_database_dict[job_name]
+            summary      = cache.get(fit_database)
+            future_dict[job_name] = executor.submit(
+                read_log, fit_database, summary
             )
-            fit_database      = f'{result_dir}/{database_dir}/dismod.db'
-            #
-            # log_table
-            if not os.path.exists(fit_database) :
-                message = f'Missing fit_database {fit_database}'
-                message_dict[job_name] = [ message ]
-            else :
-                connection = dismod_at.create_connection(
-                            fit_database, new = False, readonly = True
-                )
-                log_table  = dismod_at.get_table_dict(connection, 'log')
-                connection.close()
-                #
-                # row
-                for row in log_table :
-                    #
-                    if row['message_type'] == message_type :
-                        #
-                        # message_dict
-                        if job_name not in message_dict :
-                            message_dict[job_name] = list()
-                        message_dict[job_name].append( row['message'] )
+        for job_name in future_dict :
+            summary_dict[job_name] = future_dict[job_name].result()
+    #
+    # message_dict, cache_changed
+    message_dict  = dict()
+    cache_changed = False
+    for job_name in fit_database_dict :
+        fit_database = fit_database_dict[job_name]
+        summary      = summary_dict[job_name]
+        if summary == None :
+            message = f'Missing fit_database {fit_database}'
+            message_dict[job_name] = [ message ]
+            if fit_database in cache :
+                del cache[fit_database]
+                cache_changed = True
+        else :
+            message_list = summary['message'][message_type]
+            if len( message_list ) > 0 :
+                message_dict[job_name] = list( message_list )
+            if cache.get(fit_database) is not summary :
+                cache[fit_database] = summary
+                cache_changed = True
+    #
+    # cache_file
+    # write to a temporary file and then rename so that the cache file is
+    # never partially written
+    if cache_changed :
+        temp_file = f'{cache_file}.{os.getpid()}'
+        try :
+            with open(temp_file, 'w') as file_obj :
+                json.dump(cache, file_obj)
+            os.replace(temp_file, cache_file)
+        except OSError :
+            if os.path.exists(temp_file) :
+                os.remove(temp_file)
     #
     # BEGIN_RETURN
     # ...
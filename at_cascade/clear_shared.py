@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 '''
 {xrst_begin clear_shared}
@@ -28,8 +28,10 @@ to run the cascade:
 
     FileExistsError: [Errno 17] File exists: *name*
 
-where *name* ends with ``_number_cpu_inuse`` or ``_job_status``.
+where *name* ends with ``_number_cpu_inuse`` , ``_job_status`` ,
+``_data`` , or ``_cov_array`` .
 This may happen if the previous :ref:`fit_parallel-name`
+or :ref:`csv.pre_parallel-name`
 did not terminate cleanly; e.g., if the system crashed.
 
 all_node_database
@@ -43,6 +45,9 @@ job_name
 This is the :ref:`create_job_table@job_table@job_name`
 for the shared memory that we are clearing; see
 :ref:`fit_parallel@shared_unique` .
+For the shared memory used by :ref:`csv.pre_parallel-name` ,
+it is ``pre_`` followed by the name of the start job;
+see :ref:`csv.pre_parallel@cov_array` .
 
 {xrst_end clear_shared}
 '''
@@ -72,7 +77,8 @@ def clear_shared(all_node_database, job_name) :
     shared_memory_prefix_plus = f'{shared_memory_prefix}_{job_name}'
     #
     # name
-    for name in  [ '_number_cpu_inuse', '_job_status' ] :
+    name_list = [ '_number_cpu_inuse', '_job_status', '_data', '_cov_array' ]
+    for name in name_list :
         #
         # shared_memory_name
         shared_memory_name = shared_memory_prefix_plus + name
@@ -0,0 +1,248 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin com_all_cov_reference}
+
+Compute Covariate Reference Values For All Nodes
+################################################
+Compute the covariate references for every node at or below the root node
+and every split reference value using one pass through the data table.
+
+Prototype
+*********
+{xrst_literal ,
+    # BEGIN_DEF, # END_DEF
+    # BEGIN_RETURN, # END_RETURN
+}
+
+option_all_table
+****************
+The :ref:`option_all_table@split_covariate_name` and
+:ref:`option_all_table@absolute_covariates` rows of this table
+(if they exist) are the only rows of this table that are used.
+
+split_reference_table
+*********************
+is the :ref:`split_reference_table-name` as a ``list``
+of ``dict`` .
+
+node_table
+**********
+This is a list of dict representing the node table in the
+:ref:`glossary@root_database` .
+
+covariate_table
+***************
+This is the covariate table for any fit or the one in the
+root node database.
+
+root_node_id
+************
+This is the node_id for the :ref:`glossary@root_node` .
+
+data_table
+**********
+This is a list of dict representing the data table in the root database.
+If it is ``None`` , the data table is read from the root database.
+
+cov_reference_dict
+******************
+The return value is a ``dict`` with a key
+( *node_id* , *split_reference_id* )
+for each *node_id* that is the root node or one of its descendants,
+and each *split_reference_id* in the split reference table
+( *split_reference_id* is ``None`` when the split reference table is empty).
+The corresponding value is the ``list``
+
+| |tab| *cov_reference_dict* [ ( *node_id* , *split_reference_id* ) ]
+
+which is equal to the *cov_reference_list* that
+:ref:`com_cov_reference-name` would return with
+*shift_node_id* equal to *node_id* and the same *split_reference_id* .
+
+Method
+======
+For each split_reference_id, each row of the data table is checked once
+to see if it is within the max difference for the splitting covariate.
+If so, its relative covariate values are added to the sums and counts for
+the node corresponding to the row and all of the ancestors of that node.
+The rows are processed in data table order so that the sums,
+and hence the averages,
+are the same as those computed by :ref:`com_cov_reference-name` .
+
+{xrst_end com_all_cov_reference}
+'''
+import at_cascade
+import dismod_at
+import math
+#
+# BEGIN_DEF
+# at_cascade.com_all_cov_reference
+def com_all_cov_reference(
+    option_all_table      ,
+    split_reference_table ,
+    node_table            ,
+    covariate_table       ,
+    root_node_id          ,
+    data_table            = None,
+) :
+    assert type(option_all_table) == list
+    assert type(split_reference_table) == list
+    assert type(node_table) == list
+    assert type(covariate_table) == list
+    assert type(root_node_id) == int
+    assert type(data_table) == list or data_table == None
+    # END_DEF
+    #
+    # root_database
+    root_database      = None
+    for row in option_all_table :
+        if row['option_name'] == 'root_database' :
+            root_database      = row['option_value']
+    assert root_database != None
+    #
+    # data_table
+    if data_table == None :
+        connection = dismod_at.create_connection(
+            root_database, new = False, readonly = True
+        );
+        data_table = dismod_at.get_table_dict(connection, 'data')
+        connection.close()
+    #
+    # cov_info
+    cov_info = at_cascade.get_cov_info(
+        option_all_table,
+        covariate_table,
+        split_reference_table
+    )
+    #
+    # rel_covariate_list
+    rel_covariate_list = sorted( cov_info['rel_covariate_id_set'] )
+    #
+    # split_covariate_id
+    split_covariate_id = None
+    if len( split_reference_table ) > 0 :
+        split_covariate_id = cov_info['split_covariate_id']
+    #
+    # check max_difference
+    for covariate_id in rel_covariate_list :
+        covariate_row  = covariate_table[covariate_id]
+        max_difference = covariate_row['max_difference']
+        if not max_difference in [ None, math.inf ] :
+            msg  = f'com_all_cov_reference: covariate_id = {covariate_id}\n'
+            msg += 'is a relative covariate and '
+            msg += f'max_difference = {max_difference} is not None or infinity'
+            assert False, msg
+    #
+    # n_covariate
+    n_covariate = len( covariate_table )
+    #
+    # covariate_label
+    covariate_label = list()
+    for covariate_id in range( n_covariate ) :
+        covariate_label.append( f'x_{covariate_id}' )
+    #
+    # bound_covariate_list
+    # covariates that have a finite max_difference
+    bound_covariate_list = list()
+    for covariate_id in range( n_covariate ) :
+        max_difference = covariate_table[covariate_id]['max_difference']
+        if not max_difference in [ None, math.inf ] :
+            bound_covariate_list.append( covariate_id )
+    #
+    # ancestor_list
+    # ancestor_list[node_id] is node_id followed by its ancestors
+    ancestor_list = list()
+    for node_id in range( len(node_table) ) :
+        this_list = list()
+        ancestor  = node_id
+        while ancestor != None :
+            this_list.append( ancestor )
+            ancestor = node_table[ancestor]['parent']
+        ancestor_list.append( this_list )
+    #
+    # root_descendant_list
+    root_descendant_list = list()
+    for node_id in range( len(node_table) ) :
+        if root_node_id in ancestor_list[node_id] :
+            root_descendant_list.append( node_id )
+    #
+    # split_reference_list
+    if len(split_reference_table) == 0 :
+        split_reference_list = [ None ]
+    else :
+        split_reference_list = range( len(split_reference_table) )
+    #
+    # cov_reference_dict
+    cov_reference_dict = dict()
+    for split_reference_id in split_reference_list :
+        #
+        # reference_list
+        reference_list = list()
+        for covariate_id in range( n_covariate ) :
+            reference = covariate_table[covariate_id]['reference']
+            if covariate_id == split_covariate_id :
+                row       = split_reference_table[split_reference_id]
+                reference = row['split_reference_value']
+            reference_list.append( reference )
+        #
+        # cov_sum, cov_count
+        # cov_sum[node_id][covariate_id], cov_count[node_id][covariate_id]
+        cov_sum   = dict()
+        cov_count = dict()
+        #
+        # data_row
+        for data_row in data_table :
+            #
+            # in_bnd
+            in_bnd = True
+            for covariate_id in bound_covariate_list :
+                covariate_value = data_row[ covariate_label[covariate_id] ]
+                if not covariate_value is None :
+                    reference      = reference_list[covariate_id]
+                    max_difference = \
+                        covariate_table[covariate_id]['max_difference']
+                    abs_diff = abs( covariate_value - reference )
+                    in_bnd   = in_bnd and abs_diff <= max_difference
+            #
+            if in_bnd :
+                #
+                # node_id
+                for node_id in ancestor_list[ data_row['node_id'] ] :
+                    if not node_id in cov_sum :
+                        cov_sum[node_id]   = dict()
+                        cov_count[node_id] = dict()
+                    node_sum   = cov_sum[node_id]
+                    node_count = cov_count[node_id]
+                    #
+                    # node_sum, node_count
+                    for covariate_id in rel_covariate_list :
+                        label     = covariate_label[covariate_id]
+                        cov_value = data_row[label]
+                        if not cov_value is None :
+                            node_sum[covariate_id] = \
+                                node_sum.get(covariate_id, 0) + cov_value
+                            node_count[covariate_id] = \
+                                node_count.get(covariate_id, 0) + 1
+        #
+        # cov_reference_dict
+        for node_id in root_descendant_list :
+            node_sum   = cov_sum.get(node_id, dict())
+            node_count = cov_count.get(node_id, dict())
+            cov_reference_list = list()
+            for covariate_id in range( n_covariate ) :
+                reference = reference_list[covariate_id]
+                if covariate_id in node_sum :
+                    count     = node_count[covariate_id]
+                    reference = node_sum[covariate_id] / count
+                cov_reference_list.append( reference )
+            key = (node_id, split_reference_id)
+            cov_reference_dict[key] = cov_reference_list
+    # -------------------------------------------------------------------------
+    # BEGIN_RETURN
+    # ...
+    assert type(cov_reference_dict) == dict
+    return cov_reference_dict
+    # END_RETURN
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 '''
 {xrst_begin copy_root_db}
@@ -28,10 +28,15 @@ The directory where the *fit_database* will be located must exist
 when this routine is called.
 This database is created as follows:
 
-#. Copy the root node database to the fit node database.
-
-#. Drop all of the constant tables from the fit node database; see
+#. Create the fit node database and copy all the tables in the
+   root node database, except for the constant tables,
+   to the fit node database; see
    :ref:`module@at_cascade.constant_table_list` .
+   Each table is created using the same SQL statement that created it
+   in the root node database and its rows are copied using
+   an SQL ``INSERT INTO ... SELECT`` with the root node database attached.
+   Hence the constant tables, which may be very large, are never read or
+   written by this routine.
 
 #. Change the fit node database option table so that is uses the
    root node database for all the constant tables; i.e.,
@@ -43,7 +48,6 @@ This database is created as follows:
 {xrst_end copy_root_db}
 '''
 import os
-import shutil
 import at_cascade
 import dismod_at
 # -----------------------------------------------------------------------------
@@ -69,22 +73,37 @@ def copy_root_db(root_database, fit_database) :
     assert type(fit_database) == str
     # END_COPY_ROOT_DB
     #
-    # fit_database
-    shutil.copyfile(root_database, fit_database)
-    #
     # connection
     connection = dismod_at.create_connection(
-        fit_database, new = False, readonly = False
+        fit_database, new = True, readonly = False
     )
     #
+    # root_database
+    quoted  = root_database.replace("'", "''")
+    command = f"ATTACH DATABASE '{quoted}' AS root"
+    dismod_at.sql_command(connection, command)
+    #
+    # create_list
+    # tables (and then indices) in the root database that are not constant
+    command  = 'SELECT type, name, tbl_name, sql FROM root.sqlite_master'
+    command += " WHERE type IN ('table', 'index') AND sql IS NOT NULL"
+    command += " AND name NOT LIKE 'sqlite_%'"
+    result   = dismod_at.sql_command(connection, command)
+    create_list = list()
+    for (sql_type, name, tbl_name, sql) in result :
+        if tbl_name not in at_cascade.constant_table_list :
+            create_list.append( (sql_type, name, sql) )
+    create_list.sort( key = lambda item : item[0] != 'table' )
+    #
     # fit_database
-    for table_name in at_cascade.constant_table_list :
-        if table_name == 'rate_eff_cov' :
-            command = f'DROP TABLE IF EXISTS {table_name}'
-        else :
-            command = f'DROP TABLE {table_name}'
-        dismod_at.sql_command(connection, command)
-    command = 'VACUUM;'
+    for (sql_type, name, sql) in create_list :
+        dismod_at.sql_command(connection, sql)
+        if sql_type == 'table' :
+            command = f'INSERT INTO main.{name} SELECT * FROM root.{name}'
+            dismod_at.sql_command(connection, command)
+    #
+    # root_database
+    command = 'DETACH DATABASE root'
     dismod_at.sql_command(connection, command)
     #
     # other_input_table
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin create_all_node_db}
@@ -142,8 +142,10 @@ cov_reference_table
 *******************
 This must be ``None`` or a ``list`` of ``dict`` representation of the
 :ref:`cov_reference_table-name`.
-If it `None``, the :ref:`com_cov_reference-name` routine
+If it `None``, the :ref:`com_all_cov_reference-name` routine
 is used to create the cov_reference table.
+This gives the same result as using :ref:`com_cov_reference-name`
+for each node and split reference value.
 
 {xrst_end create_all_node_db}
 '''
@@ -292,32 +294,30 @@ def create_all_node_db(
     #
     # cov_reference_table
     if cov_reference_table == None :
+        cov_reference_dict = at_cascade.com_all_cov_reference(
+            option_all_table      = option_all_table,
+            split_reference_table = split_reference_table,
+            node_table            = node_table,
+            covariate_table       = covariate_table,
+            root_node_id          = root_node_id,
+            data_table            = data_table,
+        )
+        if len(split_reference_table) == 0 :
+            split_reference_list = [ None ]
+        else :
+            split_reference_list = range( len(split_reference_table) )
         cov_reference_table = list()
         for node_id in range( len(node_table) ) :
-            ancestor      = node_id
-            while ancestor != root_node_id and ancestor != None :
-                ancestor = node_table[ancestor]['parent']
-            if ancestor == root_node_id :
-                if len(split_reference_table) == 0 :
-                    split_reference_list = [ None ]
-                else :
-                    split_reference_list = range( len(split_reference_table) )
-                for split_reference_id in split_reference_list :
-                    reference_list = at_cascade.com_cov_reference(
-                        option_all_table      = option_all_table,
-                        split_reference_table = split_reference_table,
-                        node_table            = node_table,
-                        covariate_table       = covariate_table,
-                        shift_node_id         = node_id,
-                        split_reference_id    = split_reference_id,
-                        data_table            = data_table,
-                    )
+            for split_reference_id in split_reference_list :
+                key = (node_id, split_reference_id)
+                if key in cov_reference_dict :
+                    reference_list = cov_reference_dict[key]
                     for (covariate_id, reference) in enumerate(reference_list) :
                         row = {
                             'node_id'            : node_id ,
                             'split_reference_id' : split_reference_id,
                             'covariate_id'       : covariate_id,
-                            'reference_value'    : reference_list[covariate_id],
+                            'reference_value'    : reference,
                         }
                         cov_reference_table.append(row)
     # -------------------------------------------------------------------------
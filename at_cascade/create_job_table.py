@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin create_job_table}
@@ -151,6 +151,15 @@ this job is completed. If end_child_job_id is equal to start_child_job_id,
 there are no jobs that require the results of this job.
 Note that this job is the parent of each job between the start and end,
 
+database_dir
+============
+This ``str`` is the :ref:`get_database_dir@database_dir` for this job; i.e.,
+the directory, relative to the :ref:`option_all_table@result_dir` ,
+where the database for this job is (or will be) located.
+The directories for all the jobs are computed when the job table is created
+and each directory is computed using the directory for the
+parent node (or the same node before it was split).
+
 
 {xrst_end create_job_table}
 '''
@@ -165,6 +174,80 @@ def ancestor_set(node_table, node_id) :
         result.add(node_id)
     return result
 # -----------------------------------------------------------------------------
+# database_dir = set_database_dir(database_dir_dict, ... )
+#
+# database_dir_dict
+# This dict maps (node_id, split_reference_id) to the corresponding
+# database_dir; see get_database_dir. The directories that this directory
+# depends on are also placed in database_dir_dict.
+#
+# The other arguments are the same as for get_database_dir and
+# database_dir is the directory for node_id, split_reference_id.
+def set_database_dir(
+    database_dir_dict          ,
+    node_table                 ,
+    split_reference_table      ,
+    node_split_set             ,
+    root_node_id               ,
+    root_split_reference_id    ,
+    node_id                    ,
+    split_reference_id         ,
+) :
+    #
+    # key
+    key = (node_id, split_reference_id)
+    if key in database_dir_dict :
+        return database_dir_dict[key]
+    #
+    # split
+    split = root_split_reference_id != split_reference_id \
+        and node_id in node_split_set
+    #
+    # split_reference_name
+    if split :
+        row                  = split_reference_table[split_reference_id]
+        split_reference_name = row['split_reference_name']
+    #
+    # database_dir
+    node_name = node_table[node_id]['node_name']
+    if node_id == root_node_id :
+        database_dir = node_name
+        if split :
+            database_dir = f'{database_dir}/{split_reference_name}'
+    elif split :
+        database_dir = set_database_dir(
+            database_dir_dict,
+            node_table,
+            split_reference_table,
+            node_split_set,
+            root_node_id,
+            root_split_reference_id,
+            node_id,
+            root_split_reference_id,
+        )
+        database_dir = f'{database_dir}/{split_reference_name}'
+    else :
+        parent_node_id = node_table[node_id]['parent']
+        if parent_node_id == None :
+            root_node_name = node_table[root_node_id]['node_name']
+            msg  = f'{node_name} is not a descendant of the root node '
+            msg += root_node_name
+            assert False, msg
+        database_dir = set_database_dir(
+            database_dir_dict,
+            node_table,
+            split_reference_table,
+            node_split_set,
+            root_node_id,
+            root_split_reference_id,
+            parent_node_id,
+            split_reference_id,
+        )
+        database_dir = f'{database_dir}/{node_name}'
+    #
+    database_dir_dict[key] = database_dir
+    return database_dir
+# -----------------------------------------------------------------------------
 def get_child_job_table(
     job_id                     ,
     fit_node_id                ,
@@ -412,6 +495,20 @@ def create_job_table(
         # job_id
         job_id += 1
     #
+    # job_table[job_id]['database_dir']
+    database_dir_dict = dict()
+    for row in job_table :
+        row['database_dir'] = set_database_dir(
+            database_dir_dict,
+            node_table,
+            all_table['split_reference'],
+            node_split_set,
+            root_node_id,
+            root_split_reference_id,
+            row['fit_node_id'],
+            row['split_reference_id'],
+        )
+    #
     # BEGIN_RETURN
     # ...
     assert type(job_table)      == list
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin create_shift_db}
@@ -537,7 +537,7 @@ def create_shift_db(
     if no_ode_fit :
         assert job_table == None
     else :
-        assert type(job_table) == list
+        assert type(job_table) in [ list, at_cascade.job_table_class ]
     # END_DEF
     #
     # predict_sample
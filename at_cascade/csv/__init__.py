@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin csv.module}
@@ -100,6 +100,22 @@ split_reference_table = [
 ]
 '''{xrst_code}
 
+Internal Routines
+*****************
+The following routines are used by more than one of the csv routines.
+They are accessed using the ``at_cascade.csv`` package; e.g.,
+``at_cascade.csv.file_sha256`` .
+They are not part of the user API and are documented in the
+source code where they are defined:
+
+#. ``diagnose_one`` is defined in ``pre_one_job.py`` .
+#. ``copy_fit_db`` , ``database_fingerprint`` , and ``file_sha256``
+   are defined in ``pre_one_process.py`` .
+#. ``average_integrand_grid`` , ``get_multiplier_list_rate`` ,
+   ``get_option_value`` , ``get_parent_node_dict`` ,
+   ``get_rate_fun_dict`` , ``get_spline_no_effect_rate`` , and
+   ``read_random_effect_node_rate_sex`` are defined in ``simulate.py`` .
+
 Routines
 ********
 
@@ -107,6 +123,7 @@ Routines
 {xrst_toc_table
     at_cascade/csv/ancestor_fit.py
     at_cascade/csv/check_table.py
+    at_cascade/csv/covariate_array_class.py
     at_cascade/csv/covariate_avg.py
     at_cascade/csv/covariate_both.py
     at_cascade/csv/covariate_same.py
@@ -120,6 +137,7 @@ Routines
     at_cascade/csv/pre_parallel.py
     at_cascade/csv/pre_user.py
     at_cascade/csv/predict.py
+    at_cascade/csv/query_predict_class.py
     at_cascade/csv/read_table.py
     at_cascade/csv/set_truth.py
     at_cascade/csv/simulate.py
@@ -130,23 +148,36 @@ Routines
 {xrst_end csv.module}
 '''
 # BEGIN_SORT_THIS_LINE_PLUS_1
-from .ancestor_fit     import ancestor_fit
-from .check_table      import check_table
-from .covariate_avg    import covariate_avg
-from .covariate_both   import covariate_both
-from .covariate_same   import covariate_same
-from .covariate_spline import covariate_spline
-from .empty_str        import empty_str
-from .fit              import fit
-from .get_header       import get_header
-from .join_file        import join_file
-from .pre_one_job      import pre_one_job
-from .pre_one_process  import pre_one_process
-from .pre_parallel     import pre_parallel
-from .pre_user         import pre_user
-from .predict          import predict
-from .read_table       import read_table
-from .set_truth        import set_truth
-from .simulate         import simulate
-from .write_table      import write_table
+from .ancestor_fit          import ancestor_fit
+from .check_table           import check_table
+from .covariate_array_class import covariate_array_class
+from .covariate_avg         import covariate_avg
+from .covariate_both        import covariate_both
+from .covariate_same        import covariate_same
+from .covariate_spline      import covariate_spline
+from .empty_str             import empty_str
+from .fit                   import fit
+from .get_header            import get_header
+from .join_file             import join_file
+from .pre_one_job           import diagnose_one
+from .pre_one_job           import pre_one_job
+from .pre_one_process       import copy_fit_db
+from .pre_one_process       import database_fingerprint
+from .pre_one_process       import file_sha256
+from .pre_one_process       import pre_one_process
+from .pre_parallel          import pre_parallel
+from .pre_user              import pre_user
+from .predict               import predict
+from .query_predict_class   import query_predict_class
+from .read_table            import read_table
+from .set_truth             import set_truth
+from .simulate              import average_integrand_grid
+from .simulate              import get_multiplier_list_rate
+from .simulate              import get_option_value
+from .simulate              import get_parent_node_dict
+from .simulate              import get_rate_fun_dict
+from .simulate              import get_spline_no_effect_rate
+from .simulate              import read_random_effect_node_rate_sex
+from .simulate              import simulate
+from .write_table           import write_table
 # END_SORT_THIS_LINE_MINUS_1
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin csv.ancestor_fit}
@@ -88,7 +88,7 @@ def ancestor_fit(
     allow_same_job,
 ) :
     assert type(fit_dir) == str
-    assert type(job_table) == list
+    assert type(job_table) in [ list, at_cascade.job_table_class ]
     assert type(predict_job_id) == int
     assert type(node_table) == list
     assert type( root_node_id ) == int
@@ -98,25 +98,12 @@ def ancestor_fit(
     assert type( allow_same_job ) == bool
     # END_DEF
     #
-    # node_split_set
-    node_split_set = { root_node_id }
-    #
-    # job_name, predict_node_id, predict_split_reference_id
+    # job_name
     job_row                     = job_table[predict_job_id]
     job_name                    = job_row['job_name']
-    predict_node_id             = job_row['fit_node_id']
-    predict_split_reference_id  = job_row['split_reference_id']
     #
-    # predict_job_dir, ancestor_job_dir
-    predict_job_dir = at_cascade.get_database_dir(
-        node_table              = node_table                     ,
-        split_reference_table   = split_reference_table          ,
-        node_split_set          = node_split_set                 ,
-        root_node_id            = root_node_id                   ,
-        root_split_reference_id = root_split_reference_id        ,
-        fit_node_id             = predict_node_id                ,
-        fit_split_reference_id  = predict_split_reference_id     ,
-    )
+    # predict_job_dir
+    predict_job_dir = job_row['database_dir']
     #
     # sample_ok
     predict_node_database = f'{fit_dir}/{predict_job_dir}/dismod.db'
@@ -140,22 +127,12 @@ def ancestor_fit(
             assert type(predict_job_dir) == str
             return predict_job_dir, ancestor_job_dir
         #
-        # job_name, ancestor_node_id, ancestor_split_reference_id
+        # job_name
         job_row                      = job_table[job_id]
         job_name                     = job_row['job_name']
-        ancestor_node_id             = job_row['fit_node_id']
-        ancestor_split_reference_id  = job_row['split_reference_id']
         #
         # ancestor_job_dir
-        ancestor_job_dir = at_cascade.get_database_dir(
-            node_table              = node_table                     ,
-            split_reference_table   = split_reference_table          ,
-            node_split_set          = node_split_set                 ,
-            root_node_id            = root_node_id                   ,
-            root_split_reference_id = root_split_reference_id        ,
-            fit_node_id             = ancestor_node_id               ,
-            fit_split_reference_id  = ancestor_split_reference_id     ,
-        )
+        ancestor_job_dir = job_row['database_dir']
         #
         # sample_ok
         ancestor_job_database = f'{fit_dir}/{ancestor_job_dir}/dismod.db'
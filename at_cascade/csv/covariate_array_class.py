@@ -0,0 +1,461 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
+# ----------------------------------------------------------------------------
+import csv
+import multiprocessing.shared_memory
+import numpy
+import at_cascade
+r'''
+{xrst_begin csv.covariate_array_class}
+{xrst_spell
+  cov
+  numpy
+}
+
+Columnar Representation of a covariate.csv File
+###############################################
+
+covariate_array_class
+*********************
+{xrst_code py}
+cov_array = covariate_array_class(file_name)
+{xrst_code}
+
+file_name
+=========
+This ``str`` is the name of a
+:ref:`csv.simulate@Input Files@covariate.csv` file.
+The file is read once and is not used after *cov_array* is constructed.
+The *sex* column must be ``female`` or ``male`` and,
+for each *node_name* , *sex* pair,
+the age-time grid must be rectangular and the same as for all the other pairs;
+see :ref:`csv.module@Notation@Rectangular Grid` .
+An assert is generated if this is not the case.
+
+node_list
+*********
+This is a ``list`` of the node names in the order they first
+appear in *file_name* .
+
+node_index
+**********
+This ``dict`` maps each node name in *node_list* to its index in *node_list* .
+
+sex_list
+********
+This is the ``list`` [ ``female`` , ``both`` , ``male`` ].
+The index of a sex in *sex_list* is its
+:ref:`split_reference_table@split_reference_id` in the
+:ref:`csv.module@split_reference_table` .
+
+age_grid
+********
+This is the sorted ``list`` of ``float`` age values in *file_name* .
+
+time_grid
+*********
+This is the sorted ``list`` of ``float`` time values in *file_name* .
+
+cov_name_list
+*************
+This is the ``list`` of column names in *file_name* excluding
+node_name, sex, age, and time.
+It includes ``omega`` and the
+:ref:`covariate names <csv.simulate@Input Files@covariate.csv@covariate_name>`
+in the same order as in *file_name* .
+
+cov_index
+*********
+This ``dict`` maps each name in *cov_name_list* to its index in *cov_name_list*.
+
+value
+*****
+This is a numpy array with shape
+( *n_node* , 3, *n_age* , *n_time* , *n_cov* )
+where *n_node* , *n_age* , *n_time* , *n_cov* are the lengths of
+*node_list* , *age_grid* , *time_grid* , and *cov_name_list* .
+The value
+
+| |tab| *cov_array* . ``value`` [ *i_node* , *i_sex* , *i_age* , *i_time* , *i_cov* ]
+
+is the value for the corresponding node, sex, age, time, and covariate.
+The ``both`` values are computed from the female and male values
+as specified in :ref:`csv.covariate_both@both` .
+
+grid_order
+**********
+This is a numpy ``int`` array with shape ( *n_node* , 3, *n_age* * *n_time* ).
+For each *i_node* and *i_sex* , the values
+
+| |tab| *cov_array* . ``grid_order`` [ *i_node* , *i_sex* , : ]
+
+are the indices *i_age* * *n_time* + *i_time*
+in the order that the corresponding rows appear in *file_name* .
+The order for ``both`` is the same as the order for ``female`` .
+
+get_value
+*********
+{xrst_code py}
+z_grid = cov_array.get_value(node_name, sex, cov_name)
+{xrst_code}
+Sets *z_grid* to the numpy array with shape ( *n_age* , *n_time* )
+containing the values for the specified node, sex, and covariate.
+This is a view into *cov_array* . ``value`` and should not be modified.
+
+average
+*******
+{xrst_code py}
+covariate_average = cov_array.average()
+{xrst_code}
+Sets *covariate_average* to a ``dict`` such that
+for each *node_name* in *node_list* and *sex* in *sex_list* ,
+*covariate_average* [ ( *node_name* , *sex* ) ] is a ``dict`` that maps
+each covariate name (not including omega) to its average over the age-time grid.
+The values are summed in the order that the rows appear in *file_name* ,
+so this is equal to the return value for :ref:`csv.covariate_avg-name`
+with the same node_name and sex.
+
+same
+****
+{xrst_code py}
+cov_same = cov_array.same()
+{xrst_code}
+Sets *cov_same* to a ``dict`` with the same meaning as the return value
+for :ref:`csv.covariate_same-name` .
+
+spline_cov
+**********
+{xrst_code py}
+spline_cov = cov_array.spline_cov()
+{xrst_code}
+Sets *spline_cov* to a ``dict`` of ``dict`` of ``dict`` with the same meaning
+as the return value *spline_cov* for :ref:`csv.covariate_spline-name` .
+Only one spline is created for each set of
+(node_name, sex, cov_name) triples that have the same values; see *same* .
+The splines are created the first time this function is called.
+
+share
+*****
+{xrst_code py}
+cov_array.share(shared_name)
+{xrst_code}
+This copies *cov_array* . ``value`` and *cov_array* . ``grid_order``
+to a new shared memory block with the name *shared_name*
+(see :ref:`map_shared-name` ) and changes these attributes to
+read-only views of the shared memory.
+After this call, pickling *cov_array* (e.g., passing it as an argument
+to a process started using spawn) only pickles the small attributes and
+the name of the shared memory block;
+unpickling attaches to the shared memory block.
+Processes started using fork share the memory with their parent.
+Hence the memory used for the covariate values does not grow with
+the number of processes.
+
+unlink
+******
+{xrst_code py}
+cov_array.unlink()
+{xrst_code}
+This must be called by the process that called ``share``
+when the other processes no longer need the shared memory block.
+The attributes of *cov_array* can still be used in this process
+after ``unlink`` .
+
+{xrst_end csv.covariate_array_class}
+'''
+class covariate_array_class :
+    #
+    # __init__
+    def __init__(self, file_name) :
+        assert type(file_name) == str
+        #
+        # header, column
+        file_ptr = open(file_name, newline = '')
+        reader   = csv.reader(file_ptr)
+        header   = next(reader)
+        column   = [ list() for name in header ]
+        for row in reader :
+            if len(row) != len(header) :
+                line = reader.line_num
+                msg  = f'{file_name}: line {line}\n'
+                msg += 'does not have the same number of columns as the header'
+                assert False, msg
+            for (j, item) in enumerate(row) :
+                column[j].append(item)
+        file_ptr.close()
+        for name in [ 'node_name', 'sex', 'age', 'time', 'omega' ] :
+            if name not in header :
+                msg  = f'The column name {name} does not appear in this file\n'
+                msg += f'{file_name}'
+                assert False, msg
+        n_row = len( column[0] )
+        if n_row == 0 :
+            msg = f'{file_name} has no rows below the header row'
+            assert False, msg
+        #
+        # node_list, node_index, node_id
+        self.node_list  = list()
+        self.node_index = dict()
+        node_id         = numpy.empty(n_row, dtype = int)
+        node_column     = column[ header.index('node_name') ]
+        for (i_row, node_name) in enumerate( node_column ) :
+            if node_name not in self.node_index :
+                self.node_index[node_name] = len( self.node_list )
+                self.node_list.append( node_name )
+            node_id[i_row] = self.node_index[node_name]
+        #
+        # sex_list, sex_id
+        self.sex_list = [ 'female', 'both', 'male' ]
+        sex_column    = numpy.array( column[ header.index('sex') ] )
+        sex_id        = numpy.full(n_row, 1, dtype = int)
+        sex_id[ sex_column == 'female' ] = 0
+        sex_id[ sex_column == 'male' ]   = 2
+        if numpy.any( sex_id == 1 ) :
+            i_row = int( numpy.flatnonzero( sex_id == 1 )[0] )
+            line  = i_row + 2
+            sex   = sex_column[i_row]
+            msg  = f'{file_name}: line {line}\n'
+            msg += f'sex = {sex} is not female or male'
+            assert False, msg
+        #
+        # age_grid, age_id, time_grid, time_id
+        age  = numpy.array( column[ header.index('age') ],  dtype = float )
+        time = numpy.array( column[ header.index('time') ], dtype = float )
+        age_grid,  age_id  = numpy.unique(age,  return_inverse = True)
+        time_grid, time_id = numpy.unique(time, return_inverse = True)
+        self.age_grid  = age_grid.tolist()
+        self.time_grid = time_grid.tolist()
+        #
+        # cov_name_list, cov_index
+        exclude            = { 'node_name', 'sex', 'age', 'time' }
+        self.cov_name_list = [ name for name in header if name not in exclude ]
+        self.cov_index     = dict()
+        for (i_cov, cov_name) in enumerate( self.cov_name_list ) :
+            self.cov_index[cov_name] = i_cov
+        #
+        # n_node, n_age, n_time, n_cov
+        n_node = len( self.node_list )
+        n_age  = len( self.age_grid )
+        n_time = len( self.time_grid )
+        n_cov  = len( self.cov_name_list )
+        #
+        # count
+        # check for a rectangular grid
+        count = numpy.zeros( (n_node, 3, n_age, n_time), dtype = int )
+        numpy.add.at(count, (node_id, sex_id, age_id, time_id), 1)
+        count = count[:, [0, 2], :, :]
+        if numpy.any( count != 1 ) :
+            (i_node, i_sex, i_age, i_time) = numpy.argwhere( count != 1 )[0]
+            node_name = self.node_list[i_node]
+            sex       = [ 'female', 'male' ][i_sex]
+            msg  = f'{file_name}: node_name = {node_name}, sex = {sex}\n'
+            msg += f'age = {self.age_grid[i_age]}, '
+            msg += f'time = {self.time_grid[i_time]} '
+            msg += f'appears {count[i_node, i_sex, i_age, i_time]} times.\n'
+            msg += 'Expected following rectangular grid '
+            msg += 'for each (node_name, sex) pair:\n'
+            msg += f'age_grid  = {self.age_grid}\n'
+            msg += f'time_grid = {self.time_grid}'
+            assert False, msg
+        #
+        # grid_order
+        order           = numpy.argsort(node_id * 3 + sex_id, kind = 'stable')
+        grid_index      = (age_id * n_time + time_id)[order]
+        grid_index      = grid_index.reshape( (n_node, 2, n_age * n_time) )
+        self.grid_order = grid_index[:, [0, 0, 1], :]
+        #
+        # value
+        self.value = numpy.empty( (n_node, 3, n_age, n_time, n_cov) )
+        index      = (node_id, sex_id, age_id, time_id)
+        for (i_cov, cov_name) in enumerate( self.cov_name_list ) :
+            cov_column = column[ header.index(cov_name) ]
+            cov_value  = numpy.array(cov_column, dtype = float)
+            self.value[index + (i_cov,)] = cov_value
+        #
+        # value[:, 1, ...]
+        # see covariate_both
+        female = self.value[:, 0, :, :, :]
+        male   = self.value[:, 2, :, :, :]
+        self.value[:, 1, :, :, :] = numpy.where(
+            female == male, female, (female + male) / 2.0
+        )
+        #
+        # spline_cov_cache
+        self.spline_cov_cache = None
+        #
+        # shared_name, shm
+        self.shared_name = None
+        self.shm         = None
+    #
+    # attach_shared
+    # set value and grid_order to views of self.shm
+    def attach_shared(self, value_shape, order_shape) :
+        value  = numpy.ndarray(
+            value_shape, dtype = float, buffer = self.shm.buf, offset = 0
+        )
+        offset = value.nbytes
+        order  = numpy.ndarray(
+            order_shape, dtype = int, buffer = self.shm.buf, offset = offset
+        )
+        value.flags.writeable = False
+        order.flags.writeable = False
+        self.value      = value
+        self.grid_order = order
+    #
+    # share
+    def share(self, shared_name) :
+        assert type(shared_name) == str
+        assert self.shared_name == None
+        #
+        # value, grid_order
+        value      = numpy.asarray(self.value, dtype = float)
+        grid_order = numpy.asarray(self.grid_order, dtype = int)
+        #
+        # shm
+        mapped   = at_cascade.map_shared(shared_name)
+        self.shm = multiprocessing.shared_memory.SharedMemory(
+            create = True, size = value.nbytes + grid_order.nbytes,
+            name   = mapped
+        )
+        self.shared_name = shared_name
+        #
+        # value, grid_order
+        self.attach_shared(value.shape, grid_order.shape)
+        self.value.flags.writeable      = True
+        self.grid_order.flags.writeable = True
+        self.value[:]      = value
+        self.grid_order[:] = grid_order
+        self.value.flags.writeable      = False
+        self.grid_order.flags.writeable = False
+    #
+    # unlink
+    def unlink(self) :
+        assert self.shared_name != None
+        self.shm.unlink()
+        self.shared_name = None
+    #
+    # __getstate__
+    def __getstate__(self) :
+        state = self.__dict__.copy()
+        state['spline_cov_cache'] = None
+        del state['shm']
+        if self.shared_name != None :
+            state['value']      = self.value.shape
+            state['grid_order'] = self.grid_order.shape
+        return state
+    #
+    # __setstate__
+    def __setstate__(self, state) :
+        self.__dict__.update(state)
+        self.shm = None
+        if self.shared_name != None :
+            mapped   = at_cascade.map_shared(self.shared_name)
+            self.shm = multiprocessing.shared_memory.SharedMemory(
+                create = False, name = mapped
+            )
+            self.attach_shared( state['value'], state['grid_order'] )
+    #
+    # get_value
+    def get_value(self, node_name, sex, cov_name) :
+        i_node = self.node_index[node_name]
+        i_sex  = self.sex_list.index(sex)
+        i_cov  = self.cov_index[cov_name]
+        return self.value[i_node, i_sex, :, :, i_cov]
+    #
+    # average
+    def average(self) :
+        #
+        # covariate_name_list
+        covariate_name_list = list()
+        for cov_name in self.cov_name_list :
+            if cov_name != 'omega' :
+                covariate_name_list.append( cov_name )
+        #
+        # ordered
+        # ordered[i_node, i_sex, k, i_cov] is the value for the k-th row,
+        # in file_name, that has the corresponding node and sex.
+        (n_node, n_sex, n_age, n_time, n_cov) = self.value.shape
+        n_grid  = n_age * n_time
+        flat    = self.value.reshape( (n_node, n_sex, n_grid, n_cov) )
+        ordered = numpy.take_along_axis(
+            flat, self.grid_order[:, :, :, numpy.newaxis], axis = 2
+        )
+        #
+        # mean
+        # cumsum accumulates in order; i.e., the same as covariate_avg
+        mean = numpy.cumsum(ordered, axis = 2)[:, :, -1, :] / n_grid
+        #
+        # covariate_average
+        covariate_average = dict()
+        for (i_node, node_name) in enumerate( self.node_list ) :
+            for (i_sex, sex) in enumerate( self.sex_list ) :
+                pair_average = dict()
+                for covariate_name in covariate_name_list :
+                    i_cov = self.cov_index[covariate_name]
+                    pair_average[covariate_name] = \
+                        float( mean[i_node, i_sex, i_cov] )
+                covariate_average[ (node_name, sex) ] = pair_average
+        return covariate_average
+    #
+    # same
+    def same(self) :
+        #
+        # pair_list
+        # same order as covariate_same so it chooses the same representatives
+        pair_list = list()
+        for node_name in sorted( self.node_list ) :
+            for sex in sorted( self.sex_list ) :
+                pair_list.append( (node_name, sex) )
+        #
+        # cov_same
+        cov_same = dict()
+        for cov_name in self.cov_name_list :
+            #
+            # first_triple
+            # maps the values for a triple to the first triple with those values
+            first_triple = dict()
+            for (node_name, sex) in pair_list :
+                triple = (node_name, sex, cov_name)
+                key    = self.get_value(node_name, sex, cov_name).tobytes()
+                if key not in first_triple :
+                    first_triple[key] = triple
+                cov_same[triple] = first_triple[key]
+        return cov_same
+    #
+    # spline_cov
+    def spline_cov(self) :
+        if self.spline_cov_cache != None :
+            return self.spline_cov_cache
+        #
+        # cov_same
+        cov_same = self.same()
+        #
+        # spline_cov
+        spline_cov = dict()
+        for node_name in self.node_list :
+            spline_cov[node_name] = dict()
+            for sex in self.sex_list :
+                spline_cov[node_name][sex] = dict()
+                for cov_name in self.cov_name_list :
+                    triple = (node_name, sex, cov_name)
+                    if cov_same[triple] == triple :
+                        z_grid = self.get_value(node_name, sex, cov_name)
+                        spline = at_cascade.grid_spline(
+                            self.age_grid, self.time_grid, z_grid
+                        )
+                        spline_cov[node_name][sex][cov_name] = spline
+        #
+        # spline_cov
+        # link from splines that are not needed to corresponding same spline
+        for node_name in self.node_list :
+            for sex in self.sex_list :
+                for cov_name in self.cov_name_list :
+                    triple = (node_name, sex, cov_name)
+                    if cov_same[triple] != triple :
+                        (node_other, sex_other, cov_other) = cov_same[triple]
+                        spline_cov[node_name][sex][cov_name] = \
+                            spline_cov[node_other][sex_other][cov_other]
+        #
+        self.spline_cov_cache = spline_cov
+        return spline_cov
@@ -1,9 +1,10 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 import multiprocessing
 import queue
+import numpy
 import dismod_at
 import at_cascade
 import copy
@@ -1255,15 +1256,14 @@ class weighting_function :
 # time_grid
 # is a sorted list of the time values in the covariae.csv file.
 #
-# csv_covariate_table
-# is the list of dict corresponding to the covariate.csv file
-# All the columns, except node_name and sex, have been converted to float
-# and rows with both sex have been added; see covariate_both.
+# cov_array
+# is the covariate_array_class representation of the covariate.csv file
+# (this includes the values for both sex).
 #
 # global_option_value
 # This routine assumes that global_option_value has been set.
 #
-# age_grid, time_grid, csv_covariate_table =
+# age_grid, time_grid, cov_array =
 def create_root_database(fit_dir) :
     assert type(fit_dir) == str
     #
@@ -1282,7 +1282,6 @@ def create_root_database(fit_dir) :
     input_table = dict()
     input_list = [
         'node',
-        'covariate',
         'predict_integrand',
         'prior',
         'parent_rate',
@@ -1296,6 +1295,10 @@ def create_root_database(fit_dir) :
         table             = at_cascade.csv.read_table(file_name)
         input_table[name] = at_cascade.csv.empty_str(table, 'to_none')
         at_cascade.csv.check_table(file_name, input_table[name])
+    #
+    # cov_array
+    file_name = f'{fit_dir}/covariate.csv'
+    cov_array = at_cascade.csv.covariate_array_class(file_name)
     print('begin creating root node database' )
     #
     # data_in_header
@@ -1308,30 +1311,14 @@ def create_root_database(fit_dir) :
         node_name   = row['node_name']
         node_set.add( node_name )
     #
-    # csv_covariate_table, covariate_list
-    # This is different from dismod_at_covariate table created below
-    csv_covariate_table = input_table['covariate']
-    exclude             = { 'node_name', 'sex', 'age', 'time', 'omega' }
-    covariate_list      = list( set( csv_covariate_table[0].keys() ) - exclude )
-    #
-    # cov_covariate_table
-    check_node_set      = set()
-    check_sex_set       = set()
-    for row in csv_covariate_table :
-        row['age']  = float( row['age'] )
-        row['time'] = float( row['time'] )
-        #
-        check_node_set.add( row['node_name'] )
-        check_sex_set.add(  row['sex'] )
-        #
-        row['omega'] = float( row['omega'] )
-        for covariate_name in covariate_list :
-            row[covariate_name] = float( row[covariate_name] )
-    if check_sex_set != { 'female', 'male' } :
-        print(check_sex_set)
-        msg  = 'The sexes above are in covariate.csv '
-        msg += 'but it should be female and male'
-        assert False, msg
+    # covariate_list
+    covariate_list = list()
+    for cov_name in cov_array.cov_name_list :
+        if cov_name != 'omega' :
+            covariate_list.append( cov_name )
+    #
+    # check_node_set
+    check_node_set = set( cov_array.node_list )
     if len(node_set - check_node_set) > 0 :
         difference = node_set - check_node_set
         msg  = f'{difference}\n'
@@ -1343,18 +1330,14 @@ def create_root_database(fit_dir) :
         msg += 'The nodes above are in covariate.csv but not in node.csv'
         assert False, msg
     #
-    # csv_covariate_table
-    csv_covariate_table = at_cascade.csv.covariate_both(csv_covariate_table)
-    #
     # root_node_name, root_node_sex, random_seed
     root_node_name = global_option_value['root_node_name']
     root_node_sex  = global_option_value['root_node_sex']
     random_seed    = global_option_value['random_seed']
     #
     # root_covariate_ref
-    root_covariate_ref = at_cascade.csv.covariate_avg(
-        csv_covariate_table, root_node_name, root_node_sex
-    )
+    cov_average_all    = cov_array.average()
+    root_covariate_ref = cov_average_all[ (root_node_name, root_node_sex) ]
     assert set( covariate_list ) == set( root_covariate_ref.keys() )
     #
     # root_covariate_ref
@@ -1429,13 +1412,18 @@ def create_root_database(fit_dir) :
     if bound_random != float('inf') :
         option_table['bound_random'] = bound_random
     #
-    # spline_cov
-    age_grid, time_grid, spline_cov = at_cascade.csv.covariate_spline(
-        csv_covariate_table, node_set
-    )
-    #
-    # data_table
-    data_table     = input_table['data_in']
+    # age_grid, time_grid, spline_cov
+    age_grid   = cov_array.age_grid
+    time_grid  = cov_array.time_grid
+    spline_cov = cov_array.spline_cov()
+    #
+    # data_table, age_mid, time_mid, group_dict
+    # group_dict[ (node_name, sex) ] is the list of data_id for the rows
+    # that have this node_name and sex.
+    data_table = input_table['data_in']
+    age_mid    = numpy.empty( len(data_table), dtype = float )
+    time_mid   = numpy.empty( len(data_table), dtype = float )
+    group_dict = dict()
     for (i_row, row) in enumerate(data_table) :
         if i_row != int( row['data_id'] ) :
             line = i_row + 2
@@ -1445,27 +1433,20 @@ def create_root_database(fit_dir) :
         # age_mid
         age_lower = float( row['age_lower'] )
         age_upper = float( row['age_upper'] )
-        age_mid   = (age_lower + age_upper) / 2.0
+        age_mid[i_row] = (age_lower + age_upper) / 2.0
         #
         # time_mid
         time_lower = float( row['time_lower'] )
         time_upper = float( row['time_upper'] )
-        time_mid   = (time_lower + time_upper) / 2.0
+        time_mid[i_row] = (time_lower + time_upper) / 2.0
         #
-        # row[c_j] for j = 0, ..., n_covariate - 1
+        # group_dict
         node_name = row['node_name']
         sex       = row['sex']
-        for index, covariate_name in enumerate( root_covariate_ref.keys() ) :
-            if sex != 'both' :
-                spline              = spline_cov[node_name][sex][covariate_name]
-                covariate_value     = spline(age_mid, time_mid)
-                row[covariate_name] = covariate_value
-            else :
-                row[covariate_name] = 0.0
-                for tmp in [ 'female', 'male' ] :
-                    spline              = spline_cov[node_name][tmp][covariate_name]
-                    covariate_value     = spline(age_mid, time_mid)
-                    row[covariate_name] += covariate_value / 2.0
+        key       = (node_name, sex)
+        if key not in group_dict :
+            group_dict[key] = list()
+        group_dict[key].append(i_row)
         #
         # row
         row['node']       = row['node_name']
@@ -1484,6 +1465,34 @@ def create_root_database(fit_dir) :
         row['sex']        = at_cascade.csv.sex_name2value[sex]
         row['one']        = '1.0'
     #
+    # data_table
+    # row[c_j] for j = 0, ..., n_covariate - 1.
+    # The covariates for all the rows with the same node_name and sex
+    # are interpolated using one call to batch_eval.
+    cov_name_list = list( root_covariate_ref.keys() )
+    for (node_name, sex) in group_dict :
+        data_id_list = group_dict[ (node_name, sex) ]
+        x            = age_mid[data_id_list]
+        y            = time_mid[data_id_list]
+        if sex != 'both' :
+            spline_list = [
+                spline_cov[node_name][sex][covariate_name]
+                for covariate_name in cov_name_list
+            ]
+            value = at_cascade.batch_eval(spline_list, x, y)
+        else :
+            value = 0.0
+            for tmp in [ 'female', 'male' ] :
+                spline_list = [
+                    spline_cov[node_name][tmp][covariate_name]
+                    for covariate_name in cov_name_list
+                ]
+                value += at_cascade.batch_eval(spline_list, x, y) / 2.0
+        for (j, data_id) in enumerate(data_id_list) :
+            row = data_table[data_id]
+            for (k, covariate_name) in enumerate(cov_name_list) :
+                row[covariate_name] = value[j, k]
+    #
     # integrand_table
     integrand_set = set()
     for row in data_table :
@@ -1550,25 +1559,26 @@ def create_root_database(fit_dir) :
         node_table.append( row_out )
     #
     # cov_same
-    cov_same = at_cascade.csv.covariate_same(csv_covariate_table)
+    cov_same = cov_array.same()
     #
     # weight_dict, weight_count
     weight_dict    = dict()
     weight_count   = 0
-    for row in csv_covariate_table :
-        node_name = row['node_name']
-        sex_name  = row['sex']
-        for covariate_name in covariate_list :
-            triple = (node_name, sex_name, covariate_name)
-            if cov_same[triple] == triple :
-                if triple not in weight_dict :
+    for node_name in cov_array.node_list :
+        for sex_name in cov_array.sex_list :
+            for covariate_name in covariate_list :
+                triple = (node_name, sex_name, covariate_name)
+                if cov_same[triple] == triple :
                     fun                 = weighting_function(weight_count, )
                     weight_count       += 1
                     weight_dict[triple] = fun
-                age    = row['age']
-                time   = row['time']
-                weight = row[covariate_name]
-                weight_dict[triple].set(age, time, weight)
+                    z_grid = cov_array.get_value(
+                        node_name, sex_name, covariate_name
+                    )
+                    for (i_age, age) in enumerate(age_grid) :
+                        for (i_time, time) in enumerate(time_grid) :
+                            weight = float( z_grid[i_age, i_time] )
+                            fun.set(age, time, weight)
     #
     # weight_dict
     for node_name in node_set :
@@ -1797,9 +1807,8 @@ def create_root_database(fit_dir) :
     #
     assert type(age_grid) == list
     assert type(time_grid) == list
-    assert type(csv_covariate_table) == list
-    assert type( csv_covariate_table[0] ) == dict
-    return age_grid, time_grid, csv_covariate_table
+    assert type(cov_array) == at_cascade.csv.covariate_array_class
+    return age_grid, time_grid, cov_array
 # ----------------------------------------------------------------------------
 # Writes the all node data base.
 #
@@ -1820,8 +1829,8 @@ def create_root_database(fit_dir) :
 # time_grid
 # is a sorted list of the time values in the covariae.csv file.
 #
-# csv_covariate_table
-# is the list of dict corresponding to the covariate.csv file.
+# cov_array
+# is the covariate_array_class representation of the covariate.csv file.
 #
 # fit_goal_table
 # is the list of dict corresponding to the fit_goal.csv file.
@@ -1831,14 +1840,12 @@ def create_root_database(fit_dir) :
 # This routine assumes that global_option_value has been set.
 #
 def create_all_node_database(
-    fit_dir, age_grid, time_grid, csv_covariate_table, fit_goal_table
+    fit_dir, age_grid, time_grid, cov_array, fit_goal_table
 ) :
     assert type(fit_dir) == str
     assert type(age_grid) == list
     assert type(time_grid) == list
-    #
-    assert type(csv_covariate_table) == list
-    assert type( csv_covariate_table[0] ) == dict
+    assert type(cov_array) == at_cascade.csv.covariate_array_class
     #
     assert type(fit_goal_table) == list
     if len( fit_goal_table ) > 0 :
@@ -1984,35 +1991,17 @@ def create_all_node_database(
     # omega_data
     # This is set equal to the value of omega and is only used for the
     # omega constraint.
-    n_age      = len( age_grid )
-    n_time     = len( time_grid )
-    none_list  = (n_age * n_time)  * [ None ]
+    assert age_grid == cov_array.age_grid
+    assert time_grid == cov_array.time_grid
     omega_data = dict()
-    for row in csv_covariate_table :
-        node_name          = row['node_name']
-        sex                = row['sex']
-        age                = row['age']
-        time               = row['time']
-        omega              = row['omega']
-        #
-        if sex not in [ 'female', 'male', 'both' ] :
-            msg  = 'covariate.csv: sex is not female or male'
-            assert False, msg
-        split_reference_id = at_cascade.table_name2id(
-            split_reference_table, 'split_reference', sex
-        )
-        if node_name not in omega_data :
-            omega_data[node_name] = list()
-            for k in range( len(split_reference_table) ) :
-                    row = list()
-                    for ij in range( n_age * n_time ) :
-                        row.append(None)
-                    omega_data[node_name].append(row)
-        #
-        k = split_reference_id
-        i = age_grid.index(age)
-        j = time_grid.index(time)
-        omega_data[node_name][k][i * n_time + j] = omega
+    for node_name in cov_array.node_list :
+        omega_data[node_name] = list()
+        for sex in cov_array.sex_list :
+            # sex is split_reference_name for split_reference_id = k
+            k = len( omega_data[node_name] )
+            assert split_reference_table[k]['split_reference_name'] == sex
+            z_grid = cov_array.get_value(node_name, sex, 'omega')
+            omega_data[node_name].append( z_grid.flatten().tolist() )
     #
     # cov_reference_table
     cov_reference_table = None
@@ -2026,6 +2015,7 @@ def create_all_node_database(
         n_covariate         = len(  root_node_table['covariate'] )
         n_split             = len( at_cascade.csv.split_reference_table )
         node_table          = root_node_table['node']
+        cov_average_all     = cov_array.average()
         for node_id in range( len(node_table) ) :
             ancestor      = node_id
             while ancestor != root_node_id and ancestor != None :
@@ -2036,9 +2026,11 @@ def create_all_node_database(
                     sex           = row['split_reference_name']
                     sex_reference = row['split_reference_value']
                     node_name     = node_table[node_id]['node_name']
-                    cov_average = at_cascade.csv.covariate_avg(
-                        csv_covariate_table, node_name, sex
-                    )
+                    if (node_name, sex) not in cov_average_all :
+                        msg  = f'node "{node_name}" does not appear with '
+                        msg += f'sex "{sex}" covariate_table.'
+                        assert False, msg
+                    cov_average = cov_average_all[ (node_name, sex) ]
                     reference_list = list()
                     for covariate_id in range( n_covariate ) :
                         row             =  root_node_table['covariate'][covariate_id]
@@ -2117,11 +2109,11 @@ def fit(fit_dir, max_node_depth = None) :
         row['node_id'] = node_id
     #
     # root.db
-    age_grid, time_grid, covariate_table = create_root_database(fit_dir)
+    age_grid, time_grid, cov_array = create_root_database(fit_dir)
     #
     # all_node.db
     create_all_node_database(
-        fit_dir, age_grid, time_grid, covariate_table, fit_goal_table
+        fit_dir, age_grid, time_grid, cov_array, fit_goal_table
     )
     #
     # node_table
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin csv.pre_one_job}
@@ -8,6 +8,9 @@ r'''
   avg
   avgint
   tru
+  npz
+  numpy
+  savez
 }
 
 Calculate the predictions for One Fit
@@ -49,16 +52,16 @@ all_node_database
 *****************
 This string is the all node database for this fit.
 
-all_covariate_table
-*******************
-The list of dict is the in memory representation of the
-covariate.csv file
+cov_array
+*********
+This is the :ref:`csv.covariate_array_class-name` representation of the
+covariate.csv file.
 
 float_precision
 ***************
 This is the number of decimal digits of precision to include for
-float values in fit_predict.csv, sam_predict.csv, and tru_predict.csv;
-see below.
+avg_integrand values in fit_predict.csv, sam_predict.csv,
+and tru_predict.csv; see below.
 
 fit_same_as_predict
 *******************
@@ -75,49 +78,82 @@ option_predict
 This is an in memory representation of
 :ref:`csv.predict@Input Files@option_predict.csv` .
 
-Csv Output Files
-****************
-#. The csv output files are located in the prediction directory; i.e.,
+Prediction Output Files
+***********************
+#. The prediction output files are located in the prediction directory; i.e.,
    the directory corresponding to the predictions for this location, sex.
+   They are numpy ``.npz`` files (see ``numpy.savez`` ) so that
+   :ref:`csv.pre_user-name` can read them without converting text to numbers.
 #. The predictions are on the same age, time grid as the covariate file.
 #. If *fit_same_as_predict* is true, the following files are created
-   (the tru_posterior.csv file is not created when *sim_dir* is None):
+   (the tru_posterior.npz file is not created when *sim_dir* is None):
 
     .. csv-table::
 
-        fit_posterior.csv, uses optimal posterior variable values
-        sam_posterior.csv, uses samples from the posterior
-        tru_posterior.csv, uses simulation variable values for this location,sex
+        fit_posterior.npz, uses optimal posterior variable values
+        sam_posterior.npz, uses samples from the posterior
+        sum_posterior.npz, summary of the samples from the posterior
+        tru_posterior.npz, uses simulation variable values for this location,sex
 
 #. If *fit_same_as_predict* is false, the following files are created
-   (the tru_prior.csv file is not created when *sim_dir* is None):
+   (the tru_prior.npz file is not created when *sim_dir* is None):
 
     .. csv-table::
 
-        fit_prior.csv,     uses optimal prior variable values
-        sam_prior.csv,     uses samples from the prior
-        tru_prior.csv,     uses simulation variable values for an ancestor
+        fit_prior.npz,     uses optimal prior variable values
+        sam_prior.npz,     uses samples from the prior
+        sum_prior.npz,     summary of the samples from the prior
+        tru_prior.npz,     uses simulation variable values for an ancestor
+
+#. The sam files are not created when
+   :ref:`csv.predict@Input Files@option_predict.csv@sample_output`
+   is ``summary`` and the sum files are only created when it is
+   ``summary`` or ``both`` .
+
+
+#. The following arrays are included in these files
+   (the sample_index array is only included in the sample files).
+   Each array, except x and float_precision,
+   has one element for each row of the dismod_at predict table:
+
+    .. csv-table::
+        :header-rows: 1
 
+        Array,           Meaning
+        avgint_id,       This index the value we are predicting
+        sample_index,    This index the random samples for each value
+        avg_integrand,   This is the model value for the prediction
+        age,             Age for this prediction
+        time,            Time for this prediction
+        node_id,         Identifies the node for this prediction.
+        integrand_id,    Identifies the integrand for this prediction.
+        x,               x[ i ; j ] is the value of the j-th covariate for row i
+        float_precision, The *float_precision* argument to this routine
 
-#. The following columns are included in these files
-   (the sample_index column is only included in the sample files):
+#. The sum files have one element (row) for each avgint_id in the
+   corresponding sam file.
+   They have the same avgint_id, age, time, node_id, integrand_id, x,
+   and float_precision arrays as the sam file
+   (for the rows corresponding to avgint_id) and the following arrays:
 
     .. csv-table::
         :header-rows: 1
 
-        Column,        Meaning
-        avgint_id,     This index the value we are predicting
-        sample_index,  This index the random samples for each value
-        avg_integrand, This is the model value for the prediction
-        age_lower,     Lower age limit for averaging this integrand
-        age_upper,     Upper age limit for averaging (must equal lower).
-        time_lower,    Lower time limit for averaging this integrand
-        time_upper,    Upper time limit for averaging (must equal lower).
-        node_id,       Identifies the node for this prediction.
-        x_j,           Value of the j-th covariate
+        Array,           Meaning
+        n_sample,        number of samples for this avgint_id
+        mean,            mean of the samples for this avgint_id
+        std,             standard deviation of the samples for this avgint_id
+        quantile,        quantile[ i ; k ] is the quantile_level[k] quantile
+        quantile_level,  the quantiles in *summary_quantile*
+
+Diagnostics
+***********
+The db2csv and plot diagnostics are not created by this routine;
+see :ref:`csv.pre_parallel@Diagnostics` .
 
 {xrst_end csv.pre_one_job}
 r'''
+import numpy
 import dismod_at
 import at_cascade
 import copy
@@ -219,6 +255,68 @@ def diagnose_one(
             rate_set       = rate_set               ,
         )
 # ----------------------------------------------------------------------------
+# summary_dict = sample_summary(array_dict, quantile_level)
+# array_dict is the sam_{suffix}.npz arrays and quantile_level is the list of
+# quantiles in summary_quantile. The return value has the arrays for the
+# corresponding sum_{suffix}.npz file.
+def sample_summary(array_dict, quantile_level) :
+    assert type(array_dict) == dict
+    assert type(quantile_level) == list
+    #
+    # avgint_id, sample_index, avg_integrand
+    avgint_id     = array_dict['avgint_id']
+    sample_index  = array_dict['sample_index']
+    avg_integrand = array_dict['avg_integrand']
+    #
+    # order
+    # sorts by avgint_id and then by sample_index
+    order = numpy.lexsort( (sample_index, avgint_id) )
+    #
+    # unique_id, first, count
+    unique_id, first, count = numpy.unique(
+        avgint_id[order], return_index = True, return_counts = True
+    )
+    n_avgint = len(unique_id)
+    n_sample = int( count[0] )
+    assert numpy.all( count == n_sample )
+    #
+    # value
+    # value[i, j] is the j-th sample of the prediction for unique_id[i]
+    value = avg_integrand[order].reshape( (n_avgint, n_sample) )
+    #
+    # sample_std
+    if n_sample > 1 :
+        sample_std = numpy.std(value, axis = 1, ddof = 1)
+    else :
+        sample_std = numpy.zeros(n_avgint, dtype = float)
+    #
+    # quantile
+    # quantile[i, k] is the quantile_level[k] quantile for unique_id[i]
+    quantile = numpy.empty( (n_avgint, len(quantile_level)), dtype = float )
+    if len(quantile_level) > 0 :
+        quantile[:] = numpy.quantile(value, quantile_level, axis = 1).T
+    #
+    # row
+    # index in array_dict of the first sample for each unique_id
+    row = order[first]
+    #
+    # summary_dict
+    summary_dict = {
+        'avgint_id'       : unique_id ,
+        'n_sample'        : numpy.full(n_avgint, n_sample, dtype = int) ,
+        'mean'            : numpy.mean(value, axis = 1) ,
+        'std'             : sample_std ,
+        'quantile'        : quantile ,
+        'quantile_level'  : numpy.array(quantile_level, dtype = float) ,
+        'age'             : array_dict['age'][row] ,
+        'time'            : array_dict['time'][row] ,
+        'node_id'         : array_dict['node_id'][row] ,
+        'integrand_id'    : array_dict['integrand_id'][row] ,
+        'x'               : array_dict['x'][row, :] ,
+        'float_precision' : array_dict['float_precision'] ,
+    }
+    return summary_dict
+# ----------------------------------------------------------------------------
 
 # BEGIN_DEF
 # at_cascade.csv.pre_one_job
@@ -230,7 +328,7 @@ def pre_one_job(
     predict_node_id       ,
     predict_sex_id        ,
     all_node_database     ,
-    all_covariate_table   ,
+    cov_array             ,
     float_precision       ,
     fit_same_as_predict   ,
     option_predict        ,
@@ -241,22 +339,24 @@ def pre_one_job(
     assert type(pre_database) == str
     assert type(predict_node_id) == int
     assert type(all_node_database) == str
-    assert type(all_covariate_table) == list
-    assert type( all_covariate_table[0] ) == dict
+    assert type(cov_array) == at_cascade.csv.covariate_array_class
     assert type( float_precision ) == int
     assert type( fit_same_as_predict ) == bool
     assert type( option_predict ) == dict
     # END_DEF
     #
     #
-    # descendant_std_factor, number_sample_predict, zero_meas_value, db2csv, plot
+    # descendant_std_factor, number_sample_predict, zero_meas_value
     descendant_std_factor = option_predict['descendant_std_factor']
     number_sample_predict = option_predict['number_sample_predict']
     zero_meas_value       = option_predict['zero_meas_value']
-    db2csv                = option_predict['db2csv']
-    plot                  = option_predict['plot']
-    assert type( db2csv ) == bool
-    assert type( plot ) == bool
+    #
+    # sample_output, quantile_level
+    sample_output  = option_predict['sample_output']
+    quantile_level = [
+        float(level) for level in option_predict['summary_quantile'].split()
+    ]
+    assert sample_output in [ 'samples', 'summary', 'both' ]
     assert type( zero_meas_value) == bool
     assert type( number_sample_predict ) == int
     assert type( descendant_std_factor ) == float
@@ -320,75 +420,60 @@ def pre_one_job(
     # avgint_table
     avgint_table = list()
     #
-    # male_index_dict
-    male_index_dict = dict()
-    if predict_sex_name == 'both' :
-        for (i_row, row) in enumerate(all_covariate_table) :
-            if row['node_name'] == predict_node_name :
-                sex  = row['sex']
-                age  = float( row['age'] )
-                time = float( row['time'] )
-                if sex == 'male' :
-                    if age not in male_index_dict :
-                        male_index_dict[age] = dict()
-                    if time not in male_index_dict[age] :
-                        male_index_dict[age][time] = i_row
-    #
-    # cov_row
-    for cov_row in all_covariate_table :
-        #
-        # select
-        if cov_row['sex'] == predict_sex_name :
-            select = True
-        elif cov_row['sex'] == 'female' and predict_sex_name == 'both' :
-            select = True
+    # node_value
+    # values for this node and sex, as an ( n_age * n_time , n_cov ) array
+    i_node     = cov_array.node_index[predict_node_name]
+    n_age      = len( cov_array.age_grid )
+    n_time     = len( cov_array.time_grid )
+    n_cov      = len( cov_array.cov_name_list )
+    node_value = cov_array.value[i_node, predict_sex_id, :, :, :]
+    node_value = node_value.reshape( (n_age * n_time, n_cov) )
+    #
+    # grid_order
+    # index in node_value for each age, time pair in covariate.csv order
+    grid_order = cov_array.grid_order[i_node, predict_sex_id]
+    #
+    # x_value, x_key
+    # x_value[i][covariate_id] is the value of covariate_id for the i-th
+    # age, time pair in grid_order
+    n_x     = len(fit_covariate_table)
+    x_value = numpy.empty( (len(grid_order), n_x) )
+    x_key   = list()
+    for covariate_id in range( n_x ) :
+        covariate_name = fit_covariate_table[covariate_id]['covariate_name']
+        if covariate_name == 'one' :
+            x_value[:, covariate_id] = 1.0
+        elif covariate_name == 'sex' :
+            x_value[:, covariate_id] = predict_sex_value
         else :
-            select = False
-        select = select and cov_row['node_name'] == predict_node_name
-        if select :
-            #
-            # avgint_row
-            age  = float( cov_row['age'] )
-            time = float( cov_row['time'] )
-            avgint_row = {
-                'node_id'         : predict_node_id,
-                'subgroup_id'     : 0,
-                'weight_id'       : None,
-                'age_lower'       : age,
-                'age_upper'       : age,
-                'time_lower'      : time,
-                'time_upper'      : time,
-            }
-            #
-            # covariate_id
-            for covariate_id in range( len(fit_covariate_table) ) :
-                #
-                # covariate_name
-                covariate_name = \
-                    fit_covariate_table[covariate_id]['covariate_name']
-                #
-                # covariate_value
-                if covariate_name == 'one' :
-                    covariate_value = 1.0
-                elif covariate_name == 'sex' :
-                    covariate_value = predict_sex_value
-                else :
-                    covariate_value = float( cov_row[covariate_name] )
-                    if predict_sex_name == 'both' :
-                        male_row  = all_covariate_table[ male_index_dict[age][time] ]
-                        assert male_row['sex'] == 'male'
-                        assert cov_row['sex']  == 'female'
-                        covariate_value += float( male_row[covariate_name] )
-                        covariate_value /= 2.0
-                #
-                # avgint_row
-                key = f'x_{covariate_id}'
-                avgint_row[key] = covariate_value
-            #
-            # integrand_id
-            for integrand_id in integrand_id_list :
-                avgint_row['integrand_id'] = integrand_id
-                avgint_table.append( copy.copy( avgint_row ) )
+            i_cov = cov_array.cov_index[covariate_name]
+            x_value[:, covariate_id] = node_value[grid_order, i_cov]
+        x_key.append( f'x_{covariate_id}' )
+    x_value = x_value.tolist()
+    #
+    # i_grid, age_time_index
+    for (i_grid, age_time_index) in enumerate( grid_order.tolist() ) :
+        #
+        # avgint_row
+        age  = cov_array.age_grid[ age_time_index // n_time ]
+        time = cov_array.time_grid[ age_time_index % n_time ]
+        avgint_row = {
+            'node_id'         : predict_node_id,
+            'subgroup_id'     : 0,
+            'weight_id'       : None,
+            'age_lower'       : age,
+            'age_upper'       : age,
+            'time_lower'      : time,
+            'time_upper'      : time,
+        }
+        #
+        # avgint_row
+        avgint_row.update( zip(x_key, x_value[i_grid]) )
+        #
+        # integrand_id
+        for integrand_id in integrand_id_list :
+            avgint_row['integrand_id'] = integrand_id
+            avgint_table.append( copy.copy( avgint_row ) )
     #
     # connection
     connection = dismod_at.create_connection(
@@ -455,9 +540,25 @@ def pre_one_job(
     index            = pre_database.rfind('/')
     predict_node_dir = pre_database[: index]
     #
-    # float_format
-    n_digits = str( float_precision )
-    float_format = '{0:.' + n_digits + 'g}'
+    # avgint_age, avgint_time, avgint_node, avgint_integrand, avgint_x
+    n_avgint         = len(avgint_table)
+    n_x              = len(fit_covariate_table)
+    avgint_age       = numpy.empty(n_avgint, dtype = float)
+    avgint_time      = numpy.empty(n_avgint, dtype = float)
+    avgint_node      = numpy.empty(n_avgint, dtype = int)
+    avgint_integrand = numpy.empty(n_avgint, dtype = int)
+    avgint_x         = numpy.empty( (n_avgint, n_x), dtype = float)
+    for (avgint_id, avgint_row) in enumerate(avgint_table) :
+        assert avgint_row['age_lower']  == avgint_row['age_upper']
+        assert avgint_row['time_lower'] == avgint_row['time_upper']
+        avgint_age[avgint_id]       = avgint_row['age_lower']
+        avgint_time[avgint_id]      = avgint_row['time_lower']
+        avgint_node[avgint_id]      = avgint_row['node_id']
+        avgint_integrand[avgint_id] = avgint_row['integrand_id']
+        for covariate_id in range(n_x) :
+            avgint_x[avgint_id, covariate_id] = \
+                avgint_row[ f'x_{covariate_id}' ]
+    assert numpy.all( avgint_node == predict_node_id )
     #
     # prefix
     for prefix in prefix_list :
@@ -481,9 +582,12 @@ def pre_one_job(
         connection    = dismod_at.create_connection(
                 pre_database, new = False, readonly = True
         )
-        predict_table   = dismod_at.get_table_dict(connection, 'predict')
+        command  = 'SELECT avgint_id, sample_index, avg_integrand FROM predict'
+        command += ' ORDER BY predict_id'
+        predict_table   = dismod_at.sql_command(connection, command)
         covariate_table = dismod_at.get_table_dict(connection, 'covariate')
         connection.close()
+        assert len(covariate_table) == n_x
         #
         # sex_covariate_id
         sex_covariate_id = None
@@ -491,34 +595,44 @@ def pre_one_job(
             if row['covariate_name'] == 'sex' :
                 sex_covariate_id = covariate_id
         #
-        # predict_table
-        for pred_row in predict_table :
-            #
-            # avgint_row
-            avgint_id  = pred_row['avgint_id']
-            avgint_row = avgint_table[avgint_id]
-            assert avgint_row['node_id'] == predict_node_id
-            assert avgint_row[ f'x_{sex_covariate_id}' ] == predict_sex_value
-            #
-            # predict_table
-            for key in avgint_row.keys() :
-                pred_row[key] = avgint_row[key]
-            avg_integrand             = pred_row['avg_integrand']
-            pred_row['avg_integrand'] = float_format.format(avg_integrand)
-            if prefix in [ 'fit', 'tru' ] :
-                assert pred_row['sample_index'] == None
-                del pred_row['sample_index']
-            #
+        # avgint_id, avg_integrand
+        n_predict     = len(predict_table)
+        avgint_id     = numpy.empty(n_predict, dtype = int)
+        avg_integrand = numpy.empty(n_predict, dtype = float)
+        for (predict_id, pred_row) in enumerate(predict_table) :
+            avgint_id[predict_id]     = pred_row[0]
+            avg_integrand[predict_id] = pred_row[2]
+        assert numpy.all(
+            avgint_x[avgint_id, sex_covariate_id] == predict_sex_value
+        )
         #
-        # prefix_suffix.csv
-        file_name    = f'{predict_node_dir}/{prefix}_{suffix}.csv'
-        at_cascade.csv.write_table(file_name, predict_table)
-    #
-    diagnose_one(
-        predict_job_name     = predict_job_name ,
-        fit_dir              = fit_dir ,
-        pre_database         = pre_database ,
-        fit_same_as_predict  = fit_same_as_predict ,
-        db2csv               = db2csv ,
-        plot                 = plot ,
-    )
+        # array_dict
+        array_dict = {
+            'avgint_id'       : avgint_id ,
+            'avg_integrand'   : avg_integrand ,
+            'age'             : avgint_age[avgint_id] ,
+            'time'            : avgint_time[avgint_id] ,
+            'node_id'         : avgint_node[avgint_id] ,
+            'integrand_id'    : avgint_integrand[avgint_id] ,
+            'x'               : avgint_x[avgint_id, :] ,
+            'float_precision' : numpy.array(float_precision) ,
+        }
+        if prefix == 'sam' :
+            sample_index = numpy.empty(n_predict, dtype = int)
+            for (predict_id, pred_row) in enumerate(predict_table) :
+                sample_index[predict_id] = pred_row[1]
+            array_dict['sample_index'] = sample_index
+        else :
+            for pred_row in predict_table :
+                assert pred_row[1] == None
+        #
+        # prefix_suffix.npz
+        if prefix != 'sam' or sample_output != 'summary' :
+            file_name    = f'{predict_node_dir}/{prefix}_{suffix}.npz'
+            numpy.savez(file_name, **array_dict)
+        #
+        # sum_suffix.npz
+        if prefix == 'sam' and sample_output != 'samples' :
+            summary_dict = sample_summary(array_dict, quantile_level)
+            file_name    = f'{predict_node_dir}/sum_{suffix}.npz'
+            numpy.savez(file_name, **summary_dict)
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 # Set this to False when debugging an exception during pre_one_job routine
 catch_exceptions_and_continue = True
@@ -40,9 +40,9 @@ all_node_database
 *****************
 This is the all node database for this fit.
 
-all_covariate_table
-*******************
-This is an in memory representation of
+cov_array
+*********
+This is the :ref:`csv.covariate_array_class-name` representation of
 :ref:`csv.fit@Input Files@covariate.csv` .
 
 job_table
@@ -103,9 +103,22 @@ shared_lock
 This lock must be acquired during the time that
 a process reads or changes *shared_job_status* .
 
-Csv Output Files
-****************
-see :ref:`csv.pre_one_job@Csv Output Files`
+input_fingerprint
+*****************
+This ``dict`` identifies the inputs, other than the fit databases,
+that the predictions depend on; see
+:ref:`csv.pre_parallel@Incremental Predictions` .
+
+job_cost
+********
+This numpy array has length equal to the length of *job_table* .
+The value *job_cost* [ *job_id* ] is the estimated cost of predicting
+for *job_id* ; see :ref:`csv.pre_parallel@Job Order` .
+Each process predicts for the ready job with the largest cost.
+
+Prediction Output Files
+***********************
+see :ref:`csv.pre_one_job@Prediction Output Files`
 
 Parallel Processing
 *******************
@@ -113,13 +126,41 @@ Always copy ``dismod_at.db`` to another file before predicting with it
 because ``dismod_at.db`` may be an ancestor for another prediction or fit
 that is running in parallel.
 
+Prediction Databases
+********************
+The prediction databases ``this.db`` and ``ancestor.db`` are created by
+copying the tables in the fit database, except that
+only the definitions (not the rows) of the avgint and predict tables are
+copied. These tables are replaced during the prediction and the
+fit database versions can be very large; e.g., the predict table
+contains the samples used to create the priors for the child fits.
+In addition, the fit_data_subset table is not copied to ``ancestor.db``
+because the data fit diagnostics are only created for ``this.db`` .
+The fit database is only read during this copy.
+
+Prediction Manifest
+*******************
+When the predictions for a job succeed, the file ``predict_manifest.json``
+is written in the prediction directory for the job.
+It contains *input_fingerprint* , for each fit database used by the job
+its modification time, size, and sha256 hash,
+and the number of seconds it took to predict for the job.
+If the next prediction for this job has the same *input_fingerprint* ,
+uses the same fit databases, and these databases have the same hash,
+the job is not predicted again and its previous prediction output files
+are used.
+The hash for a fit database is only recomputed when its modification time
+or size has changed.
+
 {xrst_end csv.pre_one_process}
 '''
 # ----------------------------------------------------------------------------
 import numpy
 import os
 import datetime
-import shutil
+import time
+import json
+import hashlib
 import dismod_at
 import at_cascade
 import multiprocessing
@@ -136,6 +177,134 @@ def acquire_lock(shared_lock) :
         msg = f'pre_one_process: did not obtain lock in {seconds} seconds'
         assert False, msg
 # ----------------------------------------------------------------------------
+# copy_fit_db
+# Copy fit_database to pre_database except for the rows in the tables
+# in empty_table_set. If other_database is not None, it is the new value for
+# the other_database option in pre_database.
+def copy_fit_db(fit_database, pre_database, empty_table_set, other_database) :
+    assert type(fit_database) == str
+    assert type(pre_database) == str
+    assert type(empty_table_set) == set
+    assert other_database == None or type(other_database) == str
+    #
+    # connection
+    connection = dismod_at.create_connection(
+        pre_database, new = True, readonly = False
+    )
+    #
+    # fit_database
+    quoted  = fit_database.replace("'", "''")
+    command = f"ATTACH DATABASE '{quoted}' AS fit"
+    dismod_at.sql_command(connection, command)
+    #
+    # create_list
+    command  = 'SELECT type, name, tbl_name, sql FROM fit.sqlite_master'
+    command += " WHERE type IN ('table', 'index') AND sql IS NOT NULL"
+    command += " AND name NOT LIKE 'sqlite_%'"
+    result   = dismod_at.sql_command(connection, command)
+    create_list = list()
+    for (sql_type, name, tbl_name, sql) in result :
+        create_list.append( (sql_type, name, sql) )
+    create_list.sort( key = lambda item : item[0] != 'table' )
+    #
+    # pre_database
+    for (sql_type, name, sql) in create_list :
+        dismod_at.sql_command(connection, sql)
+        if sql_type == 'table' and name not in empty_table_set :
+            command = f'INSERT INTO main.{name} SELECT * FROM fit.{name}'
+            dismod_at.sql_command(connection, command)
+    #
+    # fit_database
+    command = 'DETACH DATABASE fit'
+    dismod_at.sql_command(connection, command)
+    #
+    # other_database
+    if other_database != None :
+        command  = 'UPDATE option SET option_value = ? '
+        command += "WHERE option_name = 'other_database'"
+        connection.execute(command, (other_database,) )
+        connection.commit()
+    #
+    connection.close()
+# ----------------------------------------------------------------------------
+# file_sha256
+# Return the sha256 hash for the contents of file_name as a hex str.
+def file_sha256(file_name) :
+    assert type(file_name) == str
+    hash_obj = hashlib.sha256()
+    with open(file_name, 'rb') as file_obj :
+        block = file_obj.read(1024 * 1024)
+        while len(block) > 0 :
+            hash_obj.update(block)
+            block = file_obj.read(1024 * 1024)
+    return hash_obj.hexdigest()
+# ----------------------------------------------------------------------------
+# database_fingerprint
+# Return [ mtime_ns, size, sha256 ] for fit_database.
+# If previous is not None, it is a previous return value for fit_database.
+# If the modification time and size are the same as in previous,
+# the hash is not recomputed.
+def database_fingerprint(fit_database, previous) :
+    assert type(fit_database) == str
+    stat = os.stat(fit_database)
+    key  = [ stat.st_mtime_ns, stat.st_size ]
+    if type(previous) == list and previous[0 : 2] == key :
+        return previous
+    return key + [ file_sha256(fit_database) ]
+# ----------------------------------------------------------------------------
+# manifest, unchanged = check_manifest( ... )
+# manifest is the manifest for this prediction and unchanged is true
+# if the previous predictions (in predict_directory) can be used.
+# The prefix_list contains the npz file prefixes; i.e., fit, sam and/or sum,
+# and tru (when sim_dir is not None).
+def check_manifest(
+    predict_directory,
+    input_fingerprint,
+    fit_database_list,
+    suffix_list,
+    prefix_list,
+) :
+    assert type(predict_directory) == str
+    assert type(input_fingerprint) == dict
+    assert type(fit_database_list) == list
+    assert type(suffix_list) == list
+    assert type(prefix_list) == list
+    #
+    # previous
+    manifest_file = f'{predict_directory}/predict_manifest.json'
+    previous      = None
+    if os.path.exists(manifest_file) :
+        try :
+            with open(manifest_file, 'r') as file_obj :
+                previous = json.load(file_obj)
+        except ( OSError, ValueError ) :
+            previous = None
+    if type(previous) != dict :
+        previous = { 'input' : None, 'database' : dict() }
+    #
+    # manifest
+    manifest = { 'input' : input_fingerprint, 'database' : dict() }
+    for fit_database in fit_database_list :
+        manifest['database'][fit_database] = database_fingerprint(
+            fit_database, previous['database'].get(fit_database)
+        )
+    #
+    # unchanged
+    unchanged = previous['input'] == input_fingerprint
+    unchanged = unchanged and \
+        set( previous['database'].keys() ) == set( fit_database_list )
+    for fit_database in fit_database_list :
+        if unchanged :
+            sha256_previous = previous['database'][fit_database][2]
+            sha256_current  = manifest['database'][fit_database][2]
+            unchanged = sha256_previous == sha256_current
+    for suffix in suffix_list :
+        for prefix in prefix_list :
+            file_name = f'{predict_directory}/{prefix}_{suffix}.npz'
+            unchanged = unchanged and os.path.exists(file_name)
+    #
+    return manifest, unchanged
+# ----------------------------------------------------------------------------
 # print_begin
 def print_begin(job_name) :
     assert type(job_name) == str
@@ -150,6 +319,7 @@ def print_end(
     n_done      = None  ,
     n_job_total = None  ,
     job_error   = None  ,
+    unchanged   = False ,
 ) :
     assert type(job_name) == str
     assert type(n_done)      == int
@@ -158,7 +328,9 @@ def print_end(
     #
     now         = datetime.datetime.now()
     str_time    = now.strftime("%H:%M:%S")
-    if job_error == None :
+    if unchanged :
+        msg  = f'Same:  {str_time}: predict {job_name} {n_done}/{n_job_total}'
+    elif job_error == None :
         msg  = f'End:   {str_time}: predict {job_name} {n_done}/{n_job_total}'
     else :
         msg  = f'Error: {str_time}: predict {job_name} {n_done}/{n_job_total}: '
@@ -173,7 +345,7 @@ def try_one_job(
     predict_node_id         ,
     predict_sex_id          ,
     all_node_database       ,
-    all_covariate_table     ,
+    cov_array               ,
     float_precision         ,
     fit_same_as_predict     ,
     option_predict          ,
@@ -184,8 +356,7 @@ def try_one_job(
     assert type(pre_database) == str
     assert type(predict_node_id) == int
     assert type(all_node_database) == str
-    assert type(all_covariate_table) == list
-    assert type( all_covariate_table[0] ) == dict
+    assert type(cov_array) == at_cascade.csv.covariate_array_class
     assert type( float_precision ) == int
     assert type( fit_same_as_predict ) == bool
     assert type( option_predict ) == dict
@@ -202,7 +373,7 @@ def try_one_job(
             predict_node_id         = predict_node_id           ,
             predict_sex_id          = predict_sex_id            ,
             all_node_database       = all_node_database         ,
-            all_covariate_table     = all_covariate_table       ,
+            cov_array               = cov_array                 ,
             float_precision         = float_precision           ,
             fit_same_as_predict     = fit_same_as_predict       ,
             option_predict          = option_predict            ,
@@ -217,7 +388,7 @@ def try_one_job(
                 predict_node_id         = predict_node_id           ,
                 predict_sex_id          = predict_sex_id            ,
                 all_node_database       = all_node_database         ,
-                all_covariate_table     = all_covariate_table       ,
+                cov_array               = cov_array                 ,
                 float_precision         = float_precision           ,
                 fit_same_as_predict     = fit_same_as_predict       ,
                 option_predict          = option_predict            ,
@@ -231,6 +402,100 @@ def try_one_job(
     assert predict_job_error == None or type(predict_job_error) == str
     return predict_job_error
 # ----------------------------------------------------------------------------
+# predict_job_error = predict_one_job( ... )
+# Create the prediction databases for one job and predict using them.
+# If fit_same_job, this.db is created from the fit for predict_job_dir.
+# If ancestor_job_dir is not None, ancestor.db is created from its fit.
+def predict_one_job(
+    fit_dir                 ,
+    sim_dir                 ,
+    option_predict          ,
+    all_node_database       ,
+    cov_array               ,
+    predict_job_name        ,
+    predict_node_id         ,
+    predict_sex_id          ,
+    predict_job_dir         ,
+    ancestor_job_dir        ,
+    fit_same_job            ,
+    float_precision         ,
+) :
+    assert type(predict_job_dir) == str
+    assert ancestor_job_dir == None or type(ancestor_job_dir) == str
+    assert type(fit_same_job) == bool
+    #
+    # predict_directory
+    predict_directory = f'{fit_dir}/{predict_job_dir}'
+    #
+    # predict_job_error
+    predict_job_error = None
+    if fit_same_job :
+        #
+        # fit_same_as_predict, pre_database
+        fit_same_as_predict = True
+        fit_database        = f'{predict_directory}/dismod.db'
+        pre_database        = f'{predict_directory}/this.db'
+        copy_fit_db(
+            fit_database    = fit_database ,
+            pre_database    = pre_database ,
+            empty_table_set = { 'avgint', 'predict' } ,
+            other_database  = None ,
+        )
+        #
+        # try_one_job, predict_job_error
+        predict_job_error   = try_one_job(
+            predict_job_name        = predict_job_name          ,
+            fit_dir                 = fit_dir                   ,
+            sim_dir                 = sim_dir                   ,
+            pre_database            = pre_database              ,
+            predict_node_id         = predict_node_id           ,
+            predict_sex_id          = predict_sex_id            ,
+            all_node_database       = all_node_database         ,
+            cov_array               = cov_array                 ,
+            float_precision         = float_precision           ,
+            fit_same_as_predict     = fit_same_as_predict       ,
+            option_predict          = option_predict            ,
+        )
+    #
+    if ancestor_job_dir != None :
+        assert predict_job_dir != ancestor_job_dir
+        #
+        # fit_same_as_predict, pre_database
+        fit_same_as_predict = False
+        fit_database   = f'{fit_dir}/{ancestor_job_dir}/dismod.db'
+        pre_database   = f'{predict_directory}/ancestor.db'
+        #
+        # pre_database
+        level             = predict_job_dir.count('/') + 1
+        path2root_node_db = level * '../' + 'root.db'
+        copy_fit_db(
+            fit_database    = fit_database ,
+            pre_database    = pre_database ,
+            empty_table_set = { 'avgint', 'predict', 'fit_data_subset' } ,
+            other_database  = path2root_node_db ,
+        )
+        #
+        # try_one_job, prior_job_error
+        prior_job_error = try_one_job(
+            predict_job_name        = predict_job_name          ,
+            fit_dir                 = fit_dir                   ,
+            sim_dir                 = sim_dir                   ,
+            pre_database            = pre_database              ,
+            predict_node_id         = predict_node_id           ,
+            predict_sex_id          = predict_sex_id            ,
+            all_node_database       = all_node_database         ,
+            cov_array               = cov_array                 ,
+            float_precision         = float_precision           ,
+            fit_same_as_predict     = fit_same_as_predict       ,
+            option_predict          = option_predict            ,
+        )
+        if predict_job_error == None :
+            predict_job_error = prior_job_error
+        elif prior_job_error != None :
+            predict_job_error = f'{prior_job_error}: {predict_job_error}'
+    #
+    return predict_job_error
+# ----------------------------------------------------------------------------
 # BEGIN_DEF
 # at_cascade.csv.pre_one_process
 def pre_one_process(
@@ -238,7 +503,7 @@ def pre_one_process(
     sim_dir,
     option_predict,
     all_node_database,
-    all_covariate_table,
+    cov_array,
     job_table,
     node_table,
     root_node_id,
@@ -247,14 +512,15 @@ def pre_one_process(
     job_status_name,
     shared_job_status_name,
     shared_lock,
+    input_fingerprint,
+    job_cost,
 ) :
     assert type(fit_dir)                    == str
     assert sim_dir == None or type(sim_dir) == str
     assert type(option_predict)             == dict
     assert type(all_node_database)          == str
-    assert type(all_covariate_table)        == list
-    assert type( all_covariate_table[0] )   == dict
-    assert type(job_table)                  == list
+    assert type(cov_array)                  == at_cascade.csv.covariate_array_class
+    assert type(job_table)      in [ list, at_cascade.job_table_class ]
     assert type(node_table)                 == list
     assert type(node_table[0])              == dict
     assert type(root_node_id)               == int
@@ -264,6 +530,9 @@ def pre_one_process(
     assert type( job_status_name[0] )       == str
     assert type(shared_job_status_name)     == str
     assert type(shared_lock)                == multiprocessing.synchronize.Lock
+    assert type(input_fingerprint)          == dict
+    assert type(job_cost)                   == numpy.ndarray
+    assert len(job_cost)                    == len(job_table)
     # END_DEF
     # ----------------------------------------------------------------------
     job_status_skip  = job_status_name.index( 'skip' )
@@ -291,6 +560,19 @@ def pre_one_process(
     # float_precision
     float_precision = option_predict['float_precision']
     #
+    # sample_prefix_list
+    sample_prefix_list = {
+        'samples' : [ 'sam' ] ,
+        'summary' : [ 'sum' ] ,
+        'both'    : [ 'sam', 'sum' ] ,
+    }[ option_predict['sample_output'] ]
+    #
+    # prefix_list
+    # the npz files that must exist to use the previous predictions
+    prefix_list = [ 'fit' ] + sample_prefix_list
+    if sim_dir != None :
+        prefix_list.append( 'tru' )
+    #
     # n_skip
     n_skip = None
     #
@@ -315,7 +597,10 @@ def pre_one_process(
             n_skip = len(job_id_skip)
         assert n_skip == len(job_id_skip)
         #
-        predict_job_id                    = int( job_id_ready[0] )
+        # predict_job_id
+        # the ready job with the largest cost (smallest job_id for a tie)
+        i_ready        = numpy.argmax( job_cost[job_id_ready] )
+        predict_job_id = int( job_id_ready[i_ready] )
         shared_job_status[predict_job_id] = job_status_run
         #
         # End Lock
@@ -328,9 +613,6 @@ def pre_one_process(
         predict_node_id         = predict_job_row['fit_node_id']
         predict_sex_id          = predict_job_row['split_reference_id']
         #
-        # print_begin
-        print_begin(job_name = predict_job_name)
-        #
         # predict_job_dir, ancestor_job_dir
         predict_job_dir, ancestor_job_dir = at_cascade.csv.ancestor_fit(
             fit_dir                 = fit_dir ,
@@ -351,41 +633,9 @@ def pre_one_process(
                 msg += ' or any of its ancestors'
                 assert False, msg
         #
-        # predict_directory
-        predict_directory = f'{fit_dir}/{predict_job_dir}'
-        os.makedirs( f'{predict_directory}', exist_ok = True )
-        for prefix in [ 'fit', 'sam', 'tru' ] :
-            for suffix in [ 'prior', 'posterior' ] :
-                output_file = f'{predict_directory}/{prefix}_{suffix}.csv'
-                if os.path.exists( output_file ) :
-                    os.remove( output_file )
-        #
-        # predict_job_error
-        predict_job_error = None
-        if ancestor_job_dir == predict_job_dir :
-            #
-            # fit_same_as_predict, pre_database
-            fit_same_as_predict = True
-            fit_database        = f'{predict_directory}/dismod.db'
-            pre_database        = f'{predict_directory}/this.db'
-            shutil.copyfile(fit_database, pre_database)
-            #
-            # try_one_job, predict_job_error
-            predict_job_error   = try_one_job(
-                predict_job_name        = predict_job_name          ,
-                fit_dir                 = fit_dir                   ,
-                sim_dir                 = sim_dir                   ,
-                pre_database            = pre_database              ,
-                predict_node_id         = predict_node_id           ,
-                predict_sex_id          = predict_sex_id            ,
-                all_node_database       = all_node_database         ,
-                all_covariate_table     = all_covariate_table       ,
-                float_precision         = float_precision           ,
-                fit_same_as_predict     = fit_same_as_predict       ,
-                option_predict          = option_predict            ,
-            )
-            #
-            # predict_job_dir, ancestor_job_dir
+        # fit_same_job, predict_job_dir, ancestor_job_dir
+        fit_same_job = ancestor_job_dir == predict_job_dir
+        if fit_same_job :
             predict_job_dir, ancestor_job_dir = at_cascade.csv.ancestor_fit(
                 fit_dir                 = fit_dir ,
                 job_table               = job_table ,
@@ -399,44 +649,70 @@ def pre_one_process(
             )
             assert predict_job_dir != ancestor_job_dir
         #
-        if ancestor_job_dir == None :
-            assert predict_job_id == 0
-        else :
-            assert predict_job_dir != ancestor_job_dir
+        # predict_directory
+        predict_directory = f'{fit_dir}/{predict_job_dir}'
+        os.makedirs( f'{predict_directory}', exist_ok = True )
+        #
+        # fit_database_list, suffix_list
+        fit_database_list = list()
+        suffix_list       = list()
+        if fit_same_job :
+            fit_database_list.append( f'{predict_directory}/dismod.db' )
+            suffix_list.append( 'posterior' )
+        if ancestor_job_dir != None :
+            fit_database_list.append(
+                f'{fit_dir}/{ancestor_job_dir}/dismod.db'
+            )
+            suffix_list.append( 'prior' )
+        #
+        # manifest, unchanged
+        manifest, unchanged = check_manifest(
+            predict_directory ,
+            input_fingerprint ,
+            fit_database_list ,
+            suffix_list ,
+            prefix_list ,
+        )
+        #
+        # predict_job_error
+        predict_job_error = None
+        if not unchanged :
             #
-            # fit_same_as_predict, pre_database
-            fit_same_as_predict = False
-            fit_database   = f'{fit_dir}/{ancestor_job_dir}/dismod.db'
-            pre_database   = f'{predict_directory}/ancestor.db'
-            shutil.copyfile(fit_database, pre_database)
+            # print_begin
+            print_begin(job_name = predict_job_name)
             #
-            # pre_database
-            level             = predict_job_dir.count('/') + 1
-            path2root_node_db = level * '../' + 'root.db'
-            command = [
-                'dismod_at', pre_database,
-                'set', 'option', 'other_database', path2root_node_db
-            ]
-            dismod_at.system_command_prc(command, print_command = False)
+            # predict_directory
+            manifest_file = f'{predict_directory}/predict_manifest.json'
+            if os.path.exists( manifest_file ) :
+                os.remove( manifest_file )
+            for prefix in [ 'fit', 'sam', 'sum', 'tru' ] :
+                for suffix in [ 'prior', 'posterior' ] :
+                    output_file = f'{predict_directory}/{prefix}_{suffix}.npz'
+                    if os.path.exists( output_file ) :
+                        os.remove( output_file )
             #
-            # try_one_job, prior_job_error
-            prior_job_error = try_one_job(
-                predict_job_name        = predict_job_name          ,
-                fit_dir                 = fit_dir                   ,
-                sim_dir                 = sim_dir                   ,
-                pre_database            = pre_database              ,
-                predict_node_id         = predict_node_id           ,
-                predict_sex_id          = predict_sex_id            ,
-                all_node_database       = all_node_database         ,
-                all_covariate_table     = all_covariate_table       ,
-                float_precision         = float_precision           ,
-                fit_same_as_predict     = fit_same_as_predict       ,
-                option_predict          = option_predict            ,
+            # predict_job_error, seconds
+            start_time        = time.time()
+            predict_job_error = predict_one_job(
+                fit_dir                 = fit_dir ,
+                sim_dir                 = sim_dir ,
+                option_predict          = option_predict ,
+                all_node_database       = all_node_database ,
+                cov_array               = cov_array ,
+                predict_job_name        = predict_job_name ,
+                predict_node_id         = predict_node_id ,
+                predict_sex_id          = predict_sex_id ,
+                predict_job_dir         = predict_job_dir ,
+                ancestor_job_dir        = ancestor_job_dir ,
+                fit_same_job            = fit_same_job ,
+                float_precision         = float_precision ,
             )
+            #
+            # predict_manifest.json
             if predict_job_error == None :
-                predict_job_error = prior_job_error
-            elif prior_job_error != None :
-                predict_job_error = f'{prior_job_error}: {predict_job_error}'
+                manifest['seconds'] = time.time() - start_time
+                with open(manifest_file, 'w') as file_obj :
+                    json.dump(manifest, file_obj)
         #
         # Begin Lock
         acquire_lock(shared_lock)
@@ -454,6 +730,7 @@ def pre_one_process(
             n_done      = n_done,
             n_job_total = n_total,
             job_error   = predict_job_error,
+            unchanged   = unchanged,
         )
         #
         # End Lock
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin csv.pre_parallel}
@@ -24,10 +24,23 @@ sim_dir
 Same as :ref:`csv.predict@sim_dir` .
 
 
-all_covariate_table
-*******************
-This is an in memory representation of
+cov_array
+*********
+This is the :ref:`csv.covariate_array_class-name` representation of
 :ref:`csv.fit@Input Files@covariate.csv` .
+If more than one process is used, the covariate values are
+moved to shared memory; see :ref:`csv.covariate_array_class@share` .
+The name of this shared memory is
+*prefix*\ ``_pre_``\ *start*\ ``_cov_array``
+and the name of the shared job status memory is
+*prefix*\ ``_pre_``\ *start*\ ``_job_status`` ,
+where *prefix* is the
+:ref:`csv.fit@Input Files@option_fit.csv@shared_memory_prefix`
+and *start* is the name of the start job.
+Both are removed when this routine returns or raises an exception.
+If a prediction does not terminate cleanly; e.g., if the system crashed,
+they can be removed using :ref:`clear_shared-name` with
+*job_name* equal to ``pre_``\ *start* .
 
 fit_goal_set
 ************
@@ -54,9 +67,56 @@ option_predict
 This is an in memory representation of
 :ref:`csv.predict@Input Files@option_predict.csv` .
 
+Incremental Predictions
+***********************
+The predictions for a job are not recomputed if the
+fit databases it uses have not changed and the following inputs
+have not changed since the previous predictions for the job:
+the at_cascade version,
+the options in *option_predict* (except max_number_cpu),
+the contents of covariate.csv and predict_integrand.csv in *fit_dir* ,
+the contents of the csv files in *sim_dir* (if it is not None),
+and the modification time and size of the root database.
+In this case the previous prediction output files for the job are used;
+see :ref:`csv.pre_one_process@Prediction Manifest` .
+The db2csv, plot, and diagnose_max_depth options are not included
+because they do not affect the predictions.
+
+Job Order
+*********
+The jobs are predicted in order of decreasing estimated cost so that
+the longest jobs do not start at the end of the predictions
+(when the other processes are idle).
+If the previous prediction for a job recorded its time
+(see :ref:`csv.pre_one_process@Prediction Manifest` ),
+that time is its estimated cost.
+Otherwise its cost is proportional to the size of its fit database
+plus the size of the closest ancestor fit database.
+The proportionality constant is the total time divided by the total size
+for the jobs with recorded times (one if there are no such jobs).
+
+Diagnostics
+***********
+If the :ref:`csv.predict@Input Files@option_predict.csv@db2csv` or
+:ref:`csv.predict@Input Files@option_predict.csv@plot` option is true,
+the corresponding diagnostics are created after all the predictions
+(and the csv prediction files) are done.
+They are created for each job that has a ``this.db`` prediction
+database and is within
+:ref:`csv.predict@Input Files@option_predict.csv@diagnose_max_depth`
+of the start job.
+A job is skipped if its diagnostic files are newer than its ``this.db`` .
+If *max_number_cpu* is greater than one, the diagnostics are created using
+a pool of processes that run at a lower priority
+(see ``os.nice`` ).
+An error during the diagnostics for a job is printed and does not
+stop the diagnostics for the other jobs.
+
 {xrst_end csv.pre_parallel}
 r'''
 # ----------------------------------------------------------------------------
+import os
+import json
 import at_cascade
 import dismod_at
 import multiprocessing
@@ -77,12 +137,151 @@ def get_shared_memory_prefix(all_node_database) :
             shared_memory_prefix = row['option_value']
     return shared_memory_prefix
 # ----------------------------------------------------------------------------
+# input_fingerprint = get_input_fingerprint(fit_dir, sim_dir, option_predict)
+def get_input_fingerprint(fit_dir, sim_dir, option_predict) :
+    assert type(fit_dir) == str
+    assert sim_dir == None or type(sim_dir) == str
+    assert type(option_predict) == dict
+    #
+    # option
+    # the options that do not affect the predictions are excluded
+    exclude = [ 'max_number_cpu', 'db2csv', 'plot', 'diagnose_max_depth' ]
+    option  = dict()
+    for name in option_predict :
+        if name not in exclude :
+            option[name] = option_predict[name]
+    #
+    # root_stat
+    stat      = os.stat( f'{fit_dir}/root.db' )
+    root_stat = [ stat.st_mtime_ns, stat.st_size ]
+    #
+    # input_fingerprint
+    covariate_file    = f'{fit_dir}/covariate.csv'
+    integrand_file    = f'{fit_dir}/predict_integrand.csv'
+    input_fingerprint = {
+        'version'               : at_cascade.version ,
+        'option_predict'        : option ,
+        'covariate.csv'         : at_cascade.csv.file_sha256( covariate_file ) ,
+        'predict_integrand.csv' : at_cascade.csv.file_sha256( integrand_file ) ,
+        'root.db'               : root_stat ,
+    }
+    if sim_dir != None :
+        sim_file = dict()
+        for file_name in sorted( os.listdir(sim_dir) ) :
+            if file_name.endswith('.csv') :
+                sim_file[file_name] = at_cascade.csv.file_sha256(
+                    f'{sim_dir}/{file_name}'
+                )
+        input_fingerprint['sim_dir'] = sim_file
+    return input_fingerprint
+# ----------------------------------------------------------------------------
+# job_cost = get_job_cost(fit_dir, job_table, predict_job_id_list)
+# job_cost[job_id] is an estimate of the time it takes to predict for job_id;
+# see Job Order above.
+def get_job_cost(fit_dir, job_table, predict_job_id_list) :
+    assert type(fit_dir) == str
+    assert type(predict_job_id_list) == list
+    #
+    # n_job
+    n_job = len(job_table)
+    #
+    # db_size
+    # size of the fit database for each job (zero if it does not exist)
+    db_size = numpy.zeros(n_job, dtype = float)
+    for job_id in range(n_job) :
+        database_dir = job_table[job_id]['database_dir']
+        fit_database = f'{fit_dir}/{database_dir}/dismod.db'
+        if os.path.exists(fit_database) :
+            db_size[job_id] = os.path.getsize(fit_database)
+    #
+    # size_estimate, seconds
+    size_estimate = numpy.zeros(n_job, dtype = float)
+    seconds       = numpy.full(n_job, numpy.nan)
+    for job_id in predict_job_id_list :
+        #
+        # size_estimate
+        # size of this job's fit database plus the size of the
+        # closest ancestor fit database
+        parent_job_id = job_table[job_id]['parent_job_id']
+        while parent_job_id != None and db_size[parent_job_id] == 0.0 :
+            parent_job_id = job_table[parent_job_id]['parent_job_id']
+        size_estimate[job_id] = db_size[job_id]
+        if parent_job_id != None :
+            size_estimate[job_id] += db_size[parent_job_id]
+        #
+        # seconds
+        database_dir  = job_table[job_id]['database_dir']
+        manifest_file = f'{fit_dir}/{database_dir}/predict_manifest.json'
+        if os.path.exists(manifest_file) :
+            try :
+                with open(manifest_file, 'r') as file_obj :
+                    manifest = json.load(file_obj)
+                seconds[job_id] = float( manifest['seconds'] )
+            except ( OSError, ValueError, TypeError, KeyError ) :
+                pass
+    #
+    # rate
+    # seconds per byte for the jobs with a recorded prediction time
+    known = numpy.logical_not( numpy.isnan(seconds) )
+    rate  = 1.0
+    if numpy.sum( size_estimate[known] ) > 0.0 :
+        rate = numpy.sum( seconds[known] ) / numpy.sum( size_estimate[known] )
+    #
+    # job_cost
+    job_cost        = rate * size_estimate
+    job_cost[known] = seconds[known]
+    return job_cost
+# ----------------------------------------------------------------------------
+# diagnose_initializer
+# lower the priority of the diagnostic processes
+def diagnose_initializer() :
+    try :
+        os.nice(10)
+    except ( AttributeError, OSError ) :
+        pass
+# ----------------------------------------------------------------------------
+# message = diagnose_job(diagnose_args)
+def diagnose_job(diagnose_args) :
+    (job_name, fit_dir, pre_database, db2csv, plot) = diagnose_args
+    try :
+        at_cascade.csv.diagnose_one(
+            predict_job_name     = job_name ,
+            fit_dir              = fit_dir ,
+            pre_database         = pre_database ,
+            fit_same_as_predict  = True ,
+            db2csv               = db2csv ,
+            plot                 = plot ,
+        )
+        message = f'Diagnose: {job_name}'
+    except Exception as e :
+        message = f'Diagnose Error: {job_name}: {e}'
+    return message
+# ----------------------------------------------------------------------------
+# needed = diagnose_needed(pre_database, db2csv, plot)
+# is true if the diagnostic files for pre_database are missing or older
+# than pre_database.
+def diagnose_needed(pre_database, db2csv, plot) :
+    directory = os.path.dirname(pre_database)
+    file_list = list()
+    if db2csv :
+        file_list.append( 'variable.csv' )
+    if plot :
+        file_list += [ 'data_plot.pdf', 'rate_plot.pdf' ]
+    database_time = os.path.getmtime(pre_database)
+    for file_name in file_list :
+        file_path = f'{directory}/{file_name}'
+        if not os.path.exists(file_path) :
+            return True
+        if os.path.getmtime(file_path) < database_time :
+            return True
+    return False
+# ----------------------------------------------------------------------------
 # BEGIN_DEF
 # at_cascade.csv.pre_parallel
 def pre_parallel(
     fit_dir,
     sim_dir,
-    all_covariate_table,
+    cov_array,
     fit_goal_set,
     start_job_name,
     max_job_depth,
@@ -90,8 +289,7 @@ def pre_parallel(
 ) :
     assert type(fit_dir)                     == str
     assert sim_dir == None or type(sim_dir)  == str
-    assert type(all_covariate_table)         == list
-    assert type( all_covariate_table[0] )    == dict
+    assert type(cov_array)                   == at_cascade.csv.covariate_array_class
     assert type(fit_goal_set)                == set
     assert type( next(iter(fit_goal_set) ))  == str
     assert type( option_predict )            == dict
@@ -163,6 +361,7 @@ def pre_parallel(
         start_split_reference_id   = root_split_reference_id  ,
         fit_goal_set               = fit_goal_set             ,
     )
+    job_table = at_cascade.job_table_class(job_table, node_table)
     #
     # start_job_id
     if start_job_name == None :
@@ -245,75 +444,149 @@ def pre_parallel(
     for predict_job_id in predict_job_id_list :
         shared_job_status[predict_job_id] = job_status_ready
     #
-    # shared_lock
-    shared_lock = multiprocessing.Lock()
-    #
-    # -------------------------------------------------------------------------
+    # shared_cov_array_name
+    shared_cov_array_name = shared_memory_prefix_plus + '_cov_array'
     #
-    # process_list
-    # execute pre_one_process for each process in process_list
-    n_spawn      = min(n_predict - 1, max_number_cpu - 1)
-    print( f'Predict: n_predict = {n_predict}, n_spawn = {n_spawn}' )
-    process_list = list()
-    for i in range(n_spawn) :
-        p = multiprocessing.Process(
-            target = at_cascade.csv.pre_one_process,
-            args=(
-                fit_dir,
-                sim_dir,
-                option_predict,
-                all_node_db,
-                all_covariate_table,
-                job_table,
-                node_table,
-                root_node_id,
-                root_split_reference_id,
-                at_cascade_log_dict,
-                job_status_name,
-                shared_job_status_name,
-                shared_lock,
+    # try
+    # the shared memory is removed even if an exception is raised
+    try :
+        #
+        # shared_lock
+        shared_lock = multiprocessing.Lock()
+        #
+        # input_fingerprint
+        input_fingerprint = get_input_fingerprint(
+            fit_dir, sim_dir, option_predict
+        )
+        #
+        # job_cost
+        job_cost = get_job_cost(fit_dir, job_table, predict_job_id_list)
+        #
+        # cov_array
+        # covariate values are shared by all the processes instead of copied
+        if max_number_cpu > 1 and n_predict > 1 :
+            print(f'create: {shared_cov_array_name} shared memory')
+            cov_array.share( shared_cov_array_name )
+        #
+        # ---------------------------------------------------------------------
+        #
+        # process_list
+        # execute pre_one_process for each process in process_list
+        n_spawn      = min(n_predict - 1, max_number_cpu - 1)
+        print( f'Predict: n_predict = {n_predict}, n_spawn = {n_spawn}' )
+        process_list = list()
+        for i in range(n_spawn) :
+            p = multiprocessing.Process(
+                target = at_cascade.csv.pre_one_process,
+                args=(
+                    fit_dir,
+                    sim_dir,
+                    option_predict,
+                    all_node_db,
+                    cov_array,
+                    job_table,
+                    node_table,
+                    root_node_id,
+                    root_split_reference_id,
+                    at_cascade_log_dict,
+                    job_status_name,
+                    shared_job_status_name,
+                    shared_lock,
+                    input_fingerprint,
+                    job_cost,
+                )
             )
+            p.start()
+            process_list.append(p)
+        #
+        # pre_one_process
+        # use this process as well to execute pre_one_process
+        at_cascade.csv.pre_one_process(
+            fit_dir,
+            sim_dir,
+            option_predict,
+            all_node_db,
+            cov_array,
+            job_table,
+            node_table,
+            root_node_id,
+            root_split_reference_id,
+            at_cascade_log_dict,
+            job_status_name,
+            shared_job_status_name,
+            shared_lock,
+            input_fingerprint,
+            job_cost,
         )
-        p.start()
-        process_list.append(p)
-    #
-    # pre_one_process
-    # use this process as well to execute pre_one_process
-    at_cascade.csv.pre_one_process(
-        fit_dir,
-        sim_dir,
-        option_predict,
-        all_node_db,
-        all_covariate_table,
-        job_table,
-        node_table,
-        root_node_id,
-        root_split_reference_id,
-        at_cascade_log_dict,
-        job_status_name,
-        shared_job_status_name,
-        shared_lock,
-    )
-    #
-    # join
-    # wait for all the processes to finish
-    for p in process_list :
-        p.join()
-    #
-    # pre_user
-    at_cascade.csv.pre_user(
-        fit_dir,
-        sim_dir,
-        job_table,
-        start_job_name,
-        predict_job_id_list,
-        node_table,
-        root_node_id,
-        root_split_reference_id,
-        root_database,
-    )
-    #
-    # shm_job_status
-    print(f'remove: {shared_job_status_name} shared memory')
-    shm_job_status.close()
-    shm_job_status.unlink()
+        #
+        # join
+        # wait for all the processes to finish
+        for p in process_list :
+            p.join()
+        #
+        # pre_user
+        at_cascade.csv.pre_user(
+            fit_dir,
+            sim_dir,
+            job_table,
+            start_job_name,
+            predict_job_id_list,
+            node_table,
+            root_node_id,
+            root_split_reference_id,
+            root_database,
+            option_predict['sample_output'],
+        )
+        #
+        # diagnose_list
+        db2csv             = option_predict['db2csv']
+        plot               = option_predict['plot']
+        diagnose_max_depth = option_predict['diagnose_max_depth']
+        diagnose_list      = list()
+        if db2csv or plot :
+            for predict_job_id in predict_job_id_list :
+                job_depth = at_cascade.job_descendant(
+                    job_table, start_job_id, predict_job_id
+                )
+                include_this_job = diagnose_max_depth == None
+                if not include_this_job :
+                    include_this_job = job_depth <= diagnose_max_depth
+                if include_this_job :
+                    job_row      = job_table[predict_job_id]
+                    database_dir = job_row['database_dir']
+                    pre_database = f'{fit_dir}/{database_dir}/this.db'
+                    if os.path.exists(pre_database) :
+                        if diagnose_needed(pre_database, db2csv, plot) :
+                            diagnose_args = (
+                                job_row['job_name'], fit_dir, pre_database,
+                                db2csv, plot
+                            )
+                            diagnose_list.append( diagnose_args )
+        #
+        # diagnostics
+        if len(diagnose_list) > 0 :
+            n_diagnose = len(diagnose_list)
+            print( f'Diagnose: n_diagnose = {n_diagnose}' )
+            if max_number_cpu == 1 :
+                for diagnose_args in diagnose_list :
+                    print( diagnose_job(diagnose_args) )
+            else :
+                n_process = min(n_diagnose, max_number_cpu)
+                with multiprocessing.Pool(
+                    processes = n_process, initializer = diagnose_initializer
+                ) as pool :
+                    for message in pool.imap_unordered(
+                        diagnose_job, diagnose_list
+                    ) :
+                        print(message)
+    finally :
+        #
+        # shm_job_status
+        print(f'remove: {shared_job_status_name} shared memory')
+        shm_job_status.close()
+        shm_job_status.unlink()
+        #
+        # cov_array
+        if cov_array.shared_name != None :
+            print(f'remove: {shared_cov_array_name} shared memory')
+            cov_array.unlink()
@@ -1,10 +1,11 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin csv.pre_user}
 {xrst_spell
+  npz
   tru
 }
 
@@ -59,38 +60,45 @@ root_database
 specifies the location of the dismod_at
 :ref:`glossary@root_database`.
 
+sample_output
+*************
+This is the
+:ref:`csv.predict@Input Files@option_predict.csv@sample_output` option.
+It determines if the sam files, sum files, or both are converted.
+
 Input Prediction Files
 **********************
 Each job in the *predict_job_id_list* has a corresponding directory.
-For prefix equal to ``fit`` , ``sam`` ,
-the file *prefix*\ _prior.csv or *prefix\ _posterior.csv
+For prefix equal to ``fit`` and each of the sample prefixes
+( ``sam`` and/or ``sum`` ) ,
+the file *prefix*\ _prior.npz or *prefix*\ _posterior.npz
 must exist in each of these directories
-( see :ref:`pre_one_job@Csv Output Files` ).
+( see :ref:`csv.pre_one_job@Prediction Output Files` ).
 In addition if *sim_dir* is not None,
-the file tru_prior.csv or true_posterior.csv
+the file tru_prior.npz or tru_posterior.npz
 must also exist. These files use dismod_at notation.
 
 Output Prediction Files
 ***********************
 The predictions get converted to csv.predict notation; see
 :ref:`csv.predict@Output Files` .
+The rows for each job are converted and appended to the output files
+one job at a time; i.e., the memory used does not grow with the
+number of jobs.
 
 {xrst_end csv.pre_user}
 '''
 import os
+import csv
+import numpy
 import dismod_at
 import at_cascade
 # ----------------------------------------------------------------------------
-def assert_is_table(table) :
-    assert type(table) == list
-    if len(table) > 0 :
-        assert type( table[0] ) == dict
-# ----------------------------------------------------------------------------
-# user_predict_table = predict_table_dismod2user( .. )
-# Note that we are only using covarigte_table for the mapping from
+# header, row_list = predict_dismod2user( .. )
+# Note that we are only using covariate_table for the mapping from
 # covariate indices to names so use any dismod covariate table works.
-def predict_table_dismod2user(
-    predict_table,
+def predict_dismod2user(
+    file_name,
     node_table,
     integrand_table,
     covariate_table,
@@ -101,73 +109,93 @@ def predict_table_dismod2user(
     predict_node_id,
     predict_sex_id,
 ) :
-    assert_is_table(predict_table)
-    assert_is_table(node_table)
-    assert_is_table(integrand_table)
-    assert_is_table(covariate_table)
-    assert_is_table(split_reference_table)
+    assert type(file_name) == str
     assert type(sex_value2name) == dict
     assert type(fit_node_name) == str
     assert type(fit_sex_name) == str
     assert type(predict_node_id) == int
     assert type(predict_sex_id) == int
     #
-    # user_predict_table
-    user_predict_table = list()
-    for row_in in predict_table :
-        # row_out
-        row_out = dict()
-        #
-        # avgint_id
-        row_out['avgint_id'] = row_in['avgint_id']
-        #
-        # avg_integrand
-        row_out['avg_integrand'] = row_in['avg_integrand']
-        #
-        # sample_index
-        if 'sample_index' in row_in :
-            row_out['sample_index'] = row_in['sample_index']
-        #
-        # age
-        assert float(row_in['age_lower'])  == float(row_in['age_upper'])
-        row_out['age']  = row_in['age_lower']
-        #
-        # time
-        assert float(row_in['time_lower']) == float(row_in['time_upper'])
-        row_out['time'] = row_in['time_lower']
-        #
-        # node_name
-        node_id              = int( row_in['node_id'] )
-        row_out['node_name'] = node_table[node_id]['node_name']
-        assert node_id == predict_node_id
-        #
-        # fit_node_name
-        row_out['fit_node_name'] = fit_node_name
-        #
-        # fit_sex
-        row_out['fit_sex'] = fit_sex_name
-        #
-        # integrand_name
-        integrand_id  = int( row_in['integrand_id'] )
-        row_out['integrand_name'] = \
-            integrand_table[integrand_id]['integrand_name']
-        #
-        # covariate_name
-        # for each covariate in predict_table
-        for (i_cov, cov_row) in enumerate( covariate_table ) :
-            covariate_name = cov_row['covariate_name']
-            covariate_key  = f'x_{i_cov}'
-            cov_value      = float( row_in[covariate_key] )
-            if covariate_name == 'sex' :
-                row_tmp   = split_reference_table[predict_sex_id]
-                assert cov_value == row_tmp['split_reference_value']
-                cov_value = sex_value2name[cov_value]
-            row_out[covariate_name] = cov_value
-        #
-        # user_predict_table
-        user_predict_table.append(row_out)
+    # array_dict
+    array_dict = numpy.load(file_name)
+    #
+    # float_format
+    float_precision = int( array_dict['float_precision'] )
+    float_format    = '{0:.' + str(float_precision) + 'g}'
+    #
+    # node_name
+    node_id   = array_dict['node_id']
+    assert numpy.all( node_id == predict_node_id )
+    node_name = node_table[predict_node_id]['node_name']
+    #
+    # integrand_name
+    integrand_name = [
+        integrand_table[integrand_id]['integrand_name']
+        for integrand_id in array_dict['integrand_id'].tolist()
+    ]
+    #
+    # has_sample_index, has_summary
+    has_sample_index = 'sample_index' in array_dict.files
+    has_summary      = 'mean' in array_dict.files
+    #
+    # n_row, header, column_list
+    n_row       = len( array_dict['avgint_id'] )
+    header      = [ 'avgint_id' ]
+    column_list = [ array_dict['avgint_id'].tolist() ]
+    if has_summary :
+        header      += [ 'n_sample', 'mean', 'std' ]
+        column_list += [
+            array_dict['n_sample'].tolist() ,
+            [ float_format.format(value)
+                for value in array_dict['mean'].tolist() ] ,
+            [ float_format.format(value)
+                for value in array_dict['std'].tolist() ] ,
+        ]
+        quantile = array_dict['quantile']
+        for (k, level) in enumerate( array_dict['quantile_level'].tolist() ) :
+            header.append( f'quantile_{level:g}' )
+            column_list.append( [ float_format.format(value)
+                for value in quantile[:, k].tolist() ]
+            )
+    else :
+        header.append( 'avg_integrand' )
+        column_list.append( [ float_format.format(value)
+            for value in array_dict['avg_integrand'].tolist() ]
+        )
+    if has_sample_index :
+        header.append( 'sample_index' )
+        column_list.append( array_dict['sample_index'].tolist() )
+    header += [
+        'age', 'time', 'node_name', 'fit_node_name', 'fit_sex', 'integrand_name'
+    ]
+    column_list += [
+        array_dict['age'].tolist() ,
+        array_dict['time'].tolist() ,
+        [ node_name ] * n_row ,
+        [ fit_node_name ] * n_row ,
+        [ fit_sex_name ] * n_row ,
+        integrand_name ,
+    ]
+    #
+    # header, column_list
+    # for each covariate in the predict table
+    x = array_dict['x']
+    assert x.shape == ( n_row, len(covariate_table) )
+    for (i_cov, cov_row) in enumerate( covariate_table ) :
+        covariate_name = cov_row['covariate_name']
+        cov_value      = x[:, i_cov].tolist()
+        if covariate_name == 'sex' :
+            row_tmp   = split_reference_table[predict_sex_id]
+            sex_value = row_tmp['split_reference_value']
+            assert all( value == sex_value for value in cov_value )
+            cov_value = [ sex_value2name[sex_value] ] * n_row
+        header.append( covariate_name )
+        column_list.append( cov_value )
+    #
+    # row_list
+    row_list = zip( *column_list )
     #
-    return user_predict_table
+    return header, row_list
 # ----------------------------------------------------------------------------
 # BEGIN_DEF
 # at_cascade.csv.pre_user
@@ -181,11 +209,12 @@ def pre_user(
     root_node_id,
     root_split_reference_id,
     root_database,
+    sample_output,
 ) :
     assert type(fit_dir)                    == str
     assert None == sim_dir or \
               type(sim_dir)                   == str
-    assert type(job_table)                  == list
+    assert type(job_table)      in [ list, at_cascade.job_table_class ]
     assert type( job_table[0] )             == dict
     assert None == start_job_name or \
              type( start_job_name )           == str
@@ -196,6 +225,7 @@ def pre_user(
     assert type(root_node_id)               == int
     assert type(root_split_reference_id)    == int
     assert type(root_database)         == str
+    assert sample_output in [ 'samples', 'summary', 'both' ]
     # END_DEF
     #
     # split_reference_table
@@ -216,14 +246,36 @@ def pre_user(
         value = row['split_reference_value']
         sex_value2name[value] = name
     #
-    # prefix_predict_table
-    prefix_predict_table = { 'tru':list(), 'fit':list(), 'sam':list() }
+    # sample_prefix_list
+    sample_prefix_list = {
+        'samples' : [ 'sam' ] ,
+        'summary' : [ 'sum' ] ,
+        'both'    : [ 'sam', 'sum' ] ,
+    }[sample_output]
     #
     # prefix_list
     if sim_dir == None :
-        prefix_list = [ 'fit', 'sam' ]
+        prefix_list = [ 'fit' ] + sample_prefix_list
     else :
-        prefix_list = [ 'tru', 'fit', 'sam' ]
+        prefix_list = [ 'tru', 'fit' ] + sample_prefix_list
+    #
+    # fit_dir/predict
+    if start_job_name != None :
+        os.makedirs( f'{fit_dir}/predict', exist_ok = True )
+    #
+    # prefix_file, prefix_writer, prefix_header
+    # the rows for each job are written as soon as they are converted
+    prefix_file   = dict()
+    prefix_writer = dict()
+    prefix_header = dict()
+    for prefix in prefix_list :
+        if start_job_name == None :
+            file_name    = f'{fit_dir}/{prefix}_predict.csv'
+        else :
+            file_name    = f'{fit_dir}/predict/{prefix}_{start_job_name}.csv'
+        prefix_file[prefix]   = open(file_name, 'w', newline = '')
+        prefix_writer[prefix] = csv.writer( prefix_file[prefix] )
+        prefix_header[prefix] = None
     #
     # predict_job_id
     for predict_job_id in predict_job_id_list :
@@ -234,20 +286,14 @@ def pre_user(
         predict_sex_id    = predict_job_row['split_reference_id']
         #
         # predict_directory
-        predict_job_dir = at_cascade.get_database_dir(
-            node_table              = node_table                     ,
-            split_reference_table   = split_reference_table          ,
-            node_split_set          = { root_node_id }               ,
-            root_node_id            = root_node_id                   ,
-            root_split_reference_id = root_split_reference_id        ,
-            fit_node_id             = predict_node_id                ,
-            fit_split_reference_id  = predict_sex_id                 ,
-        )
+        predict_job_dir   = predict_job_row['database_dir']
         predict_directory = f'{fit_dir}/{predict_job_dir}'
         #
         # suffix
         for suffix in [ 'prior', 'posterior' ] :
-            if not os.path.isfile( f'{predict_directory}/sam_{suffix}.csv' ) :
+            sample_prefix = sample_prefix_list[0]
+            sample_file   = f'{predict_directory}/{sample_prefix}_{suffix}.npz'
+            if not os.path.isfile( sample_file ) :
                 if suffix == 'prior' :
                     assert predict_job_id == 0
                 else :
@@ -286,17 +332,14 @@ def pre_user(
                 for prefix in prefix_list :
                     #
                     # file_name
-                    file_name = f'{predict_directory}/{prefix}_{suffix}.csv'
+                    file_name = f'{predict_directory}/{prefix}_{suffix}.npz'
                     if not os.path.isfile(file_name) :
-                        msg = f'csv.predict: Cannot find fild {file_name}'
+                        msg = f'csv.predict: Cannot find file {file_name}'
                         assert False, msg
                     #
-                    # predict_table
-                    predict_table =  at_cascade.csv.read_table(file_name)
-                    #
-                    # prefix_predict_table
-                    prefix_predict_table[prefix] += predict_table_dismod2user(
-                        predict_table         = predict_table ,
+                    # header, row_list
+                    header, row_list = predict_dismod2user(
+                        file_name             = file_name ,
                         node_table            = node_table ,
                         integrand_table       = integrand_table ,
                         covariate_table       = fit_covariate_table ,
@@ -307,15 +350,22 @@ def pre_user(
                         predict_node_id       = predict_node_id ,
                         predict_sex_id        = predict_sex_id ,
                     )
-    #
-    # fit_dir/predict
-    if start_job_name != None :
-        os.makedirs( f'{fit_dir}/predict', exist_ok = True )
+                    #
+                    # prefix_header
+                    writer = prefix_writer[prefix]
+                    if prefix_header[prefix] == None :
+                        prefix_header[prefix] = header
+                        writer.writerow( header )
+                    if header != prefix_header[prefix] :
+                        msg  = f'csv.predict: columns in {file_name}\n'
+                        msg += f'{header}\n'
+                        msg += 'are not the same as for previous jobs\n'
+                        msg += f'{prefix_header[prefix]}'
+                        assert False, msg
+                    #
+                    # prefix_predict.csv
+                    writer.writerows( row_list )
     #
     # prefix_predict.csv
     for prefix in prefix_list :
-        if start_job_name == None :
-            file_name    = f'{fit_dir}/{prefix}_predict.csv'
-        else :
-            file_name    = f'{fit_dir}/predict/{prefix}_{start_job_name}.csv'
-        at_cascade.csv.write_table(file_name, prefix_predict_table[prefix] )
+        prefix_file[prefix].close()
@@ -88,6 +88,9 @@ a successful fit and posterior samples.
 If this option is true, the csv files will make it more difficult
 to see the tree structure corresponding to the ``dismod.db`` files.
 The default value for this option is false .
+The db2csv and plot diagnostics are created after the predictions,
+using separate lower priority processes; see
+:ref:`csv.pre_parallel@Diagnostics` .
 
 .. _db2csv_command: https://dismod-at.readthedocs.io/latest/db2csv_command.html
 
@@ -102,6 +105,17 @@ is used to predict for the (node, sex) pair; see
 :ref:`csv.ancestor_fit-name`.
 For an example, see :ref:`csv.predict_descend-name` .
 
+diagnose_max_depth
+------------------
+If this integer option is present, the
+:ref:`csv.predict@Input Files@option_predict.csv@db2csv` and
+:ref:`csv.predict@Input Files@option_predict.csv@plot` diagnostics
+are only created for jobs that are at most *diagnose_max_depth*
+generations below the start job;
+see :ref:`csv.predict@max_job_depth` .
+If it is zero, the diagnostics are only created for the start job.
+By default, the diagnostics are created for all the jobs that are predicted.
+
 float_precision
 ---------------
 This integer is the number of decimal digits of precision to
@@ -137,6 +151,24 @@ for this node and sex without any covariate effects.
 Predictions with covariate effects can be found in the csv
 :ref:`csv.predict@Output Files` .
 
+sample_output
+-------------
+This string option is ``samples`` , ``summary`` , or ``both`` .
+If it is ``samples`` or ``both`` ,
+:ref:`csv.predict@Output Files@sam_predict.csv` is created.
+If it is ``summary`` or ``both`` ,
+:ref:`csv.predict@Output Files@sum_predict.csv` is created.
+The summary file is much smaller than the samples file because it has
+one row for each row of fit_predict.csv (instead of *n_sample* rows).
+The default value for this option is ``samples`` .
+
+summary_quantile
+----------------
+This string option is a space separated list of numbers between zero and one.
+For each number in the list there is a corresponding quantile column in
+:ref:`csv.predict@Output Files@sum_predict.csv` .
+The default value for this option is ``0.025 0.5 0.975`` .
+
 zero_meas_value
 ---------------
 If this boolean option is true, the
@@ -350,6 +382,31 @@ A different (independent) sample from of the model variables
 from their posterior distribution is used to do the predictions for
 each sample index.
 
+sum_predict.csv
+===============
+If :ref:`csv.predict@Input Files@option_predict.csv@sample_output`
+is ``samples`` , this file is not created.
+Otherwise, this file contains a summary of the samples in
+:ref:`csv.predict@Output Files@sam_predict.csv`
+(the samples are computed even if sam_predict.csv is not created).
+It is the same as :ref:`csv.predict@Output Files@fit_predict.csv`
+with the following differences:
+
+#. The avg_integrand column is replaced by the columns
+   n_sample, mean, std, and a quantile column for each
+   number in
+   :ref:`csv.predict@Input Files@option_predict.csv@summary_quantile` .
+#. The n_sample column is the number of samples for this avgint_id.
+#. The mean (std) column is the mean (standard deviation) of the
+   avg_integrand values for the samples.
+#. The quantile column for the number *q* is named
+   ``quantile_``\ *q* ; e.g., ``quantile_0.025`` .
+   It is the *q* quantile of the avg_integrand values for the samples.
+#. If *start_job_name* is not None,
+   the summary is stored below *fit_dir* in the file
+   ``predict/sum_``\ *start_job_name*\ ``.csv``
+   and not in ``sum_predict.csv`` .
+
 {xrst_end csv.predict}
 '''
 # ----------------------------------------------------------------------------
@@ -411,10 +468,13 @@ def set_global_option_value(
     option_default  = {
         'db2csv'                : (bool,  False)              ,
         'descendant_std_factor' : (float,   1.0)              ,
+        'diagnose_max_depth'    : (int,   None)               ,
         'float_precision'       : (int,   5)                  ,
         'max_number_cpu'        : (int,   max_number_cpu)     ,
         'number_sample_predict' : (int,   number_sample_fit)  ,
         'plot'                  : (bool,  False)              ,
+        'sample_output'         : (str,   'samples')          ,
+        'summary_quantile'      : (str,   '0.025 0.5 0.975')  ,
         'zero_meas_value'       : (bool,  False)              ,
     }
     # END_SORT_THIS_LINE_MINUS_2
@@ -457,6 +517,24 @@ def set_global_option_value(
     if global_option_value['descendant_std_factor']  <= 0.0 :
         assert False, "predict.csv: descemdant_std_factor <= 0"
     #
+    sample_output = global_option_value['sample_output']
+    if sample_output not in [ 'samples', 'summary', 'both' ] :
+        msg  = f'option_predict.csv: sample_output = {sample_output} '
+        msg += 'is not samples, summary, or both'
+        assert False, msg
+    #
+    summary_quantile = global_option_value['summary_quantile']
+    for level in summary_quantile.split() :
+        try :
+            level_ok = 0.0 <= float(level) <= 1.0
+        except ValueError :
+            level_ok = False
+        if not level_ok :
+            msg  = 'option_predict.csv: '
+            msg += f'summary_quantile = {summary_quantile}\n'
+            msg += f'{level} is not a number between zero and one'
+            assert False, msg
+    #
     # option_predict_out.csv
     table = list()
     for name in global_option_value :
@@ -593,15 +671,15 @@ def predict(fit_dir, sim_dir=None, start_job_name=None, max_job_depth=None) :
         msg += 'or any of its children, in fit_goal.csv'
         assert False, msg
     #
-    # covariate_table
-    file_name       = f'{fit_dir}/covariate.csv'
-    covariate_table = at_cascade.csv.read_table(file_name)
+    # cov_array
+    file_name = f'{fit_dir}/covariate.csv'
+    cov_array = at_cascade.csv.covariate_array_class(file_name)
     #
     # predict
     at_cascade.csv.pre_parallel(
         fit_dir,
         sim_dir,
-        covariate_table,
+        cov_array,
         fit_goal_set,
         start_job_name,
         max_job_depth,
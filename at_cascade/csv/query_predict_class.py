@@ -0,0 +1,488 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ----------------------------------------------------------------------------
+r'''
+{xrst_begin csv.query_predict_class}
+{xrst_spell
+  avg
+  avgint
+  lru
+  meas
+  std
+}
+
+Predictions for Specific Points Using a Result Cache
+####################################################
+
+query_predict_class
+*******************
+{xrst_code py}
+query = query_predict_class(fit_dir, max_cache, descendant_std_factor,
+    zero_meas_value
+)
+{xrst_code}
+This creates a *query* object that computes predictions for
+specific ( *node_name* , *sex* , *integrand_name* , *age* , *time* ) points,
+instead of all the points in the covariate.csv age, time grid
+(as is done by :ref:`csv.predict-name` ).
+
+fit_dir
+=======
+Same as the csv fit :ref:`csv.fit@fit_dir` .
+The cascade fit must have been run, but :ref:`csv.predict-name` need
+not have been run.
+
+max_cache
+=========
+This ``int`` is the maximum number of results in the cache
+(default 10,000); see :ref:`csv.query_predict_class@Cache` .
+
+descendant_std_factor
+=====================
+This ``float`` has the same meaning as
+:ref:`csv.predict@Input Files@option_predict.csv@descendant_std_factor`
+(default 1.0).
+
+zero_meas_value
+===============
+This ``bool`` has the same meaning as
+:ref:`csv.predict@Input Files@option_predict.csv@zero_meas_value`
+(default false).
+
+predict
+*******
+{xrst_code py}
+result_table = query.predict(query_table)
+{xrst_code}
+
+query_table
+===========
+is a ``list`` of ``dict`` .
+Each row has the following keys:
+*node_name* , *sex* , *integrand_name* , *age* , *time* .
+The *age* and *time* values are ``float`` and the others are ``str`` .
+
+result_table
+============
+is a ``list`` of ``dict`` with the same length as *query_table* .
+Each row is a copy of the corresponding row of *query_table* with the
+following keys added:
+
+.. csv-table::
+    :header-rows: 1
+
+    Key,           Meaning
+    fit_job_name,  job name for the fit used for this prediction
+    avg_integrand, prediction using the optimal variable values in the fit
+    sam_mean,      mean of the predictions using the samples in the fit
+    sam_std,       standard deviation of the predictions for the samples
+    n_sample,      number of samples in the fit
+
+If the fit has no samples, *sam_mean* and *sam_std* are ``None``
+and *n_sample* is zero.
+
+Ancestor Fit
+************
+The fit used for a (node_name, sex) pair is determined as follows:
+If there is no job for the pair, the nearest ancestor node that has
+a job for *sex* (or for ``both`` ) is used.
+The closest ancestor of that job that has a successful fit and samples
+is then found using :ref:`csv.ancestor_fit-name` .
+If this is the job for (node_name, sex), the samples are used directly
+(as for the posterior files in :ref:`csv.pre_one_job-name` ).
+Otherwise, *descendant_std_factor* is used to sample the prior for the
+node (as for the prior files in :ref:`csv.pre_one_job-name` ).
+The covariate values for *age* and *time* are interpolated using
+:ref:`csv.covariate_array_class@spline_cov` .
+The at_cascade log messages are read when *query* is created,
+so a new *query* object should be created after new fits are done.
+
+Cache
+*****
+Each result is stored in a least recently used (lru) cache.
+Its key includes the sha256 hash of the fit database that was used for the
+prediction (see :ref:`csv.pre_one_process@Prediction Manifest` ),
+so a result is not used after the fit changes.
+When the hash for a fit database changes, the results for its
+previous hash are removed from the cache.
+If the number of results is greater than *max_cache* ,
+the least recently used results are removed.
+
+Prediction Databases
+********************
+The prediction for the points that are not in the cache are computed
+using one prediction database per fit.
+This database is a copy of the fit database without its
+avgint and predict tables; see :ref:`csv.pre_one_process@Prediction Databases` .
+It is in a temporary directory below *fit_dir* that is removed when the
+prediction is done.
+
+{xrst_end csv.query_predict_class}
+'''
+import os
+import copy
+import tempfile
+import collections
+import numpy
+import dismod_at
+import at_cascade
+#
+class query_predict_class :
+    #
+    # __init__
+    def __init__(self,
+        fit_dir,
+        max_cache             = 10000 ,
+        descendant_std_factor = 1.0 ,
+        zero_meas_value       = False ,
+    ) :
+        assert type(fit_dir) == str
+        assert type(max_cache) == int
+        assert type(descendant_std_factor) == float
+        assert type(zero_meas_value) == bool
+        assert 0 < max_cache
+        assert 0.0 < descendant_std_factor
+        #
+        # fit_dir, max_cache, descendant_std_factor, zero_meas_value
+        self.fit_dir               = fit_dir
+        self.max_cache             = max_cache
+        self.descendant_std_factor = descendant_std_factor
+        self.zero_meas_value       = zero_meas_value
+        #
+        # all_node_database, root_database
+        self.all_node_database = f'{fit_dir}/all_node.db'
+        self.root_database     = f'{fit_dir}/root.db'
+        #
+        # node_table, covariate_table
+        connection      = dismod_at.create_connection(
+            self.root_database, new = False, readonly = True
+        )
+        self.node_table = dismod_at.get_table_dict(connection, 'node')
+        covariate_table = dismod_at.get_table_dict(connection, 'covariate')
+        connection.close()
+        #
+        # root_node_id
+        root_node_name    = at_cascade.get_parent_node(self.root_database)
+        self.root_node_id = at_cascade.table_name2id(
+            self.node_table, 'node', root_node_name
+        )
+        #
+        # root_split_reference_id
+        self.root_split_reference_id = None
+        sex_value                    = None
+        for row in covariate_table :
+            if row['covariate_name'] == 'sex' :
+                sex_value = row['reference']
+        split_reference_table = at_cascade.csv.split_reference_table
+        for (row_id, row) in enumerate( split_reference_table ) :
+            if row['split_reference_value'] == sex_value :
+                self.root_split_reference_id = row_id
+        assert self.root_split_reference_id != None
+        #
+        # fit_goal_set
+        fit_goal_table = at_cascade.csv.read_table(f'{fit_dir}/fit_goal.csv')
+        fit_goal_set   = set( row['node_name'] for row in fit_goal_table )
+        if len(fit_goal_set) == 0 :
+            fit_goal_set = set( row['node_name'] for row in self.node_table )
+        #
+        # job_table
+        job_table = at_cascade.create_job_table(
+            all_node_database        = self.all_node_database       ,
+            node_table               = self.node_table              ,
+            start_node_id            = self.root_node_id            ,
+            start_split_reference_id = self.root_split_reference_id ,
+            fit_goal_set             = fit_goal_set                 ,
+        )
+        self.job_table = at_cascade.job_table_class(job_table, self.node_table)
+        #
+        # job_name2id
+        self.job_name2id = dict()
+        for job_id in range( len(self.job_table) ) :
+            self.job_name2id[ self.job_table.job_name(job_id) ] = job_id
+        #
+        # at_cascade_log_dict
+        self.at_cascade_log_dict = at_cascade.check_log(
+            message_type      = 'at_cascade'           ,
+            all_node_database = self.all_node_database ,
+            root_database     = self.root_database     ,
+            job_table         = self.job_table         ,
+        )
+        #
+        # cov_array
+        self.cov_array = at_cascade.csv.covariate_array_class(
+            f'{fit_dir}/covariate.csv'
+        )
+        #
+        # cache, fingerprint, fit_dict
+        self.cache       = collections.OrderedDict()
+        self.fingerprint = dict()
+        self.fit_dict    = dict()
+    #
+    # get_fit
+    # returns (fit_job_name, fit_database, fit_same) for node_name, sex
+    def get_fit(self, node_name, sex) :
+        pair = (node_name, sex)
+        if pair in self.fit_dict :
+            return self.fit_dict[pair]
+        #
+        # job_id
+        node_id = at_cascade.table_name2id(self.node_table, 'node', node_name)
+        job_id  = None
+        while job_id == None and node_id != None :
+            name = self.node_table[node_id]['node_name']
+            for job_name in [ f'{name}.{sex}', f'{name}.both' ] :
+                if job_id == None :
+                    job_id = self.job_name2id.get(job_name)
+            node_id = self.node_table[node_id]['parent']
+        if job_id == None :
+            msg  = f'query_predict_class: node_name = {node_name}, '
+            msg += f'sex = {sex}: cannot find a job for this node or '
+            msg += 'any of its ancestors'
+            assert False, msg
+        #
+        # predict_job_dir, ancestor_job_dir
+        predict_job_dir, ancestor_job_dir = at_cascade.csv.ancestor_fit(
+            fit_dir                 = self.fit_dir ,
+            job_table               = self.job_table ,
+            predict_job_id          = job_id ,
+            node_table              = self.node_table ,
+            root_node_id            = self.root_node_id ,
+            split_reference_table   = at_cascade.csv.split_reference_table ,
+            root_split_reference_id = self.root_split_reference_id ,
+            at_cascade_log_dict     = self.at_cascade_log_dict ,
+            allow_same_job          = True ,
+        )
+        if ancestor_job_dir == None :
+            job_name = self.job_table.job_name(job_id)
+            msg  = f'query_predict_class: cannot find a fit for {job_name} '
+            msg += 'or any of its ancestors'
+            assert False, msg
+        #
+        # fit_job_name
+        fit_job_name = None
+        for job_id in range( len(self.job_table) ) :
+            if self.job_table.database_dir[job_id] == ancestor_job_dir :
+                fit_job_name = self.job_table.job_name(job_id)
+        #
+        # fit_same
+        fit_same = fit_job_name == f'{node_name}.{sex}'
+        #
+        # fit_dict
+        fit_database = f'{self.fit_dir}/{ancestor_job_dir}/dismod.db'
+        self.fit_dict[pair] = (fit_job_name, fit_database, fit_same)
+        return self.fit_dict[pair]
+    #
+    # get_sha256
+    # sha256 for fit_database, removes cache entries for its previous sha256
+    def get_sha256(self, fit_database) :
+        previous    = self.fingerprint.get(fit_database)
+        fingerprint = at_cascade.csv.database_fingerprint(
+            fit_database, previous
+        )
+        self.fingerprint[fit_database] = fingerprint
+        if previous != None and previous[2] != fingerprint[2] :
+            for key in list( self.cache.keys() ) :
+                if key[0] == previous[2] :
+                    del self.cache[key]
+        return fingerprint[2]
+    #
+    # predict_fit
+    # returns the result list for the points in point_list that use
+    # fit_database; see the predict function below.
+    def predict_fit(self, fit_database, fit_same, point_list) :
+        #
+        # result_list
+        result_list = list()
+        #
+        # temp_dir
+        with tempfile.TemporaryDirectory(dir = self.fit_dir) as temp_dir :
+            #
+            # pre_database
+            pre_database = f'{temp_dir}/query.db'
+            empty_table_set = { 'avgint', 'predict' }
+            if not fit_same :
+                empty_table_set.add( 'fit_data_subset' )
+            at_cascade.csv.copy_fit_db(
+                fit_database    = fit_database ,
+                pre_database    = pre_database ,
+                empty_table_set = empty_table_set ,
+                other_database  = os.path.abspath(self.root_database) ,
+            )
+            #
+            # fit_covariate_table, integrand_table
+            fit_or_root = at_cascade.fit_or_root_class(
+                pre_database, self.root_database
+            )
+            fit_covariate_table = fit_or_root.get_table('covariate')
+            integrand_table     = fit_or_root.get_table('integrand')
+            fit_or_root.close()
+            #
+            # spline_cov
+            spline_cov = self.cov_array.spline_cov()
+            #
+            # avgint_table
+            avgint_table = list()
+            for (node_name, sex, integrand_name, age, time) in point_list :
+                sex_value = at_cascade.csv.sex_name2value[sex]
+                avgint_row = {
+                    'integrand_id' : at_cascade.table_name2id(
+                        integrand_table, 'integrand', integrand_name
+                    ),
+                    'node_id'      : at_cascade.table_name2id(
+                        self.node_table, 'node', node_name
+                    ),
+                    'subgroup_id'  : 0,
+                    'weight_id'    : None,
+                    'age_lower'    : age,
+                    'age_upper'    : age,
+                    'time_lower'   : time,
+                    'time_upper'   : time,
+                }
+                for (covariate_id, row) in enumerate(fit_covariate_table) :
+                    covariate_name = row['covariate_name']
+                    if covariate_name == 'one' :
+                        x_value = 1.0
+                    elif covariate_name == 'sex' :
+                        x_value = sex_value
+                    else :
+                        spline  = spline_cov[node_name][sex][covariate_name]
+                        x_value = float( spline(age, time) )
+                    avgint_row[ f'x_{covariate_id}' ] = x_value
+                avgint_table.append( avgint_row )
+            #
+            # prefix_list
+            connection = dismod_at.create_connection(
+                pre_database, new = False, readonly = False
+            )
+            dismod_at.replace_table(connection, 'avgint', avgint_table)
+            prefix_list = list()
+            if at_cascade.table_exists(connection, 'fit_var') :
+                prefix_list.append( 'fit' )
+            if at_cascade.table_exists(connection, 'sample') :
+                prefix_list.append( 'sam' )
+            connection.close()
+            #
+            # avg_integrand, sample_value
+            n_avgint      = len(avgint_table)
+            avg_integrand = [ None ] * n_avgint
+            sample_value  = [ list() for avgint_id in range(n_avgint) ]
+            for prefix in prefix_list :
+                #
+                # command
+                command = [ 'dismod_at', pre_database, 'predict' ]
+                if prefix == 'fit' :
+                    command.append( 'fit_var' )
+                else :
+                    command.append( 'sample' )
+                    if not fit_same :
+                        command += [
+                            'fit_var', str(self.descendant_std_factor)
+                        ]
+                if self.zero_meas_value :
+                    command.append( 'zero_meas_value' )
+                dismod_at.system_command_prc(command, print_command = False )
+                #
+                # predict_table
+                connection    = dismod_at.create_connection(
+                    pre_database, new = False, readonly = True
+                )
+                command  = 'SELECT avgint_id, avg_integrand FROM predict'
+                command += ' ORDER BY predict_id'
+                predict_table = dismod_at.sql_command(connection, command)
+                connection.close()
+                #
+                # avg_integrand, sample_value
+                for (avgint_id, value) in predict_table :
+                    if prefix == 'fit' :
+                        avg_integrand[avgint_id] = value
+                    else :
+                        sample_value[avgint_id].append(value)
+            #
+            # result_list
+            for avgint_id in range(n_avgint) :
+                n_sample = len( sample_value[avgint_id] )
+                result   = {
+                    'avg_integrand' : avg_integrand[avgint_id] ,
+                    'sam_mean'      : None ,
+                    'sam_std'       : None ,
+                    'n_sample'      : n_sample ,
+                }
+                if n_sample > 0 :
+                    value = numpy.array( sample_value[avgint_id] )
+                    result['sam_mean'] = float( numpy.mean(value) )
+                    result['sam_std']  = 0.0
+                    if n_sample > 1 :
+                        result['sam_std'] = float( numpy.std(value, ddof = 1) )
+                result_list.append( result )
+        #
+        return result_list
+    #
+    # predict
+    def predict(self, query_table) :
+        assert type(query_table) == list
+        #
+        # key_list, miss_dict, miss_set
+        # miss_dict[ (fit_database, fit_same) ] = (point_list, key_list)
+        # fit_same depends on the node and sex, not just fit_database; e.g.,
+        # a node with its own job and a descendant that uses the same fit.
+        key_list  = list()
+        miss_set  = set()
+        fit_name  = list()
+        miss_dict = dict()
+        sha256    = dict()
+        for row in query_table :
+            node_name      = row['node_name']
+            sex            = row['sex']
+            integrand_name = row['integrand_name']
+            age            = float( row['age'] )
+            time           = float( row['time'] )
+            if sex not in at_cascade.csv.sex_name2value :
+                msg = f'query_predict_class: sex = {sex} is not valid'
+                assert False, msg
+            #
+            # fit_job_name, fit_database, fit_same
+            fit_job_name, fit_database, fit_same = self.get_fit(node_name, sex)
+            fit_name.append( fit_job_name )
+            #
+            # sha256
+            if fit_database not in sha256 :
+                sha256[fit_database] = self.get_sha256(fit_database)
+            #
+            # key
+            point = ( node_name, sex, integrand_name, age, time )
+            key   = ( sha256[fit_database], fit_same ) + point
+            key  += ( self.descendant_std_factor, self.zero_meas_value )
+            key_list.append( key )
+            #
+            # miss_dict
+            if key not in self.cache and key not in miss_set :
+                miss_set.add( key )
+                miss_pair = (fit_database, fit_same)
+                if miss_pair not in miss_dict :
+                    miss_dict[miss_pair] = ( list(), list() )
+                miss_dict[miss_pair][0].append( point )
+                miss_dict[miss_pair][1].append( key )
+        #
+        # cache
+        for (fit_database, fit_same) in miss_dict :
+            (point_list, miss_key_list) = miss_dict[ (fit_database, fit_same) ]
+            result_list = self.predict_fit(fit_database, fit_same, point_list)
+            for (key, result) in zip(miss_key_list, result_list) :
+                self.cache[key] = result
+        #
+        # result_table
+        result_table = list()
+        for (i_row, row) in enumerate(query_table) :
+            key    = key_list[i_row]
+            result = copy.copy(row)
+            result['fit_job_name'] = fit_name[i_row]
+            result.update( self.cache[key] )
+            self.cache.move_to_end(key)
+            result_table.append( result )
+        #
+        # cache
+        while len(self.cache) > self.max_cache :
+            self.cache.popitem(last = False)
+        #
+        return result_table
@@ -1,11 +1,9 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 import os
-import copy
 import math
-import shutil
 import at_cascade
 import dismod_at
 #
@@ -50,8 +48,200 @@ root_database
 *************
 is the :ref:`glossary@root_database` .
 
+Truth Evaluator
+***************
+The true values are computed using the same model as :ref:`csv.simulate-name`
+with the covariates that are in the fit database
+set equal to their reference value in the fit database.
+The simulation input files in *sim_dir* are read once per process
+and the resulting truth evaluator is used for all the fit databases
+that use the same *sim_dir* .
+The rate functions for each node, sex, and covariate reference are memoized
+by the truth evaluator.
+If one of the simulation input files changes,
+a new truth evaluator is created the next time ``set_truth`` is called.
+No files are written to the directory containing *fit_database* .
+
 {xrst_end csv.set_truth}
 """
+# ----------------------------------------------------------------------------
+# stamp = get_stamp(sim_dir)
+#
+# sim_dir
+# is the simulation directory.
+#
+# stamp
+# is a tuple that changes when one of the simulation input files,
+# that the truth depends on, changes.
+#
+def get_stamp(sim_dir) :
+    stamp = list()
+    for name in [
+        'option_sim',
+        'node',
+        'covariate',
+        'no_effect_rate',
+        'multiplier_sim',
+        'random_effect',
+    ] :
+        stat = os.stat( f'{sim_dir}/{name}.csv' )
+        stamp.append( (name, stat.st_mtime_ns, stat.st_size) )
+    return tuple( stamp )
+# ----------------------------------------------------------------------------
+# truth_eval = truth_eval_class(sim_dir)
+#
+# sim_dir
+# is the simulation directory.
+#
+# truth_eval.stamp
+# is the value of get_stamp(sim_dir) when truth_eval was created.
+#
+# truth_eval.cov_name_list
+# is the list of covariate names in covariate.csv.
+#
+# value = truth_eval.average_integrand(
+#   integrand_name, node_name, sex, age, time, fit_covariate_ref
+# )
+# is the value of meas_mean that csv.simulate would compute for the
+# integrand at the specified node, sex, age and time, with the covariates
+# in fit_covariate_ref equal to their value in fit_covariate_ref.
+# The float_precision option is used to round value; i.e.,
+# it is the same as the meas_mean value in data_sim.csv.
+#
+class truth_eval_class :
+    #
+    # __init__
+    def __init__(self, sim_dir) :
+        assert type(sim_dir) == str
+        #
+        # stamp
+        self.stamp = get_stamp(sim_dir)
+        #
+        # input_table
+        input_table = dict()
+        for name in [
+            'option_sim', 'node', 'no_effect_rate', 'multiplier_sim'
+        ] :
+            file_name         = f'{sim_dir}/{name}.csv'
+            input_table[name] = at_cascade.csv.read_table(file_name)
+            if name != 'option_sim' :
+                at_cascade.csv.check_table(file_name, input_table[name])
+        #
+        # option_value
+        self.option_value = at_cascade.csv.get_option_value(
+            input_table['option_sim']
+        )
+        #
+        # float_format
+        n_digits          = str( self.option_value['float_precision'] )
+        self.float_format = '{0:.' + n_digits + 'g}'
+        #
+        # parent_node_dict
+        self.parent_node_dict, child_list_node = \
+            at_cascade.csv.get_parent_node_dict( input_table['node'] )
+        #
+        # root_node_name
+        root_node_name = None
+        for node_name in self.parent_node_dict :
+            if self.parent_node_dict[node_name] == '' :
+                root_node_name = node_name
+        assert root_node_name != None
+        #
+        # cov_name_list, spline_node_sex_cov, root_covariate_ref
+        cov_array = at_cascade.csv.covariate_array_class(
+            f'{sim_dir}/covariate.csv'
+        )
+        self.cov_name_list       = cov_array.cov_name_list
+        self.spline_node_sex_cov = cov_array.spline_cov()
+        self.root_covariate_ref  = \
+            cov_array.average()[ (root_node_name, 'both') ]
+        #
+        # spline_no_effect_rate
+        self.spline_no_effect_rate = at_cascade.csv.get_spline_no_effect_rate(
+            input_table['no_effect_rate']
+        )
+        #
+        # random_effect_node_rate_sex
+        self.random_effect_node_rate_sex = \
+            at_cascade.csv.read_random_effect_node_rate_sex(sim_dir)
+        #
+        # multiplier_list_rate
+        self.multiplier_list_rate = at_cascade.csv.get_multiplier_list_rate(
+            input_table['multiplier_sim']
+        )
+        #
+        # multiplier_truth
+        self.multiplier_truth = dict()
+        for row in input_table['multiplier_sim'] :
+            key = ( row['rate_name'], row['covariate_or_sex'] )
+            self.multiplier_truth[key] = float( row['multiplier_truth'] )
+        #
+        # rate_fun_memo
+        self.rate_fun_memo = dict()
+    #
+    # rate_fun_dict
+    def rate_fun_dict(self, node_name, sex, fit_covariate_ref) :
+        key = ( node_name, sex, tuple( sorted( fit_covariate_ref.items() ) ) )
+        if key not in self.rate_fun_memo :
+            if len( self.rate_fun_memo ) >= 1000 :
+                self.rate_fun_memo.clear()
+            #
+            # root_covariate_ref
+            # This is the reference that csv.simulate would compute if the
+            # covariates in fit_covariate_ref were constant.
+            root_covariate_ref = dict( self.root_covariate_ref )
+            for covariate_name in fit_covariate_ref :
+                root_covariate_ref[covariate_name] = \
+                    fit_covariate_ref[covariate_name]
+            absolute_covariates = self.option_value['absolute_covariates']
+            if absolute_covariates != None :
+                for covariate_name in absolute_covariates.split() :
+                    root_covariate_ref[covariate_name] = 0.0
+            #
+            # rate_fun_memo
+            self.rate_fun_memo[key] = at_cascade.csv.get_rate_fun_dict(
+                self.parent_node_dict            ,
+                self.spline_no_effect_rate       ,
+                self.random_effect_node_rate_sex ,
+                root_covariate_ref               ,
+                self.multiplier_list_rate        ,
+                node_name                        ,
+                sex                              ,
+                self.spline_node_sex_cov         ,
+                covariate_value = fit_covariate_ref ,
+            )
+        return self.rate_fun_memo[key]
+    #
+    # average_integrand
+    def average_integrand(
+        self, integrand_name, node_name, sex, age, time, fit_covariate_ref
+    ) :
+        rate_fun_dict = self.rate_fun_dict(node_name, sex, fit_covariate_ref)
+        step_size     = self.option_value['integrand_step_size']
+        grid          = at_cascade.csv.average_integrand_grid(
+            step_size, age, age, time, time
+        )
+        abs_tol       = self.option_value['absolute_tolerance']
+        value         = dismod_at.average_integrand(
+            rate_fun_dict, integrand_name, grid, abs_tol
+        )
+        value = float( self.float_format.format( float(value) ) )
+        return value
+# ----------------------------------------------------------------------------
+# truth_eval = get_truth_eval(sim_dir)
+#
+# truth_eval_dict
+# truth_eval_dict[ os.path.realpath(sim_dir) ] is the truth_eval_class object
+# for sim_dir in this process.
+#
+truth_eval_dict = dict()
+def get_truth_eval(sim_dir) :
+    key        = os.path.realpath(sim_dir)
+    truth_eval = truth_eval_dict.get(key)
+    if truth_eval == None or truth_eval.stamp != get_stamp(sim_dir) :
+        truth_eval           = truth_eval_class(sim_dir)
+        truth_eval_dict[key] = truth_eval
+    return truth_eval
 # BEGIN_SET_TRUTH
 # at_cascade.csv.set_truth
 def set_truth(sim_dir, fit_database, root_database) :
@@ -60,9 +250,8 @@ def set_truth(sim_dir, fit_database, root_database) :
     assert type(root_database) == str
     # END_SET_TRUTH
     #
-    # fit_node_dir
-    index        = fit_database.rfind('/')
-    fit_node_dir = fit_database[: index]
+    # truth_eval
+    truth_eval = get_truth_eval(sim_dir)
     #
     # fit_table
     fit_or_root = at_cascade.fit_or_root_class(
@@ -96,6 +285,15 @@ def set_truth(sim_dir, fit_database, root_database) :
             sex_name = key
     assert sex_name != None
     #
+    # fit_covariate_ref
+    # The covariates in the fit are evaluated at their reference value.
+    fit_covariate_ref = dict()
+    for covariate_name in cov2reference :
+        if covariate_name != 'sex' :
+            if covariate_name in truth_eval.cov_name_list :
+                fit_covariate_ref[covariate_name] = \
+                    cov2reference[covariate_name]
+    #
     # rate2integrand
     rate2integrand = {
         'pini'  : 'prevalence' ,
@@ -105,25 +303,31 @@ def set_truth(sim_dir, fit_database, root_database) :
         'omega' : 'mtother'    ,
     }
     #
-    # simulate_table, var_id2simulate_id
-    simulate_table        = list()
-    var_id2simulate_id    = list()
-    simulate_id           = -1
+    # truth_var_table
+    truth_var_table = list()
+    covariate_set   = dict()
     for var_row in fit_table['var'] :
+        #
+        # truth_var_value
+        truth_var_value = None
         #
         # var_type
         var_type  = var_row['var_type']
         assert not var_type.startswith('mulstd_')
         assert not var_type.startswith('mulcov_meas_')
         #
-        if var_type != 'rate' :
-            var_id2simulate_id.append( None )
-        else :
+        # age_id, rate_id, time_id, covariate_id
+        age_id       = var_row['age_id']
+        rate_id      = var_row['rate_id']
+        time_id      = var_row['time_id']
+        covariate_id = var_row['covariate_id']
+        #
+        if var_type == 'rate' :
             # node_name, age, time, rate_name
-            node_name  = fit_table['node'][  var_row['node_id'] ]['node_name']
-            age        = fit_table['age'][  var_row['age_id']  ]['age']
-            time       = fit_table['time'][ var_row['time_id'] ]['time']
-            rate_name  = fit_table['rate'][ var_row['rate_id'] ]['rate_name']
+            node_name  = fit_table['node'][ var_row['node_id'] ]['node_name']
+            age        = fit_table['age'][ age_id ]['age']
+            time       = fit_table['time'][ time_id ]['time']
+            rate_name  = fit_table['rate'][ rate_id ]['rate_name']
             #
             # age
             if rate_name == 'pini' :
@@ -131,147 +335,46 @@ def set_truth(sim_dir, fit_database, root_database) :
                 # This is really OK, just want a heads up in this case
                 assert age == 0.0
             #
-            # simulate_id, simulate_table, var_id2simulate_id
-            simulate_id += 1
-            integrand_name = rate2integrand[ rate_name]
-            sim_row = {
-                'simulate_id'    : simulate_id  ,
-                'integrand_name' : integrand_name ,
-                'node_name'      : fit_node_name  ,
-                'sex'            : sex_name       ,
-                'age_lower'      : age            ,
-                'age_upper'      : age            ,
-                'time_lower'     : time           ,
-                'time_upper'     : time           ,
-                'meas_std_cv'    : 0.0            ,
-                'meas_std_min'   : 1.0            ,
-            }
-            simulate_table.append( copy.copy(sim_row ) )
-            var_id2simulate_id.append( simulate_id )
+            # fixed_value
+            integrand_name = rate2integrand[rate_name]
+            fixed_value    = truth_eval.average_integrand(
+                integrand_name, fit_node_name, sex_name, age, time,
+                fit_covariate_ref
+            )
             #
-            if node_name != fit_node_name :
-                # simulate_table
-                # This is a random effects hence its rate value is in log space
-                # and is relative to the corresponding fixed effect.
-                simulate_id         += 1
-                sim_row['simulate_id'] = simulate_id
-                sim_row['node_name']   = node_name
-                simulate_table.append( copy.copy(sim_row ) )
-    #
-    assert len( fit_table['var'] ) == len( var_id2simulate_id )
-    #
-    # copy_list
-    # must copy these files because simulate may be run in parallel.
-    copy_list = [
-        'node', 'covariate', 'no_effect_rate', 'multiplier_sim', 'random_effect'
-    ]
-    #
-    # copy files
-    for name in copy_list :
-        src = f'{sim_dir}/{name}.csv'
-        dst = f'{fit_node_dir}/{name}.csv'
-        shutil.copyfile(src, dst)
-    #
-    # option_sim.csv
-    file_name        = f'{sim_dir}/option_sim.csv'
-    option_sim_table = at_cascade.csv.read_table(file_name)
-    for name in [ 'new_random_effects', 'trace' ] :
-        found            = False
-        for row in option_sim_table :
-            if row['name'] == name :
-                found = True
-                row['value'] = 'false'
-        if not found :
-            row = { 'name' : name , 'value' : 'false' }
-        option_sim_table.append( row )
-    file_name  = f'{fit_node_dir}/option_sim.csv'
-    at_cascade.csv.write_table(file_name, option_sim_table)
-    #
-    # covariate.csv
-    file_name        = f'{fit_node_dir}/covariate.csv'
-    covariate_table  = at_cascade.csv.read_table(file_name)
-    for row in covariate_table :
-        for cov in cov2reference :
-            if cov != 'sex' and cov in row :
-                row[cov] = cov2reference[cov]
-    at_cascade.csv.write_table(file_name, covariate_table)
-    #
-    # simulate.csv
-    at_cascade.csv.write_table(
-        file_name = f'{fit_node_dir}/simulate.csv' ,
-        table     = simulate_table
-    )
-    #
-    # data_sim.csv, multiplier_sim.csv
-    at_cascade.csv.simulate(fit_node_dir)
-    #
-    # sim_table
-    sim_table = dict()
-    for table_name in [ 'data_sim', 'multiplier_sim' ] :
-        file_name             = f'{fit_node_dir}/{table_name}.csv'
-        sim_table[table_name] = at_cascade.csv.read_table(file_name)
-    #
-    # remove copies
-    if False :
-        for name in copy_list :
-            file_copy = f'{fit_node_dir}/{name}.csv'
-            os.remove(file_copy)
-    #
-    # turth_var_table
-    truth_var_table = list()
-    covariate_set   = dict()
-    for (var_id, var_row) in enumerate( fit_table['var'] ) :
-        #
-        # truth_var_value
-        truth_var_value = None
-        #
-        # var_type
-        var_type     = var_row['var_type']
-        #
-        # simulate_id
-        simulate_id   = var_id2simulate_id[var_id]
-        if simulate_id != None :
-            assert var_type == 'rate'
-            node_name   = fit_table['node'][  var_row['node_id'] ]['node_name']
-            fixed_value = float( sim_table['data_sim'][simulate_id]['meas_mean'] )
+            # truth_var_value
             if node_name == fit_node_name :
                 truth_var_value = fixed_value
             elif fixed_value == 0.0 :
                 truth_var_value = 0.0
             else :
-                random_value = \
-                    float( sim_table['data_sim'][simulate_id + 1]['meas_mean'] )
+                # This is a random effects hence its rate value is in log space
+                # and is relative to the corresponding fixed effect.
+                random_value = truth_eval.average_integrand(
+                    integrand_name, node_name, sex_name, age, time,
+                    fit_covariate_ref
+                )
                 truth_var_value = math.log( random_value / fixed_value )
-        else :
+        elif var_type == 'mulcov_rate_value' :
             #
-            # age_id, time_id
-            age_id       = var_row['age_id']
-            rate_id      = var_row['rate_id']
-            time_id      = var_row['time_id']
-            covariate_id = var_row['covariate_id']
+            # rate_name, covariate_name
+            rate_name      = fit_table['rate'][rate_id]['rate_name']
+            covariate_name = \
+                fit_table['covariate'][covariate_id]['covariate_name']
             #
-            if var_type == 'mulcov_rate_value' :
-                #
-                # rate_name, covariate_name
-                rate_name      = fit_table['rate'][rate_id]['rate_name']
-                covariate_name = \
-                    fit_table['covariate'][covariate_id]['covariate_name']
-                #
-                # truth_var_value
-                for row in sim_table['multiplier_sim'] :
-                    if row['rate_name'] == rate_name :
-                        if row['covariate_or_sex'] == covariate_name :
-                            truth_var_value = row['multiplier_truth']
-                assert truth_var_value != None
-                #
-                # covariate_set
-                if rate_name not in covariate_set :
-                    covariate_set[rate_name] = set()
-                assert covariate_name not in covariate_set[rate_name]
-                covariate_set[rate_name].add( covariate_name )
-            else :
-                # This var_type not yet implemented
-                assert False
+            # truth_var_value
+            key = (rate_name, covariate_name)
+            truth_var_value = truth_eval.multiplier_truth.get(key)
+            assert truth_var_value != None
+            #
+            # covariate_set
+            if rate_name not in covariate_set :
+                covariate_set[rate_name] = set()
+            assert covariate_name not in covariate_set[rate_name]
+            covariate_set[rate_name].add( covariate_name )
+        else :
+            # This var_type not yet implemented
+            assert False
         assert truth_var_value != None
         truth_var_table.append( { 'truth_var_value' : truth_var_value} )
     #
@@ -1,10 +1,11 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 import time
 import math
 import random
+import multiprocessing
 import numpy
 import dismod_at
 import at_cascade
@@ -87,6 +88,21 @@ and time_lower to time_upper (in data_sim.csv).
 It must be greater than zero.
 The default value for this option is 5.0.
 
+max_number_cpu
+--------------
+This integer is the maximum number of cpus (processes) to use
+when simulating the rows in data_sim.csv.
+This must be greater than zero.
+The random numbers for each row are determined by
+:ref:`csv.simulate@Input Files@option_sim.csv@random_seed`
+and :ref:`csv.simulate@Input Files@simulate.csv@simulate_id` .
+Hence :ref:`csv.simulate@Output Files@data_sim.csv` does not depend
+on the value of this option.
+The default value for this option is
+{xrst_code py}
+    max_number_cpu = max(1, multiprocessing.cpu_count() - 1)
+{xrst_code}
+
 random_depend_sex
 -----------------
 If :ref:`csv.simulate@Input Files@option_sim.csv@new_random_effects` is
@@ -435,41 +451,33 @@ outside the age rage (time range) in the covariate.csv file.
 {xrst_end csv.simulate}
 """
 # ----------------------------------------------------------------------------
-# set_global_option_value
-#
-# Sets global global_option_value to dict representation of option_sim.csv
-#
-# sim_dir
-# is the directory where the input csv files are located.
+# get_option_value
 #
 # option_table :
 # is the list of dict corresponding to option_sim.csv
 #
-# option_sim_out.csv
-# As a side effect, this routine write a copy of the option table
-# with the default values filled in.
-#
-# global_option_value[name] :
+# option_value[name] :
 # is the option value corresponding the specified option name.
 # Here name is a string and value
 # has been converted to its corresponding type.
+# Missing options have their default value.
 #
-global_option_value = None
-def set_global_option_value(sim_dir, option_table) :
-    global global_option_value
-    assert type(global_option_value) == dict or global_option_value == None
+# option_value =
+def get_option_value(option_table) :
     assert type(option_table) == list
     if len(option_table) > 0 :
         assert type( option_table[0] ) == dict
     #
     # option_default
-    random_seed = int( time.time() )
+    random_seed    = int( time.time() )
+    max_number_cpu = max(1, multiprocessing.cpu_count() - 1)
     # BEGIN_SORT_THIS_LINE_PLUS_2
     option_default  = {
         'absolute_covariates'              : (str, None)         ,
         'absolute_tolerance'               : (float, 1e-5)       ,
         'float_precision'                  : (int,   4)          ,
         'integrand_step_size'              : (float, 5.0)        ,
+        'max_number_cpu'                   : (int,   max_number_cpu) ,
         'new_random_effects'               : (bool,  True)       ,
         'random_depend_sex'                : (bool,  False)      ,
         'random_seed'                      : (int, random_seed)  ,
@@ -481,13 +489,13 @@ def set_global_option_value(sim_dir, option_table) :
     }
     # END_SORT_THIS_LINE_MINUS_2
     #
-    # global_option_value
-    line_number      = 0
-    global_option_value = dict()
+    # option_value
+    line_number  = 0
+    option_value = dict()
     for row in option_table :
         line_number += 1
         name         = row['name']
-        if name in global_option_value :
+        if name in option_value :
             msg  = f'csv.simulate: Error: line {line_number} in option_sim.csv\n'
             msg += f'the name {name} appears twice in this table'
             assert False, msg
@@ -505,15 +513,48 @@ def set_global_option_value(sim_dir, option_table) :
                 msg += 'option_sim.csv\n'
                 msg += f'The value for {name} is not true or false'
                 assert False, msg
-            global_option_value[name] = value == 'true'
+            option_value[name] = value == 'true'
         else :
-            global_option_value[name] = option_type( value )
+            option_value[name] = option_type( value )
     #
-    # global_option_value
+    # option_value
     for name in option_default :
-        if name not in global_option_value :
+        if name not in option_value :
             (option_type, default) = option_default[name]
-            global_option_value[name] = default
+            option_value[name] = default
+    #
+    if option_value['max_number_cpu'] < 1 :
+        assert False, 'option_sim.csv: max_number_cpu < 1'
+    #
+    return option_value
+# ----------------------------------------------------------------------------
+# set_global_option_value
+#
+# Sets global global_option_value to dict representation of option_sim.csv
+#
+# sim_dir
+# is the directory where the input csv files are located.
+#
+# option_table :
+# is the list of dict corresponding to option_sim.csv
+#
+# option_sim_out.csv
+# As a side effect, this routine write a copy of the option table
+# with the default values filled in.
+#
+# global_option_value[name] :
+# is the option value corresponding the specified option name.
+# Here name is a string and value
+# has been converted to its corresponding type.
+#
+global_option_value = None
+def set_global_option_value(sim_dir, option_table) :
+    global global_option_value
+    assert type(global_option_value) == dict or global_option_value == None
+    assert type(option_table) == list
+    #
+    # global_option_value
+    global_option_value = get_option_value(option_table)
     #
     # option_sim_out.csv
     table = list()
@@ -762,6 +803,15 @@ def eval_spline(spline_node_sex_cov, node_name, sex, cov_name, age, time) :
 # age, time, and value are floats
 # This is used to compute  covariate values.
 #
+# covariate_value :
+# If this is not None, covariate_value[covariate_name] is the value used
+# for the specified covariate at all ages and times (instead of the value
+# in spline_node_sex_cov). Covariates that are not in covariate_value
+# are computed using spline_node_sex_cov.
+#
+# The random and sex effects are computed once when rate_fun_dict is created
+# and the covariate differences are cached for each age, time pair.
+#
 # rate_fun_dict =
 def get_rate_fun_dict(
     parent_node_dict            ,
@@ -772,18 +822,20 @@ def get_rate_fun_dict(
     node_name                   ,
     sex                         ,
     spline_node_sex_cov         ,
+    covariate_value = None      ,
 ) :
     assert sex in { 'female', 'male', 'both' }
-    # -----------------------------------------------------------------------
-    # rate_fun
-    def rate_fun(age, time, rate_name) :
-        #
-        # no_effect_rate
-        spline         = spline_no_effect_rate[rate_name]
-        no_effect_rate = spline(age, time)
-        #
-        # effect
-        # random effects
+    assert covariate_value == None or type(covariate_value) == dict
+    #
+    # covariate_value
+    if covariate_value == None :
+        covariate_value = dict()
+    #
+    # random_effect
+    # random_effect[rate_name] is the sum of the random effects for this
+    # node and its ancestors. It does not depend on age or time.
+    random_effect = dict()
+    for rate_name in spline_no_effect_rate :
         effect         = 0.0
         ancestor_node  = node_name
         while ancestor_node != '' :
@@ -796,23 +848,76 @@ def get_rate_fun_dict(
             ancestor_node = parent_node_dict[ancestor_node]
             if ancestor_node == '' :
                 assert term == 0.0
-        #
-        # effect
-        # covariate and sex effects
+        random_effect[rate_name] = effect
+    #
+    # multiplier_term
+    # multiplier_term[rate_name] is a list of (covariate_or_sex, multiplier)
+    # in the same order as multiplier_list_rate[rate_name] so that the
+    # effects are summed in the same order for every age and time.
+    multiplier_term = dict()
+    for rate_name in spline_no_effect_rate :
+        multiplier_term[rate_name] = list()
         for row in multiplier_list_rate[rate_name] :
             assert row['rate_name'] == rate_name
             #
             covariate_or_sex = row['covariate_or_sex']
-            if covariate_or_sex == 'sex' :
-                difference = sex_covariate_value[sex]
-            else :
-                covariate_name = covariate_or_sex
-                covariate      = eval_spline(
-                    spline_node_sex_cov, node_name, sex, covariate_name, age, time
-                )
-                reference      = root_covariate_ref[covariate_name]
-                difference     = covariate - reference
-            effect    += float( row['multiplier_truth'] ) * difference
+            multiplier       = float( row['multiplier_truth'] )
+            multiplier_term[rate_name].append( (covariate_or_sex, multiplier) )
+    #
+    # covariate_name_set
+    covariate_name_set = set()
+    for rate_name in multiplier_term :
+        for (covariate_or_sex, multiplier) in multiplier_term[rate_name] :
+            if covariate_or_sex != 'sex' :
+                covariate_name_set.add( covariate_or_sex )
+    #
+    # difference_cache
+    # difference_cache[ (age, time) ][covariate_name] is the covariate minus
+    # its reference at the specified age and time. This is used because
+    # the ODE evaluates the rates for the same age, time pairs many times.
+    difference_cache = dict()
+    # -----------------------------------------------------------------------
+    # get_difference
+    def get_difference(age, time) :
+        key = (age, time)
+        if key not in difference_cache :
+            if len(difference_cache) >= 10000 :
+                difference_cache.clear()
+            difference = dict()
+            for covariate_name in covariate_name_set :
+                if covariate_name in covariate_value :
+                    covariate = covariate_value[covariate_name]
+                else :
+                    covariate = eval_spline(
+                        spline_node_sex_cov,
+                        node_name, sex, covariate_name, age, time
+                    )
+                reference = root_covariate_ref[covariate_name]
+                difference[covariate_name] = covariate - reference
+            difference_cache[key] = difference
+        return difference_cache[key]
+    # -----------------------------------------------------------------------
+    # rate_fun
+    def rate_fun(age, time, rate_name) :
+        #
+        # no_effect_rate
+        spline         = spline_no_effect_rate[rate_name]
+        no_effect_rate = spline(age, time)
+        #
+        # effect
+        # random effects
+        effect = random_effect[rate_name]
+        #
+        # effect
+        # covariate and sex effects
+        if len( multiplier_term[rate_name] ) > 0 :
+            difference_dict = get_difference(age, time)
+            for (covariate_or_sex, multiplier) in multiplier_term[rate_name] :
+                if covariate_or_sex == 'sex' :
+                    difference = sex_covariate_value[sex]
+                else :
+                    difference = difference_dict[covariate_or_sex]
+                effect += multiplier * difference
         #
         # rate
         rate = math.exp(effect) * no_effect_rate
@@ -1106,6 +1211,186 @@ def sim_random_effect_node_rate_sex (
     #
     return random_effect_node_rate_sex
 # ----------------------------------------------------------------------------
+# sim_context
+# is a dict containing the arguments to create_data_sim_table that are used
+# by create_data_sim_row. It is set by set_sim_context in each process that
+# simulates data rows.
+#
+# rate_fun_memo
+# rate_fun_memo[ (node_name, sex) ] is the rate_fun_dict for this node and sex
+# in the current process; see get_rate_fun_dict.
+sim_context   = None
+rate_fun_memo = dict()
+def set_sim_context(option_value, context) :
+    global global_option_value
+    global sim_context
+    global rate_fun_memo
+    assert type(option_value) == dict
+    assert type(context) == dict
+    global_option_value = option_value
+    sim_context         = context
+    rate_fun_memo       = dict()
+# ----------------------------------------------------------------------------
+# data_row = create_data_sim_row(simulate_id, sim_row)
+#
+# simulate_id
+# is the index of this row in simulate.csv.
+#
+# sim_row
+# is the row of simulate.csv corresponding to simulate_id.
+#
+# data_row
+# is the corresponding row of data_sim.csv.
+# The random numbers for this row are generated using a random.Random object
+# that is seeded using random_seed and simulate_id. Hence data_row does not
+# depend on which process simulates it.
+#
+def create_data_sim_row(simulate_id, sim_row) :
+    #
+    # valid_integrand_name, parent_node_dict, ..., spline_node_sex_cov
+    valid_integrand_name        = sim_context['valid_integrand_name']
+    parent_node_dict            = sim_context['parent_node_dict']
+    spline_no_effect_rate       = sim_context['spline_no_effect_rate']
+    random_effect_node_rate_sex = sim_context['random_effect_node_rate_sex']
+    root_covariate_ref          = sim_context['root_covariate_ref']
+    multiplier_list_rate        = sim_context['multiplier_list_rate']
+    spline_node_sex_cov         = sim_context['spline_node_sex_cov']
+    #
+    # line_number
+    line_number = simulate_id + 2
+    #
+    # float_format
+    n_digits = str( global_option_value['float_precision'] )
+    float_format = '{0:.' + n_digits + 'g}'
+    #
+    # simulate_id
+    if simulate_id != int( float(sim_row['simulate_id']) ) :
+        msg  = f'csv.simulate: Error at line {line_number} '
+        msg += f'in simulate.csv\n'
+        msg += f'simulate_id = ' + sim_row['simulate_id']
+        msg += ' is not equal line number minus two'
+        assert False, msg
+    #
+    # integrand_name
+    integrand_name = sim_row['integrand_name']
+    if integrand_name not in valid_integrand_name :
+        msg  = f'csv.simulate: Error at line {line_number} '
+        msg += f' in simulate.csv\n'
+        msg += f'integrand_name = ' + integrand_name
+        msg += ' is not a valid integrand name'
+        assert False, msg
+    #
+    # node_name
+    node_name = sim_row['node_name']
+    if node_name not in parent_node_dict :
+        msg  = f'csv.simulate: Error at line {line_number} '
+        msg += f' in simulate.csv\n'
+        msg += f'node_name = ' + node_name
+        msg += ' is not in node.csv'
+        assert False, msg
+    #
+    # sex
+    sex = sim_row['sex']
+    if sex not in [ 'female', 'male', 'both' ] :
+        msg  = f'csv.simulate: Error at line {line_number} '
+        msg += f' in simulate.csv\n'
+        msg += f'sex = ' + sex
+        msg += ' is not male, feamle, or both'
+        assert False, msg
+    #
+    # age_lower, age_upper, time_lower, time_upper
+    age_lower  = float( sim_row['age_lower'] )
+    age_upper  = float( sim_row['age_upper'] )
+    time_lower = float( sim_row['time_lower'] )
+    time_upper = float( sim_row['time_upper'] )
+    #
+    # age_mid, time_mid
+    age_mid  = ( age_lower  + age_upper )  / 2.0
+    time_mid = ( time_lower + time_upper ) / 2.0
+    #
+    covariate_value_dict = dict()
+    for cov_name in root_covariate_ref.keys() :
+        covariate_value_dict[cov_name] = eval_spline(
+            spline_node_sex_cov, node_name, sex, cov_name, age_mid, time_mid
+        )
+    #
+    # rate_fun_dict
+    if (node_name, sex) not in rate_fun_memo :
+        rate_fun_memo[ (node_name, sex) ] = get_rate_fun_dict(
+            parent_node_dict            ,
+            spline_no_effect_rate       ,
+            random_effect_node_rate_sex ,
+            root_covariate_ref          ,
+            multiplier_list_rate        ,
+            node_name                   ,
+            sex                         ,
+            spline_node_sex_cov         ,
+        )
+    rate_fun_dict = rate_fun_memo[ (node_name, sex) ]
+    #
+    # data_row
+    # Note that changes to data_row will also change covariate_value_dict
+    data_row = covariate_value_dict
+    data_row['simulate_id'] = simulate_id
+    #
+    # grid
+    integrand_step_size = global_option_value['integrand_step_size']
+    grid = average_integrand_grid(
+        integrand_step_size, age_lower, age_upper, time_lower, time_upper
+    )
+    #
+    # avg_integrand
+    abs_tol = global_option_value['absolute_tolerance']
+    avg_integrand = dismod_at.average_integrand(
+        rate_fun_dict, integrand_name, grid, abs_tol,
+    )
+    # numpy uses its own type for floats
+    avg_integrand = float( avg_integrand )
+    #
+    # data_row['meas_mean']
+    meas_mean             = avg_integrand
+    data_row['meas_mean'] = meas_mean
+    #
+    # data_row['meas_std']
+    meas_std_cv          = float( sim_row['meas_std_cv'] )
+    meas_std_min         = float( sim_row['meas_std_min'] )
+    meas_std             = max(meas_std_min, meas_std_cv * meas_mean )
+    data_row['meas_std'] = meas_std
+    #
+    # row_random
+    random_seed = global_option_value['random_seed']
+    row_random  = random.Random( f'{random_seed}.{simulate_id}' )
+    #
+    # data_row['meas_value']
+    meas_value             = row_random.gauss(meas_mean, meas_std )
+    meas_value             = max(meas_value, 0.0)
+    data_row['meas_value'] = meas_value
+    #
+    # data_row
+    for key in data_row :
+        value = data_row[key]
+        if type( value ) == float :
+            data_row[key] = float_format.format(value)
+    #
+    return data_row
+# ----------------------------------------------------------------------------
+# data_sim_chunk = create_data_sim_chunk(chunk)
+#
+# chunk
+# is a tuple (start_id, sim_chunk) where sim_chunk is the list of rows
+# in simulate.csv that start at simulate_id equal to start_id.
+#
+# data_sim_chunk
+# is the list of rows in data_sim.csv corresponding to sim_chunk.
+#
+def create_data_sim_chunk(chunk) :
+    (start_id, sim_chunk) = chunk
+    data_sim_chunk        = list()
+    for (i, sim_row) in enumerate( sim_chunk ) :
+        data_row = create_data_sim_row(start_id + i, sim_row)
+        data_sim_chunk.append( data_row )
+    return data_sim_chunk
+# ----------------------------------------------------------------------------
 # create_data_sim_table
 #
 # valid_integrand_name
@@ -1134,6 +1419,9 @@ def sim_random_effect_node_rate_sex (
 # maps node_name, sex, and covariate to a apline that evaluates the
 # covarite as a function of age and time.
 #
+# The rows are simulated in chunks. If max_number_cpu is greater than one,
+# the chunks are simulated using a pool of processes.
+#
 def create_data_sim_table(
     simulate_table,
     valid_integrand_name        ,
@@ -1145,143 +1433,70 @@ def create_data_sim_table(
     spline_node_sex_cov         ,
 ) :
     #
-    # float_format
-    n_digits = str( global_option_value['float_precision'] )
-    float_format = '{0:.' + n_digits + 'g}'
+    # context
+    context = {
+        'valid_integrand_name'        : valid_integrand_name ,
+        'parent_node_dict'            : parent_node_dict ,
+        'spline_no_effect_rate'       : spline_no_effect_rate ,
+        'random_effect_node_rate_sex' : random_effect_node_rate_sex ,
+        'root_covariate_ref'          : root_covariate_ref ,
+        'multiplier_list_rate'        : multiplier_list_rate ,
+        'spline_node_sex_cov'         : spline_node_sex_cov ,
+    }
+    set_sim_context(global_option_value, context)
     #
-    # node_set
-    node_set = set( parent_node_dict.keys() )
+    # n_simulate, max_number_cpu
+    n_simulate     = len( simulate_table )
+    max_number_cpu = global_option_value['max_number_cpu']
+    #
+    # chunk_list
+    chunk_size = max(1, min(1000, n_simulate // (10 * max_number_cpu) ) )
+    chunk_list = list()
+    for start_id in range(0, n_simulate, chunk_size) :
+        sim_chunk = simulate_table[start_id : start_id + chunk_size]
+        chunk_list.append( (start_id, sim_chunk) )
     #
     # s_last, s_start
     if global_option_value['trace'] :
-        simulate_id = len( simulate_table )
-        print( f'Simulation: total id = {simulate_id:,}' )
+        print( f'Simulation: total id = {n_simulate:,}' )
     s_last  = time.time()
     s_start = s_last
     #
+    # pool, chunk_iterator
+    pool = None
+    if max_number_cpu > 1 and len(chunk_list) > 1 :
+        n_process = min(max_number_cpu, len(chunk_list) )
+        pool = multiprocessing.Pool(
+            processes   = n_process ,
+            initializer = set_sim_context ,
+            initargs    = (global_option_value, context) ,
+        )
+        chunk_iterator = pool.imap(create_data_sim_chunk, chunk_list)
+    else :
+        chunk_iterator = map(create_data_sim_chunk, chunk_list)
+    #
     # data_sim_table
     data_sim_table = list()
-    for (simulate_id, sim_row) in enumerate( simulate_table) :
-        line_number = simulate_id + 2
-        #
-        # s_current
-        s_current = time.time()
-        if s_current - s_last > 30.0 and global_option_value['trace'] :
+    try :
+        for data_sim_chunk in chunk_iterator :
+            data_sim_table += data_sim_chunk
+            #
+            # s_current
+            s_current = time.time()
+            if s_current - s_last > 30.0 and global_option_value['trace'] :
                 #
                 # seconds, s_last
                 seconds = s_current - s_start
                 s_last  = s_current
-                print( f'{simulate_id:,} id, {seconds:.0f} sec' )
-        #
-        # simulate_id
-        if True :
-            if simulate_id != int( float(sim_row['simulate_id']) ) :
-                msg  = f'csv.simulate: Error at line {line_number} '
-                msg += f'in simulate.csv\n'
-                msg += f'simulate_id = ' + sim_row['simulate_id']
-                msg += ' is not equal line number minus two'
-                assert False, msg
-        #
-        # integrand_name
-        integrand_name = sim_row['integrand_name']
-        if integrand_name not in valid_integrand_name :
-            msg  = f'csv.simulate: Error at line {line_number} '
-            msg += f' in simulate.csv\n'
-            msg += f'integrand_name = ' + integrand_name
-            msg += ' is not a valid integrand name'
-            assert False, msg
-        #
-        # node_name
-        node_name = sim_row['node_name']
-        if node_name not in node_set :
-            msg  = f'csv.simulate: Error at line {line_number} '
-            msg += f' in simulate.csv\n'
-            msg += f'node_name = ' + node_name
-            msg += ' is not in node.csv'
-            assert False, msg
-        #
-        # sex
-        sex = sim_row['sex']
-        if sex not in [ 'female', 'male', 'both' ] :
-            msg  = f'csv.simulate: Error at line {line_number} '
-            msg += f' in simulate.csv\n'
-            msg += f'sex = ' + sex
-            msg += ' is not male, feamle, or both'
-            assert False, msg
-        #
-        # age_lower, age_upper, time_lower, time_upper
-        age_lower  = float( sim_row['age_lower'] )
-        age_upper  = float( sim_row['age_upper'] )
-        time_lower = float( sim_row['time_lower'] )
-        time_upper = float( sim_row['time_upper'] )
-        #
-        # age_mid, time_mid
-        age_mid  = ( age_lower  + age_upper )  / 2.0
-        time_mid = ( time_lower + time_upper ) / 2.0
-        #
-        covariate_value_dict = dict()
-        for cov_name in root_covariate_ref.keys() :
-            covariate_value_dict[cov_name] = eval_spline(
-                spline_node_sex_cov, node_name, sex, cov_name, age_mid, time_mid
-            )
-        #
-        # rate_fun_dict
-        rate_fun_dict = get_rate_fun_dict(
-            parent_node_dict            ,
-            spline_no_effect_rate       ,
-            random_effect_node_rate_sex ,
-            root_covariate_ref          ,
-            multiplier_list_rate        ,
-            node_name                   ,
-            sex                         ,
-            spline_node_sex_cov         ,
-        )
-        #
-        # data_row
-        # Note that changes to data_row will also change covariate_value_dict
-        data_row = covariate_value_dict
-        data_row['simulate_id'] = simulate_id
-        #
-        # grid
-        integrand_step_size = global_option_value['integrand_step_size']
-        grid = average_integrand_grid(
-            integrand_step_size, age_lower, age_upper, time_lower, time_upper
-        )
-        #
-        # avg_integrand
-        abs_tol = global_option_value['absolute_tolerance']
-        avg_integrand = dismod_at.average_integrand(
-            rate_fun_dict, integrand_name, grid, abs_tol,
-        )
-        # numpy uses its own type for floats
-        avg_integrand = float( avg_integrand )
-        #
-        # data_row['meas_mean']
-        meas_mean             = avg_integrand
-        data_row['meas_mean'] = meas_mean
-        #
-        # data_row['meas_std']
-        meas_std_cv          = float( sim_row['meas_std_cv'] )
-        meas_std_min         = float( sim_row['meas_std_min'] )
-        meas_std             = max(meas_std_min, meas_std_cv * meas_mean )
-        data_row['meas_std'] = meas_std
-        #
-        # data_row['meas_value']
-        meas_value             = random.gauss(meas_mean, meas_std )
-        meas_value             = max(meas_value, 0.0)
-        data_row['meas_value'] = meas_value
-        #
-        # data_row
-        for key in data_row :
-            value = data_row[key]
-            if type( value ) == float :
-                data_row[key] = float_format.format(value)
-        #
-        # data_sim_table
-        data_sim_table.append( data_row )
+                n_done  = len( data_sim_table )
+                print( f'{n_done:,} id, {seconds:.0f} sec' )
+    finally :
+        if pool != None :
+            pool.close()
+            pool.join()
     #
     # seconds
-    seconds = s_current - s_start
+    seconds = time.time() - s_start
     if global_option_value['trace'] :
         print( f'End simulation: total seconds = {seconds:.0f}' )
     #
@@ -1324,7 +1539,6 @@ def simulate(sim_dir) :
         print('Reading csv files:')
     input_list  = [
         'node',
-        'covariate',
         'multiplier_sim',
         'no_effect_rate',
         'simulate',
@@ -1334,11 +1548,9 @@ def simulate(sim_dir) :
         input_table[name] = at_cascade.csv.read_table(file_name)
         at_cascade.csv.check_table(file_name, input_table[name])
     #
-    # input_table['covariate']
-    for row in input_table['covariate'] :
-        for key in row :
-            if key not in { 'node_name', 'sex' } :
-                row[key] = float( row[key] )
+    # cov_array
+    file_name = f'{sim_dir}/covariate.csv'
+    cov_array = at_cascade.csv.covariate_array_class(file_name)
     #
     if global_option_value['trace'] :
         print('Creating data structures:' )
@@ -1349,9 +1561,12 @@ def simulate(sim_dir) :
     #
     # spline_node_sex_cov
     node_set = set( parent_node_dict.keys() )
-    age_grid, time_grid, spline_node_sex_cov = at_cascade.csv.covariate_spline(
-        input_table['covariate'], node_set
-    )
+    for node_name in cov_array.node_list :
+        if node_name not in node_set :
+            msg  = f'simulate: Error: covariate.csv\n'
+            msg += f'node_name {node_name} is not in node.csv'
+            assert False, msg
+    spline_node_sex_cov = cov_array.spline_cov()
     #
     # root_node_name
     root_node_name = None
@@ -1366,13 +1581,7 @@ def simulate(sim_dir) :
         assert False, msg
     #
     # root_covariate_ref
-    covariate_table    = input_table['covariate']
-    covariate_table    = at_cascade.csv.covariate_both(covariate_table)
-    root_covariate_ref = at_cascade.csv.covariate_avg(
-        covariate_table = covariate_table          ,
-        node_name       = root_node_name           ,
-        sex             = 'both'                   ,
-    )
+    root_covariate_ref = cov_array.average()[ (root_node_name, 'both') ]
     absolute_covariates = global_option_value['absolute_covariates']
     if absolute_covariates != None :
         for covariate_name in absolute_covariates.split() :
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2024 Bradley M. Bell
+# SPDX-FileContributor: 2024-26 Bradley M. Bell
 r'''
 {xrst_begin data_include}
 
@@ -37,8 +37,18 @@ the rows that satisfy the following conditions:
 #. The corresponding hold_out value in the data_subset table is zero.
 #. The corresponding integrand is not in the option table hold_out list.
 
+The rows in this table may be the rows in the
+:ref:`fit_or_root_class@get_table@Root Table Cache` and must not be modified.
+
+Shared Data Table
+*****************
+If this process is attached to a :ref:`shared_data_class-name` object
+for *root_database* , the rows of the data table are read from shared memory
+instead of from *root_database* .
+
 {xrst_end data_include}
 '''
+import os
 import at_cascade
 #
 # BEGIN_DEF
@@ -59,8 +69,12 @@ def data_include(
     # data_subset_table
     data_subset_table = fit_or_root.get_table('data_subset')
     #
-    # data_table
-    data_table = fit_or_root.get_table('data')
+    # shared_data, data_table
+    shared_data = at_cascade.shared_data_class.attached.get(
+        os.path.realpath(root_database)
+    )
+    if shared_data == None :
+        data_table = fit_or_root.get_table('data')
     #
     # integrand_table
     integrand_table = fit_or_root.get_table('integrand')
@@ -97,7 +111,10 @@ def data_include(
         data_id = subset_row['data_id']
         #
         # data_row
-        data_row = data_table[data_id]
+        if shared_data == None :
+            data_row = data_table[data_id]
+        else :
+            data_row = shared_data.row(data_id)
         #
         # integrand_id
         integrand_id = data_row['integrand_id']
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin fit_one_job}
@@ -172,7 +172,7 @@ def fit_one_job(
     first_fit               ,
     trace_file_obj   = None ,
 ) :
-    assert type(job_table) == list
+    assert type(job_table) in [ list, at_cascade.job_table_class ]
     assert type(run_job_id) == int
     assert type(all_node_database) == str
     assert type(node_table) == list
@@ -217,7 +217,6 @@ def fit_one_job(
     for tbl_name in [
         'option_all',
         'split_reference',
-        'node_split',
         'mulcov_freeze',
     ] :
         all_table[tbl_name] = dismod_at.get_table_dict(connection, tbl_name)
@@ -257,10 +256,6 @@ def fit_one_job(
     # result_dir
     result_dir = option_all_dict['result_dir']
     #
-    # root_node_id
-    name         = option_all_dict['root_node_name']
-    root_node_id = at_cascade.table_name2id(node_table, 'node', name)
-    #
     # root_split_reference_id
     if 'root_split_reference_name' not in option_all_dict :
         root_split_reference_id = None
@@ -296,22 +291,9 @@ def fit_one_job(
             msg += 'list with three elements'
             assert False, msg
     #
-    # node_split_set
-    node_split_set = set()
-    for row in all_table['node_split'] :
-        node_split_set.add( row['node_id'] )
-    #
     # fit_database
-    database_dir = at_cascade.get_database_dir(
-        node_table              = node_table,
-        split_reference_table   = all_table['split_reference'],
-        node_split_set          = node_split_set,
-        root_node_id            = root_node_id,
-        root_split_reference_id = root_split_reference_id,
-        fit_node_id             = fit_node_id ,
-        fit_split_reference_id  = fit_split_reference_id,
-    )
-    fit_database      = f'{result_dir}/{database_dir}/dismod.db'
+    database_dir = job_table[run_job_id]['database_dir']
+    fit_database = f'{result_dir}/{database_dir}/dismod.db'
     #
     # check fit_database
     parent_node_name = at_cascade.get_parent_node(fit_database)
@@ -343,8 +325,9 @@ def fit_one_job(
     )
     command = 'DROP TABLE IF EXISTS log'
     dismod_at.sql_command(connection, command)
-    at_cascade.add_log_entry(connection, dismod_at_version)
-    at_cascade.add_log_entry(connection, at_cascade_version)
+    at_cascade.add_log_entry(
+        connection, [ dismod_at_version, at_cascade_version ]
+    )
     connection.close()
     #
     # init
@@ -505,15 +488,7 @@ def fit_one_job(
         shift_split_reference_id = job_table[job_id]['split_reference_id']
         #
         # shift_database_dir
-        database_dir = at_cascade.get_database_dir(
-            node_table              = node_table,
-            split_reference_table   = all_table['split_reference'],
-            node_split_set          = node_split_set,
-            root_node_id            = root_node_id,
-            root_split_reference_id = root_split_reference_id,
-            fit_node_id             = shift_node_id ,
-            fit_split_reference_id  = shift_split_reference_id,
-        )
+        database_dir       = job_table[job_id]['database_dir']
         shift_database_dir = f'{result_dir}/{database_dir}'
         if not os.path.exists(shift_database_dir) :
             os.makedirs(shift_database_dir)
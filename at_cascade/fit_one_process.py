@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 # Set this to False when debugging an exception during fit_one_job routine
 catch_exceptions_and_continue = True
@@ -114,6 +114,15 @@ shared_event
 is multiprocessing event,  used by all the fit processes,
 that is used to signal that the shared memory has changed.
 
+shared_data_name
+****************
+If this ``str`` is present (and not ``None`` ),
+it is the *shared_name* for a :ref:`shared_data_class-name`
+that contains the root database data table.
+If this process is not already attached to it,
+it attaches to it so that the fits in this process use the shared
+data table instead of reading it from the root database.
+
 {xrst_end fit_one_process}
 '''
 # ----------------------------------------------------------------------------
@@ -136,55 +145,22 @@ def acquire_lock(shared_lock) :
         msg = f'pre_one_process: did not obtain lock in {seconds} seconds'
         sys.exit(msg)
 # ----------------------------------------------------------------------------
-def get_result_database_dir(
-    all_node_database, node_table, fit_node_id, fit_split_reference_id
-) :
+def get_result_database_dir(all_node_database, database_dir) :
     #
-    # option_all, node_split_table, split_reference_table
+    # option_all
     connection       = dismod_at.create_connection(
         all_node_database, new = False, readonly = True
     )
     option_all_table = dismod_at.get_table_dict(connection, 'option_all')
-    node_split_table = dismod_at.get_table_dict(connection, 'node_split')
-    split_reference_table = \
-        dismod_at.get_table_dict(connection, 'split_reference')
     connection.close()
     #
-    # result_dir, root_node_name
+    # result_dir
     result_dir              = None
-    root_node_id            = None
-    root_split_reference_id = None
     for row in option_all_table :
         if row['option_name'] == 'result_dir' :
             result_dir = row['option_value']
-        if row['option_name'] == 'root_node_name' :
-            root_node_name = row['option_value']
-            root_node_id   = \
-                at_cascade.table_name2id(node_table, 'node', root_node_name)
-        if row['option_name'] == 'root_split_reference_name' :
-            root_split_reference_name = row['option_value']
-            root_split_reference_id = at_cascade.table_name2id(
-                split_reference_table,
-                'split_reference',
-                root_split_reference_name
-            )
     assert result_dir is not None
-    assert root_node_id is not None
     #
-    # node_split_set
-    node_split_set = set()
-    for row in node_split_table :
-        node_split_set.add( row['node_id'] )
-    #
-    database_dir = at_cascade.get_database_dir(
-        node_table              = node_table,
-        split_reference_table   = split_reference_table,
-        node_split_set          = node_split_set,
-        root_node_id            = root_node_id,
-        root_split_reference_id = root_split_reference_id,
-        fit_node_id             = fit_node_id,
-        fit_split_reference_id  = fit_split_reference_id,
-    )
     return f'{result_dir}/{database_dir}'
 # )
 # ----------------------------------------------------------------------------
@@ -203,7 +179,7 @@ def try_one_job(
     shared_job_status,
     job_status_name,
 )  :
-    assert type(job_table) == list
+    assert type(job_table) in [ list, at_cascade.job_table_class ]
     assert type(this_job_id) == int
     assert type(all_node_database) == str
     assert type(node_table) == list
@@ -223,14 +199,8 @@ def try_one_job(
     job_status_abort = job_status_name.index( 'abort' )
     #
     # database_dir
-    row = job_table[this_job_id]
-    fit_node_id            = row['fit_node_id']
-    fit_split_reference_id = row['split_reference_id']
     result_database_dir = get_result_database_dir(
-        all_node_database,
-        node_table,
-        fit_node_id,
-        fit_split_reference_id
+        all_node_database, job_table[this_job_id]['database_dir']
     )
     #
     # job_name
@@ -406,8 +376,9 @@ def fit_one_process(
     shared_number_cpu_inuse_name,
     shared_lock,
     shared_event,
+    shared_data_name = None,
 ) :
-    assert type(job_table)            == list
+    assert type(job_table) in [ list, at_cascade.job_table_class ]
     assert type(this_job_id)          == int
     assert type(all_node_database)    == str
     assert type(node_table)           == list
@@ -422,6 +393,7 @@ def fit_one_process(
     assert type(shared_number_cpu_inuse_name) == str
     assert type(shared_lock)          == multiprocessing.synchronize.Lock
     assert type(shared_event)         == multiprocessing.synchronize.Event
+    assert shared_data_name == None or type(shared_data_name) == str
     # END_DEF
     # ----------------------------------------------------------------------
     job_status_skip  = job_status_name.index( 'skip' )
@@ -453,6 +425,15 @@ def fit_one_process(
         tmp.shape, dtype = tmp.dtype, buffer = shm_number_cpu_inuse.buf
     )
     #
+    # shared_data
+    # A process created using fork is already attached
+    if shared_data_name != None :
+        attached = False
+        for shared_data in at_cascade.shared_data_class.attached.values() :
+            attached = attached or shared_data.shared_name == shared_data_name
+        if not attached :
+            at_cascade.shared_data_class(shared_data_name)
+    #
     # job_table_index
     job_table_index = numpy.array( range(len(job_table)), dtype = int )
     #
@@ -594,6 +575,7 @@ def fit_one_process(
                     shared_number_cpu_inuse_name,
                     shared_lock,
                     shared_event,
+                    shared_data_name,
                 )
                 target = fit_one_process
                 p = multiprocessing.Process(target = target, args = args)
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 '''
 {xrst_begin fit_or_root_class}
@@ -40,6 +40,22 @@ If *table_name* is a
 *table* is retrieved from the root node database.
 Otherwise it is retrieved from the fit node database.
 
+Root Table Cache
+================
+The constant tables are cached in memory by each process.
+The cache key is the root database file name and the table name;
+the cached table is only used if the modification time and size of the
+root database have not changed since it was read.
+
+#. The ``data`` table has its own least recently used cache that holds
+   the data tables for at most two root databases.
+#. The other constant tables are in a least recently used cache that is
+   limited to a total of two million rows
+   (a table with more rows is not cached).
+#. The cached table is returned (not a copy).
+   Hence *table* , and its rows, must not be modified.
+   A caller that changes a row must make a copy of the row first.
+
 null_row
 ********
 {xrst_code py}
@@ -66,9 +82,69 @@ The ``get_table`` function will no longer be available.
 
 {xrst_end fit_or_root_class}
 '''
+import os
 import dismod_at
 import at_cascade
 #
+# root_table_cache
+# maps ( root_database, table_name ) to ( stat_key, table ) where stat_key
+# identifies the version of root_database that the table was read from.
+# The most recently used entry is at the end of this dict.
+# The data table is not in this cache.
+root_table_cache          = dict()
+root_table_cache_rows     = 0
+max_root_table_cache_rows = 2000000
+#
+# root_data_cache
+# is the same as root_table_cache but only contains data tables.
+root_data_cache     = dict()
+max_root_data_cache = 2
+#
+# get_root_table
+def get_root_table(root_connection, root_database, table_name) :
+    global root_table_cache_rows
+    #
+    # key, stat_key
+    key      = ( os.path.realpath(root_database), table_name )
+    stat     = os.stat(root_database)
+    stat_key = ( stat.st_mtime_ns, stat.st_size )
+    #
+    # cache
+    if table_name == 'data' :
+        cache = root_data_cache
+    else :
+        cache = root_table_cache
+    #
+    # table
+    entry = cache.pop(key, None)
+    if entry != None :
+        if table_name != 'data' :
+            root_table_cache_rows -= len( entry[1] )
+        if entry[0] != stat_key :
+            entry = None
+    if entry == None :
+        table = dismod_at.get_table_dict(root_connection, table_name)
+        entry = ( stat_key, table )
+    table = entry[1]
+    #
+    # root_data_cache
+    if table_name == 'data' :
+        root_data_cache[key] = entry
+        while len(root_data_cache) > max_root_data_cache :
+            oldest = next( iter(root_data_cache) )
+            del root_data_cache[oldest]
+    #
+    # root_table_cache
+    elif len(table) <= max_root_table_cache_rows :
+        root_table_cache[key]  = entry
+        root_table_cache_rows += len(table)
+        while root_table_cache_rows > max_root_table_cache_rows :
+            oldest = next( iter(root_table_cache) )
+            root_table_cache_rows -= len( root_table_cache[oldest][1] )
+            del root_table_cache[oldest]
+    #
+    return table
+#
 class fit_or_root_class :
     #
     # __init__
@@ -82,6 +158,7 @@ class fit_or_root_class :
         self.root_connection = dismod_at.create_connection(
             root_database, new = False, readonly = True
         )
+        self.root_database = root_database
         self.open = True
     #
     # get_table
@@ -90,7 +167,9 @@ class fit_or_root_class :
         assert self.open
         #
         if table_name in at_cascade.constant_table_list :
-            table = dismod_at.get_table_dict(self.root_connection, table_name)
+            table = get_root_table(
+                self.root_connection, self.root_database, table_name
+            )
         else :
             table = dismod_at.get_table_dict(self.fit_connection, table_name)
         return table
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 '''
 {xrst_begin fit_parallel}
@@ -22,6 +22,10 @@ job_table
 *********
 This is a :ref:`create_job_table@job_table` containing all the jobs
 necessary to fit the :ref:`glossary@fit_goal_set` .
+It may also be the :ref:`job_table_class-name` representation
+of the job table.
+If it is a ``list`` , it is converted to a job_table_class
+before it is passed to the processes that run the fits.
 
 start_job_id
 ************
@@ -125,7 +129,7 @@ def fit_parallel(
     shared_unique     ,
 ) :
     #
-    assert type(job_table)         == list
+    assert type(job_table) in [ list, at_cascade.job_table_class ]
     assert type(start_job_id)      == int
     assert type(all_node_database) == str
     assert type(node_table)        == list
@@ -135,6 +139,11 @@ def fit_parallel(
     assert type(fit_type_list)     == list
     assert type(shared_unique)     == str
     # END_DEF
+    #
+    # job_table
+    # array representation that is passed to the processes
+    if type(job_table) == list :
+        job_table = at_cascade.job_table_class(job_table, node_table)
     # ----------------------------------------------------------------------
     # job_status_name
     job_status_name = [
@@ -188,6 +197,27 @@ def fit_parallel(
         tmp.shape, dtype = tmp.dtype, buffer = shm_job_status.buf
     )
     # -------------------------------------------------------------------------
+    # shared_data_name, shared_data
+    # the root database data table is shared by all the fit processes
+    if max_number_cpu == 1 :
+        shared_data_name = None
+        shared_data      = None
+    else :
+        connection       = dismod_at.create_connection(
+            all_node_database, new = False, readonly = True
+        )
+        option_all_table = dismod_at.get_table_dict(connection, 'option_all')
+        connection.close()
+        root_database    = None
+        for row in option_all_table :
+            if row['option_name'] == 'root_database' :
+                root_database = row['option_value']
+        assert root_database != None
+        shared_data_name = shared_memory_prefix_plus + '_data'
+        shared_data      = at_cascade.shared_data_class(
+            shared_data_name, root_database
+        )
+    # -------------------------------------------------------------------------
     #
     # shm_list
     shm_list = [
@@ -199,11 +229,9 @@ def fit_parallel(
     shared_number_cpu_inuse[0] = 1
     #
     # shared_job_status
-    for job_id in range( len(job_table) ) :
-        if job_table[job_id]['prior_only'] :
-            shared_job_status[job_id] = job_status_skip
-        else :
-            shared_job_status[job_id]  = job_status_wait
+    shared_job_status[:] = numpy.where(
+        job_table.prior_only, job_status_skip, job_status_wait
+    )
     if skip_start_job :
         shared_job_status[start_job_id] = job_status_done
         #
@@ -244,6 +272,7 @@ def fit_parallel(
         shared_number_cpu_inuse_name,
         shared_lock,
         shared_event,
+        shared_data_name,
     )
     #
     # shared_number_cpu_inuse
@@ -263,5 +292,8 @@ def fit_parallel(
     for shm in shm_list :
         shm.close()
         shm.unlink()
+    if shared_data != None :
+        shared_data.close()
+        shared_data.unlink()
     #
     return
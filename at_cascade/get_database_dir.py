@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin get_database_dir}
@@ -68,6 +68,8 @@ In other words, the fit database has the following path:
 
     *result_dir*\ ``/`` *database_dir*\ ``/dismod.db``
 
+The :ref:`create_job_table@job_table@database_dir` field in the job table
+contains this value for every job in the job table.
 
 {xrst_end get_database_dir}
 '''
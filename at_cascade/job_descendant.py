@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 '''
 {xrst_begin job_descendant}
@@ -18,6 +18,7 @@ Prototype
 job_table
 *********
 Is the :ref:`create_job_table@job_table` for this analysis.
+It may be a ``list`` of ``dict`` or a :ref:`job_table_class-name` .
 
 ancestor_id
 ***********
@@ -60,10 +61,11 @@ ancestor and descendant nodes.
 {xrst_end job_descendant}
 '''
 # -----------------------------------------------------------------------------
+import at_cascade
 # BEGIN_DEF
 # at_cascade.job_descendant
 def job_descendant(job_table, ancestor_id, descendant_id) :
-    assert type(job_table)   == list
+    assert type(job_table) in [ list, at_cascade.job_table_class ]
     assert type(ancestor_id)   == int
     assert type(descendant_id) == int
     # END_DEF
@@ -71,11 +73,20 @@ def job_descendant(job_table, ancestor_id, descendant_id) :
     # generation
     generation = 0
     job_id     = descendant_id
-    while job_id != None and job_id != ancestor_id :
-        generation += 1
-        job_id      = job_table[job_id]['parent_job_id']
-    if job_id == None :
-        generation = None
+    if type(job_table) == at_cascade.job_table_class :
+        # use the parent_job_id column directly (-1 corresponds to None)
+        parent_job_id = job_table.parent_job_id
+        while job_id >= 0 and job_id != ancestor_id :
+            generation += 1
+            job_id      = int( parent_job_id[job_id] )
+        if job_id < 0 :
+            generation = None
+    else :
+        while job_id != None and job_id != ancestor_id :
+            generation += 1
+            job_id      = job_table[job_id]['parent_job_id']
+        if job_id == None :
+            generation = None
     #
     # BEGIN_RETURN
     assert generation == None or type(generation) == int
@@ -0,0 +1,195 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin job_table_class}
+{xrst_spell
+  numpy
+}
+
+Array Representation of a Job Table
+###################################
+
+job_table_class
+***************
+{xrst_code py}
+job_table = job_table_class(job_list, node_table)
+{xrst_code}
+
+job_list
+========
+This is a :ref:`create_job_table@job_table` as a ``list`` of ``dict`` .
+
+node_table
+==========
+is a ``list`` of ``dict`` containing the node table for this cascade.
+
+Columns
+*******
+The following attributes are numpy arrays with length equal to
+the number of jobs and index equal to the
+:ref:`create_job_table@job_table@job_id` :
+
+.. csv-table::
+    :header-rows: 1
+
+    Attribute,   Type, Meaning
+    prior_only,  bool, :ref:`create_job_table@job_table@prior_only`
+    fit_node_id, int,  :ref:`create_job_table@job_table@fit_node_id`
+    split_reference_id, int, :ref:`create_job_table@job_table@split_reference_id`
+    parent_job_id, int,  :ref:`create_job_table@job_table@parent_job_id`
+    start_child_job_id, int, :ref:`create_job_table@job_table@start_child_job_id`
+    end_child_job_id, int, :ref:`create_job_table@job_table@end_child_job_id`
+
+The value -1 is used where the corresponding dict value is ``None``
+or where the key does not appear in the dict.
+The start and end child job id do not appear when *prior_only* is true.
+
+Job Names
+*********
+The job names are not stored as separate strings.
+The attribute ``node_name_list`` is the list of node names
+indexed by node_id and ``split_name_list`` is the list of split reference
+names indexed by split_reference_id; i.e., each name is stored once.
+
+database_dir
+************
+The attribute ``database_dir`` is the list of
+:ref:`create_job_table@job_table@database_dir` values indexed by job_id.
+
+Row View
+********
+{xrst_code py}
+row = job_table[job_id]
+{xrst_code}
+Sets *row* to a ``dict`` that is equal to *job_list* [ *job_id* ] .
+In addition, ``len(job_table)`` is the number of jobs and
+iterating over *job_table* returns the rows in job_id order.
+Hence *job_table* can be used in place of *job_list*
+in routines that do not modify the job table.
+
+Sharing Between Processes
+*************************
+The columns are a few contiguous numpy arrays instead of one
+dict per job.
+When a process is started using fork, the child process shares these
+arrays with the parent without copying them
+(Python reference counting does not write to the memory for the array data).
+When a process is started using spawn, only the arrays are pickled.
+
+{xrst_end job_table_class}
+'''
+import numpy
+#
+class job_table_class :
+    #
+    # __init__
+    def __init__(self, job_list, node_table) :
+        assert type(job_list) == list
+        assert type( job_list[0] ) == dict
+        assert type(node_table) == list
+        #
+        # node_name_list
+        self.node_name_list = [ row['node_name'] for row in node_table ]
+        #
+        # n_job
+        n_job = len( job_list )
+        #
+        # columns
+        self.prior_only         = numpy.empty(n_job, dtype = bool)
+        self.fit_node_id        = numpy.empty(n_job, dtype = numpy.int32)
+        self.split_reference_id = numpy.empty(n_job, dtype = numpy.int32)
+        self.parent_job_id      = numpy.empty(n_job, dtype = numpy.int32)
+        self.start_child_job_id = numpy.empty(n_job, dtype = numpy.int32)
+        self.end_child_job_id   = numpy.empty(n_job, dtype = numpy.int32)
+        #
+        # split_name_list
+        self.split_name_list = list()
+        #
+        # database_dir
+        self.database_dir = [ row['database_dir'] for row in job_list ]
+        #
+        # job_id, row
+        for (job_id, row) in enumerate(job_list) :
+            #
+            # prior_only, fit_node_id
+            self.prior_only[job_id]  = row['prior_only']
+            self.fit_node_id[job_id] = row['fit_node_id']
+            #
+            # split_reference_id, split_name_list
+            split_reference_id = row['split_reference_id']
+            node_name          = self.node_name_list[ row['fit_node_id'] ]
+            if split_reference_id == None :
+                self.split_reference_id[job_id] = -1
+                assert row['job_name'] == node_name
+            else :
+                self.split_reference_id[job_id] = split_reference_id
+                while len(self.split_name_list) <= split_reference_id :
+                    self.split_name_list.append(None)
+                split_name = row['job_name'][ len(node_name) + 1 : ]
+                if self.split_name_list[split_reference_id] == None :
+                    self.split_name_list[split_reference_id] = split_name
+                assert self.split_name_list[split_reference_id] == split_name
+                assert row['job_name'] == f'{node_name}.{split_name}'
+            #
+            # parent_job_id
+            if row['parent_job_id'] == None :
+                self.parent_job_id[job_id] = -1
+            else :
+                self.parent_job_id[job_id] = row['parent_job_id']
+            #
+            # start_child_job_id, end_child_job_id
+            if 'start_child_job_id' in row :
+                self.start_child_job_id[job_id] = row['start_child_job_id']
+                self.end_child_job_id[job_id]   = row['end_child_job_id']
+            else :
+                self.start_child_job_id[job_id] = -1
+                self.end_child_job_id[job_id]   = -1
+    #
+    # __len__
+    def __len__(self) :
+        return len( self.fit_node_id )
+    #
+    # job_name
+    def job_name(self, job_id) :
+        node_name          = self.node_name_list[ self.fit_node_id[job_id] ]
+        split_reference_id = int( self.split_reference_id[job_id] )
+        if split_reference_id < 0 :
+            return node_name
+        split_name = self.split_name_list[split_reference_id]
+        return f'{node_name}.{split_name}'
+    #
+    # __getitem__
+    def __getitem__(self, job_id) :
+        if job_id < 0 :
+            job_id += len(self)
+        if job_id < 0 or len(self) <= job_id :
+            raise IndexError('job_table_class: job_id out of range')
+        #
+        # split_reference_id, parent_job_id
+        split_reference_id = int( self.split_reference_id[job_id] )
+        if split_reference_id < 0 :
+            split_reference_id = None
+        parent_job_id = int( self.parent_job_id[job_id] )
+        if parent_job_id < 0 :
+            parent_job_id = None
+        #
+        # row
+        row = {
+            'job_name'           : self.job_name(job_id),
+            'prior_only'         : bool( self.prior_only[job_id] ),
+            'fit_node_id'        : int( self.fit_node_id[job_id] ),
+            'split_reference_id' : split_reference_id,
+            'parent_job_id'      : parent_job_id,
+            'database_dir'       : self.database_dir[job_id],
+        }
+        if self.start_child_job_id[job_id] >= 0 :
+            row['start_child_job_id'] = int( self.start_child_job_id[job_id] )
+            row['end_child_job_id']   = int( self.end_child_job_id[job_id] )
+        return row
+    #
+    # __iter__
+    def __iter__(self) :
+        for job_id in range( len(self) ) :
+            yield self[job_id]
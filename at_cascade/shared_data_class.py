@@ -0,0 +1,271 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin shared_data_class}
+{xrst_spell
+  numpy
+  unlink
+}
+
+Root Data Table in Shared Memory
+################################
+
+shared_data_class
+*****************
+{xrst_code py}
+shared_data = shared_data_class(shared_name, root_database)
+{xrst_code}
+
+shared_name
+===========
+This ``str`` is the name of the shared memory block that holds the
+data table; see :ref:`map_shared-name` .
+
+root_database
+=============
+If this ``str`` is present, it is the :ref:`glossary@root_database` and
+the data table in the root database is copied to a new shared memory block.
+In this case, the shared memory block must not already exist and
+the process that created *shared_data* must call ``unlink`` when
+the other processes no longer need it.
+If *root_database* is not present (or is ``None`` ),
+*shared_data* is attached to a shared memory block that
+was created by another process.
+No data is copied when a shared memory block is attached to.
+
+attached
+********
+The class variable ``shared_data_class.attached`` is a ``dict``.
+The key ``os.path.realpath`` ( *root_database* ) maps to the
+shared_data_class object that is attached to the data table for
+*root_database* in this process.
+This is how :ref:`data_include-name` finds the shared data table.
+
+n_row
+*****
+The attribute *shared_data* . ``n_row`` is the number of rows in the
+data table.
+
+column
+******
+{xrst_code py}
+value = shared_data.column(col_name)
+{xrst_code}
+Sets *value* to a read-only numpy array, with length *n_row* , containing
+the values in the column *col_name* of the data table.
+If the column is ``integer`` or ``real`` in the data table,
+*value* has type ``float`` and null values are ``nan`` .
+If the column is ``text`` , *value* has a numpy unicode type and
+null values are the empty string.
+The columns, and their types, are determined by the data table schema;
+e.g., if the data table is empty, *value* has length zero.
+
+row
+***
+{xrst_code py}
+data_row = shared_data.row(data_id)
+{xrst_code}
+Sets *data_row* to a ``dict`` that is equal to the row with index *data_id*
+in the ``list`` of ``dict`` representation of the data table; i.e.,
+the value returned by ``dismod_at.get_table_dict`` .
+This includes the distinction between a null and empty text value.
+
+close
+*****
+{xrst_code py}
+shared_data.close()
+{xrst_code}
+This removes *shared_data* from ``attached`` and closes this processes
+access to the shared memory block.
+
+unlink
+******
+{xrst_code py}
+shared_data.unlink()
+{xrst_code}
+This must be called (after ``close`` ) by the process that created
+the shared memory block.
+
+{xrst_end shared_data_class}
+'''
+import os
+import math
+import pickle
+import multiprocessing.shared_memory
+import numpy
+import dismod_at
+import at_cascade
+#
+# header_size
+# number of bytes used to store the length of the pickled header
+header_size = 8
+#
+class shared_data_class :
+    #
+    # attached
+    attached = dict()
+    #
+    # __init__
+    def __init__(self, shared_name, root_database = None) :
+        assert type(shared_name) == str
+        assert root_database == None or type(root_database) == str
+        #
+        # mapped
+        mapped = at_cascade.map_shared(shared_name)
+        #
+        if root_database == None :
+            #
+            # shm, header
+            self.shm = multiprocessing.shared_memory.SharedMemory(
+                create = False, name = mapped
+            )
+            n_byte = int.from_bytes( self.shm.buf[0 : header_size], 'little' )
+            header = pickle.loads(
+                bytes( self.shm.buf[header_size : header_size + n_byte] )
+            )
+        else :
+            #
+            # data_table, col_name, col_type
+            # The columns and their types come from the table schema
+            # so that they do not depend on the values in the table.
+            connection = dismod_at.create_connection(
+                root_database, new = False, readonly = True
+            )
+            data_table = dismod_at.get_table_dict(connection, 'data')
+            (col_name, col_type) = dismod_at.get_name_type(connection, 'data')
+            connection.close()
+            assert col_name[0] == 'data_id'
+            col_name = col_name[1 :]
+            col_type = col_type[1 :]
+            #
+            # value_dict, type_dict
+            # For a text column, value_dict[col_name + '.null'] is true
+            # where the value in the table is null.
+            value_dict = dict()
+            type_dict  = dict()
+            for (name, type_name) in zip(col_name, col_type) :
+                type_name = type_name.lower()
+                col_list  = [ row[name] for row in data_table ]
+                if type_name == 'text' :
+                    null_list = [ value == None for value in col_list ]
+                    for (i, value) in enumerate(col_list) :
+                        if value == None :
+                            col_list[i] = ''
+                    value_dict[name] = numpy.array(col_list, dtype = str)
+                    value_dict[name + '.null'] = numpy.array(
+                        null_list, dtype = bool
+                    )
+                    type_dict[name + '.null'] = 'null'
+                else :
+                    assert type_name in [ 'integer', 'real' ]
+                    for (i, value) in enumerate(col_list) :
+                        if value == None :
+                            col_list[i] = math.nan
+                    value_dict[name] = numpy.array(col_list, dtype = float)
+                type_dict[name] = type_name
+            #
+            # column_list
+            # the data for each column starts on an 8 byte boundary
+            column_list = list()
+            offset      = 0
+            for name in value_dict :
+                value  = value_dict[name]
+                column_list.append(
+                    (name, type_dict[name], value.dtype.str, offset)
+                )
+                offset += 8 * ( (value.nbytes + 7) // 8 )
+            data_size = offset
+            #
+            # header
+            header = {
+                'root_database' : os.path.realpath(root_database) ,
+                'n_row'         : len(data_table) ,
+                'column_list'   : column_list ,
+            }
+            header_bytes = pickle.dumps(header)
+            #
+            # shm
+            data_start = 8 * ( (header_size + len(header_bytes) + 7) // 8 )
+            self.shm   = multiprocessing.shared_memory.SharedMemory(
+                create = True, size = max(1, data_start + data_size),
+                name   = mapped
+            )
+            n_byte = len(header_bytes)
+            self.shm.buf[0 : header_size] = n_byte.to_bytes(
+                header_size, 'little'
+            )
+            self.shm.buf[header_size : header_size + n_byte] = header_bytes
+            for (name, type_name, dtype, offset) in column_list :
+                value  = value_dict[name]
+                start  = data_start + offset
+                target = numpy.ndarray(
+                    value.shape, dtype = value.dtype,
+                    buffer = self.shm.buf, offset = start
+                )
+                target[:] = value
+                del target
+        #
+        # n_row, root_database, shared_name
+        self.shared_name   = shared_name
+        self.n_row         = header['n_row']
+        self.root_database = header['root_database']
+        #
+        # column_dict, col_type, null_dict
+        # null_dict[col_name] is the null mask for a text column.
+        n_byte       = int.from_bytes( self.shm.buf[0 : header_size], 'little' )
+        data_start   = 8 * ( (header_size + n_byte + 7) // 8 )
+        self.column_dict = dict()
+        self.col_type    = dict()
+        self.null_dict   = dict()
+        for (name, type_name, dtype, offset) in header['column_list'] :
+            value = numpy.ndarray(
+                (self.n_row,) , dtype = numpy.dtype(dtype) ,
+                buffer = self.shm.buf, offset = data_start + offset
+            )
+            value.flags.writeable = False
+            if type_name == 'null' :
+                self.null_dict[ name[: -len('.null')] ] = value
+            else :
+                self.column_dict[name] = value
+                self.col_type[name]    = type_name
+        #
+        # attached
+        shared_data_class.attached[self.root_database] = self
+    #
+    # column
+    def column(self, col_name) :
+        return self.column_dict[col_name]
+    #
+    # row
+    def row(self, data_id) :
+        data_row = dict()
+        for col_name in self.column_dict :
+            value     = self.column_dict[col_name][data_id]
+            type_name = self.col_type[col_name]
+            if type_name == 'text' :
+                if self.null_dict[col_name][data_id] :
+                    value = None
+                else :
+                    value = str(value)
+            elif math.isnan(value) :
+                value = None
+            elif type_name == 'integer' :
+                value = int(value)
+            else :
+                value = float(value)
+            data_row[col_name] = value
+        return data_row
+    #
+    # close
+    def close(self) :
+        if shared_data_class.attached.get(self.root_database) is self :
+            del shared_data_class.attached[self.root_database]
+        self.column_dict = dict()
+        self.null_dict   = dict()
+        self.shm.close()
+    #
+    # unlink
+    def unlink(self) :
+        self.shm.unlink()
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 r'''
 {xrst_begin table_name2id}
@@ -37,10 +37,57 @@ row_id
 ******
 This is the index of the row in the table where
 *row_name* occurs. An assert will occur if there is no such row.
+If *row_name* occurs more than once, the last such row is used.
+
+Name Index Cache
+****************
+The first time a table is used, a ``dict`` that maps each
+*row_name* to its *row_id* is created, so subsequent calls with the
+same table do not search the table.
+The cache is keyed by the identity of the *table* ``list`` object
+and contains at most a fixed number of tables
+(the least recently used table is removed when this number is exceeded).
+The index for a table is recomputed when its length changes,
+when *row_name* is not in the index,
+or when the *tbl_name*\ ``_name`` value in the cached row is no longer
+*row_name* .
+A table that is replaced; e.g., read again from a database
+after ``dismod_at.replace_table`` , is a different ``list`` object
+and so has its own index.
+Modifying a table in place, without changing its length,
+so that a later row takes over the name of a cached row is not supported;
+i.e., the cached (earlier) row would be returned.
+Use a new ``list`` for a table that is modified in this way.
 
 {xrst_end table_name2id}
 '''
 # -----------------------------------------------------------------------------
+#
+# table_index_cache
+# maps ( id(table), tbl_name ) to [ table, len(table), index ] where
+# index[row_name] is the corresponding row_id. The table is stored in the
+# cache so that its id is not reused while it is in the cache.
+table_index_cache     = dict()
+max_table_index_cache = 64
+#
+# get_table_index
+def get_table_index(table, tbl_name, rebuild) :
+    key   = ( id(table), tbl_name )
+    entry = table_index_cache.pop(key, None)
+    if entry == None or rebuild or entry[1] != len(table) :
+        col_name = tbl_name + '_name'
+        index    = dict()
+        for (row_id, row) in enumerate(table) :
+            index[ row[col_name] ] = row_id
+        entry = [ table, len(table), index ]
+    #
+    # table_index_cache
+    # most recently used entry is at the end
+    table_index_cache[key] = entry
+    while len(table_index_cache) > max_table_index_cache :
+        del table_index_cache[ next( iter(table_index_cache) ) ]
+    return entry[2]
+# -----------------------------------------------------------------------------
 # BEGIN_DEF
 # at_cascade.table_name2id
 def table_name2id(
@@ -50,10 +97,13 @@ def table_name2id(
     assert type(tbl_name) == str
     # END_DEF
     col_name = tbl_name + '_name'
-    row_id   = None
-    for (index, row) in enumerate(table) :
-        if row[col_name] == row_name :
-            row_id = index
+    #
+    # row_id
+    index  = get_table_index(table, tbl_name, rebuild = False)
+    row_id = index.get(row_name, None)
+    if row_id == None or table[row_id][col_name] != row_name :
+        index  = get_table_index(table, tbl_name, rebuild = True)
+        row_id = index.get(row_name, None)
     if row_id == None :
         msg  = f'table_name2id: "{row_name}" '
         msg += f'is not presnet in column "{col_name}" of "{tbl_name}" table.'
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 import os
 import sys
@@ -124,6 +124,23 @@ def test_grid(n_age, n_time) :
             chi   = spline_dict['chi'](age, time)
             check = chi_fun(age, time)
             assert math.isclose(chi, check)
+    #
+    # batch
+    age_batch  = [ age  for age in age_test for time in time_test ]
+    time_batch = [ time for age in age_test for time in time_test ]
+    z_list     = [ 'iota', 'rho', 'chi' ]
+    for z_name in z_list :
+        z_batch = spline_dict[z_name].batch(age_batch, time_batch)
+        for (i, age) in enumerate(age_batch) :
+            assert z_batch[i] == spline_dict[z_name](age, time_batch[i])
+    #
+    # batch_eval
+    spline_list = [ spline_dict[z_name] for z_name in z_list ]
+    z_batch     = at_cascade.batch_eval(spline_list, age_batch, time_batch)
+    for (k, z_name) in enumerate(z_list) :
+        assert all( z_batch[:, k] == spline_dict[z_name].batch(
+            age_batch, time_batch
+        ) )
 #
 # Without this, the mac will try to execute main on each processor.
 if __name__ == '__main__' :
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 '''
                                  (n0,s1)
@@ -35,6 +35,22 @@ check_job_table = [
 for row in check_job_table :
     row['prior_only'] = False
 #
+check_database_dir = [
+    'n0',
+    'n0/n1',
+    'n0/n2',
+    'n0/n1/female',
+    'n0/n1/male',
+    'n0/n2/n5',
+    'n0/n2/n6',
+    'n0/n1/female/n3',
+    'n0/n1/female/n4',
+    'n0/n1/male/n3',
+    'n0/n1/male/n4',
+]
+for (job_id, database_dir) in enumerate(check_database_dir) :
+    check_job_table[job_id]['database_dir'] = database_dir
+#
 for job_id in range(5) :
     check_job_table[job_id]['start_child_job_id'] = 2 * job_id + 1
     check_job_table[job_id]['end_child_job_id']   = 2 * job_id + 3
@@ -414,6 +430,14 @@ def main() :
         fit_goal_set              = fit_goal_set,
     )
     assert job_table == check_job_table
+    #
+    # job_array
+    job_array = at_cascade.job_table_class(job_table, node_table)
+    assert len(job_array) == len(job_table)
+    assert list(job_array) == job_table
+    for job_id in range( len(job_table) ) :
+        assert at_cascade.job_descendant(job_array, 0, job_id) == \
+            at_cascade.job_descendant(job_table, 0, job_id)
 #
 if __name__ == '__main__' :
     main()
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 # This case was crashing because n3 was included in the job table.
 # The error messages ended with
@@ -15,6 +15,7 @@
 #
 # Step 1: only fit n0 (create priors for n1, n2).
 # Step 2: only fit n2
+# Step 3: check the at_cascade.check_log cache file check_log.json
 #
 # ----------------------------------------------------------------------------
 import os
@@ -23,7 +24,9 @@ import time
 import math
 import shutil
 import csv
+import json
 import multiprocessing
+import dismod_at
 #
 # import at_cascade with a preference current directory version
 current_directory = os.getcwd()
@@ -158,6 +161,97 @@ def main() :
         assert row['integrand_name'] == 'Sincidence'
         assert row['node_name'] == 'n2'
         assert row['sex'] == 'female'
+    #
+    # all_node_database, root_database
+    all_node_database = f'{fit_dir}/all_node.db'
+    root_database     = f'{fit_dir}/root.db'
+    #
+    # node_table
+    connection = dismod_at.create_connection(
+        root_database, new = False, readonly = True
+    )
+    node_table = dismod_at.get_table_dict(connection, 'node')
+    connection.close()
+    #
+    # job_table
+    root_node_id            = at_cascade.table_name2id(node_table, 'node', 'n0')
+    root_split_reference_id = at_cascade.table_name2id(
+        at_cascade.csv.split_reference_table, 'split_reference', 'both'
+    )
+    job_table = at_cascade.create_job_table(
+        all_node_database        = all_node_database       ,
+        node_table               = node_table              ,
+        start_node_id            = root_node_id            ,
+        start_split_reference_id = root_split_reference_id ,
+        fit_goal_set             = { 'n2', 'n3' }          ,
+    )
+    #
+    # fit_database
+    # the n2.female fit database
+    fit_database = None
+    for row in job_table :
+        if row['job_name'] == 'n2.female' :
+            fit_database = f'{fit_dir}/{row["database_dir"]}/dismod.db'
+    assert os.path.exists(fit_database)
+    #
+    # cache_file
+    # csv.predict calls check_log, so remove the cache it created
+    cache_file = f'{fit_dir}/check_log.json'
+    if os.path.exists(cache_file) :
+        os.remove(cache_file)
+    #
+    # check_log
+    def check_log() :
+        return at_cascade.check_log(
+            message_type      = 'at_cascade'      ,
+            all_node_database = all_node_database ,
+            root_database     = root_database     ,
+            job_table         = job_table         ,
+        )
+    #
+    # message_dict, cache
+    message_dict = check_log()
+    assert os.path.exists(cache_file)
+    with open(cache_file, 'r') as file_obj :
+        cache = json.load(file_obj)
+    assert fit_database in cache
+    #
+    # cache hit
+    # none of the fit databases changed, so the cache file is not rewritten
+    os.utime(cache_file, ns = (0, 0) )
+    assert check_log() == message_dict
+    assert os.stat(cache_file).st_mtime_ns == 0
+    #
+    # add_log_entry
+    # change the n2.female fit database
+    connection = dismod_at.create_connection(
+        fit_database, new = False, readonly = False
+    )
+    message = 'check_log: new message'
+    at_cascade.add_log_entry(connection, message)
+    connection.close()
+    #
+    # cache miss
+    # only the entry for the n2.female database changes
+    new_message_dict = check_log()
+    assert os.stat(cache_file).st_mtime_ns != 0
+    assert new_message_dict['n2.female'][-1] == message
+    with open(cache_file, 'r') as file_obj :
+        new_cache = json.load(file_obj)
+    assert set( new_cache.keys() ) == set( cache.keys() )
+    for key in cache :
+        if key == fit_database :
+            assert new_cache[key] != cache[key]
+        else :
+            assert new_cache[key] == cache[key]
+    for job_name in message_dict :
+        if job_name != 'n2.female' :
+            assert new_message_dict[job_name] == message_dict[job_name]
+    #
+    # no cache file
+    # same result as when the cache file is used
+    os.remove(cache_file)
+    assert check_log() == new_message_dict
 
 
 if __name__ == '__main__' :
@@ -0,0 +1,110 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
+# ---------------------------------------------------------------------------
+import os
+import sys
+import random
+import pickle
+import numpy
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+#
+def main() :
+    #
+    # work_dir
+    work_dir = 'build/test'
+    at_cascade.empty_directory(work_dir)
+    os.chdir(work_dir)
+    #
+    # covariate_table
+    # rows are in random order and haqi is the same for female and male
+    random.seed(1234)
+    covariate_table = list()
+    for node_name in [ 'n0', 'n1', 'n2' ] :
+        for sex in [ 'female', 'male' ] :
+            for age in [ 0.0, 20.0, 100.0 ] :
+                for time in [ 1980.0, 2000.0, 2020.0 ] :
+                    row = {
+                        'node_name' : node_name ,
+                        'sex'       : sex ,
+                        'age'       : age ,
+                        'time'      : time ,
+                        'omega'     : random.uniform(0.01, 0.02) ,
+                        'haqi'      : time / 2000.0 ,
+                        'income'    : random.uniform(1.0, 2.0) ,
+                    }
+                    covariate_table.append( row )
+    random.shuffle( covariate_table )
+    at_cascade.csv.write_table('covariate.csv', covariate_table)
+    covariate_table = at_cascade.csv.read_table('covariate.csv')
+    for row in covariate_table :
+        for key in row :
+            if key not in { 'node_name', 'sex' } :
+                row[key] = float( row[key] )
+    #
+    # cov_array
+    cov_array = at_cascade.csv.covariate_array_class('covariate.csv')
+    assert cov_array.node_list     == [ 'n0', 'n1', 'n2' ]
+    assert cov_array.cov_name_list == [ 'omega', 'haqi', 'income' ]
+    #
+    # covariate_table
+    covariate_table = at_cascade.csv.covariate_both(covariate_table)
+    #
+    # value
+    for row in covariate_table :
+        age_index  = cov_array.age_grid.index( row['age'] )
+        time_index = cov_array.time_grid.index( row['time'] )
+        for cov_name in cov_array.cov_name_list :
+            z_grid = cov_array.get_value(row['node_name'], row['sex'], cov_name)
+            assert z_grid[age_index, time_index] == row[cov_name]
+    #
+    # average
+    # the values are summed in the same order, so they are equal
+    covariate_average = cov_array.average()
+    for node_name in cov_array.node_list :
+        for sex in [ 'female', 'male', 'both' ] :
+            check = at_cascade.csv.covariate_avg(
+                covariate_table, node_name, sex
+            )
+            assert covariate_average[ (node_name, sex) ] == check
+    #
+    # same
+    assert cov_array.same() == at_cascade.csv.covariate_same(covariate_table)
+    #
+    # spline_cov
+    node_set = set( cov_array.node_list )
+    age_grid, time_grid, spline_cov = at_cascade.csv.covariate_spline(
+        covariate_table, node_set
+    )
+    assert age_grid  == cov_array.age_grid
+    assert time_grid == cov_array.time_grid
+    check_spline = cov_array.spline_cov()
+    for node_name in node_set :
+        for sex in cov_array.sex_list :
+            for cov_name in cov_array.cov_name_list :
+                check = check_spline[node_name][sex][cov_name](50.0, 1990.0)
+                value = spline_cov[node_name][sex][cov_name](50.0, 1990.0)
+                assert abs( check - value ) <= 1e-12 * abs(value)
+    #
+    # share
+    # pickle of a shared cov_array attaches to the same shared memory
+    value = cov_array.value.copy()
+    cov_array.share('covariate_array_test')
+    copy_array = pickle.loads( pickle.dumps(cov_array) )
+    assert copy_array.shared_name == 'covariate_array_test'
+    assert numpy.array_equal( copy_array.value, value )
+    assert numpy.array_equal( copy_array.grid_order, cov_array.grid_order )
+    del copy_array
+    cov_array.unlink()
+    assert numpy.array_equal( cov_array.value, value )
+    #
+    return
+#
+if __name__ == '__main__' :
+    main()
+    print('covariate_array: OK')
@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ----------------------------------------------------------------------------
+# Test the csv.predict diagnose_max_depth option.
+# The db2csv diagnostics are created (using a pool of processes)
+# for the start job only, and are not recreated when they are up to date.
+#
+#  root_node :                n0
+#                            /  \
+#  fit_goal_set:            n1   n2
+#
+# ----------------------------------------------------------------------------
+import os
+import sys
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+#
+# number_sample
+number_sample = 4
+#
+# csv_file
+csv_file = dict()
+#
+# node.csv
+csv_file['node.csv'] = \
+'''node_name,parent_name
+n0,
+n1,n0
+n2,n0
+'''
+#
+# option_fit.csv
+csv_file['option_fit.csv']  = \
+'''name,value
+sample_method,asymptotic
+'''
+csv_file['option_fit.csv'] += f'number_sample,{number_sample}\n'
+#
+# option_predict.csv
+csv_file['option_predict.csv']  = \
+'''name,value
+db2csv,true
+diagnose_max_depth,0
+max_number_cpu,2
+'''
+#
+# covariate.csv
+csv_file['covariate.csv'] = 'node_name,sex,age,time,omega\n'
+for node_name in [ 'n0', 'n1', 'n2' ] :
+    for sex in [ 'female', 'male' ] :
+        csv_file['covariate.csv'] += f'{node_name},{sex},50,2000,0.02\n'
+#
+# fit_goal.csv
+csv_file['fit_goal.csv'] = \
+'''node_name
+n1
+n2
+'''
+#
+# predict_integrand.csv
+csv_file['predict_integrand.csv'] = \
+'''integrand_name
+Sincidence
+'''
+#
+# prior.csv
+csv_file['prior.csv'] = \
+'''name,lower,upper,mean,std,density
+uniform_eps_1,1e-6,1.0,0.5,1.0,uniform
+gauss_01,,,0.0,1.0,gaussian
+'''
+#
+# parent_rate.csv
+csv_file['parent_rate.csv'] = \
+'''rate_name,age,time,value_prior,dage_prior,dtime_prior,const_value
+iota,0.0,0.0,uniform_eps_1,,,
+'''
+#
+# child_rate.csv
+csv_file['child_rate.csv'] = \
+'''rate_name,value_prior
+iota,gauss_01
+'''
+#
+# mulcov.csv
+csv_file['mulcov.csv']  = 'covariate,type,effected,value_prior,const_value\n'
+#
+# data_in.csv
+header    = 'data_id, integrand_name, node_name, sex, age_lower, age_upper, '
+header   += 'time_lower, time_upper, meas_value, meas_std, hold_out, '
+header   += 'density_name, eta, nu'
+csv_file['data_in.csv'] = header + \
+'''
+0, Sincidence, n1, female, 0,  10, 1990, 2000, 0.01,  1e-4, 0, gaussian, ,
+1, Sincidence, n1, male,   0,  10, 1990, 2000, 0.01,  1e-4, 0, gaussian, ,
+2, Sincidence, n2, female, 20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+3, Sincidence, n2, male,   20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+'''
+csv_file['data_in.csv'] = csv_file['data_in.csv'].replace(' ', '')
+#
+# main
+def main() :
+    #
+    # fit_dir
+    fit_dir = 'build/test/csv'
+    at_cascade.empty_directory(fit_dir)
+    #
+    # write csv files
+    for name in csv_file :
+        file_name = f'{fit_dir}/{name}'
+        file_ptr  = open(file_name, 'w')
+        file_ptr.write( csv_file[name] )
+        file_ptr.close()
+    #
+    # csv.fit, csv.predict
+    at_cascade.csv.fit(fit_dir)
+    at_cascade.csv.predict(fit_dir)
+    #
+    # variable_list
+    # the variable.csv files created by db2csv
+    variable_list = list()
+    for (directory, dir_list, file_list) in os.walk(fit_dir) :
+        if 'variable.csv' in file_list :
+            variable_list.append( f'{directory}/variable.csv' )
+    #
+    # start_variable
+    # the start job is n0.both and its directory is n0
+    start_variable = f'{fit_dir}/n0/variable.csv'
+    assert variable_list == [ start_variable ]
+    #
+    # second predict
+    # the diagnostics are up to date, so variable.csv is not recreated
+    os.utime( start_variable, ns = (0, 0) )
+    at_cascade.csv.predict(fit_dir)
+    assert os.stat( start_variable ).st_mtime_ns == 0
+#
+if __name__ == '__main__' :
+    main()
+    print('diagnose_depth: OK')
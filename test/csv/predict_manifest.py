@@ -0,0 +1,179 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ----------------------------------------------------------------------------
+# Test that csv.predict only recomputes the predictions that changed.
+#
+#  root_node :                n0
+#                            /  \
+#  fit_goal_set:            n1   n2
+#
+# ----------------------------------------------------------------------------
+import os
+import sys
+import dismod_at
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+#
+# number_sample
+number_sample = 4
+#
+# csv_file
+csv_file = dict()
+#
+# node.csv
+csv_file['node.csv'] = \
+'''node_name,parent_name
+n0,
+n1,n0
+n2,n0
+'''
+#
+# option_fit.csv
+csv_file['option_fit.csv']  = \
+'''name,value
+sample_method,asymptotic
+'''
+csv_file['option_fit.csv'] += f'number_sample,{number_sample}\n'
+#
+# option_predict.csv
+csv_file['option_predict.csv']  = 'name,value\n'
+#
+# covariate.csv
+csv_file['covariate.csv'] = 'node_name,sex,age,time,omega\n'
+for node_name in [ 'n0', 'n1', 'n2' ] :
+    for sex in [ 'female', 'male' ] :
+        csv_file['covariate.csv'] += f'{node_name},{sex},50,2000,0.02\n'
+#
+# fit_goal.csv
+csv_file['fit_goal.csv'] = \
+'''node_name
+n1
+n2
+'''
+#
+# predict_integrand.csv
+csv_file['predict_integrand.csv'] = \
+'''integrand_name
+Sincidence
+'''
+#
+# prior.csv
+csv_file['prior.csv'] = \
+'''name,lower,upper,mean,std,density
+uniform_eps_1,1e-6,1.0,0.5,1.0,uniform
+gauss_01,,,0.0,1.0,gaussian
+'''
+#
+# parent_rate.csv
+csv_file['parent_rate.csv'] = \
+'''rate_name,age,time,value_prior,dage_prior,dtime_prior,const_value
+iota,0.0,0.0,uniform_eps_1,,,
+'''
+#
+# child_rate.csv
+csv_file['child_rate.csv'] = \
+'''rate_name,value_prior
+iota,gauss_01
+'''
+#
+# mulcov.csv
+csv_file['mulcov.csv']  = 'covariate,type,effected,value_prior,const_value\n'
+#
+# data_in.csv
+header    = 'data_id, integrand_name, node_name, sex, age_lower, age_upper, '
+header   += 'time_lower, time_upper, meas_value, meas_std, hold_out, '
+header   += 'density_name, eta, nu'
+csv_file['data_in.csv'] = header + \
+'''
+0, Sincidence, n1, female, 0,  10, 1990, 2000, 0.01,  1e-4, 0, gaussian, ,
+1, Sincidence, n1, male,   0,  10, 1990, 2000, 0.01,  1e-4, 0, gaussian, ,
+2, Sincidence, n2, female, 20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+3, Sincidence, n2, male,   20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+'''
+csv_file['data_in.csv'] = csv_file['data_in.csv'].replace(' ', '')
+#
+# reset_manifest
+# Set the modification time for every predict_manifest.json to zero and
+# return the set of directories that contain one.
+def reset_manifest(fit_dir) :
+    manifest_set = set()
+    for (directory, dir_list, file_list) in os.walk(fit_dir) :
+        if 'predict_manifest.json' in file_list :
+            os.utime( f'{directory}/predict_manifest.json', ns = (0, 0) )
+            manifest_set.add( directory )
+    return manifest_set
+#
+# recomputed
+# return the set of directories where the predictions were recomputed
+def recomputed(manifest_set) :
+    result = set()
+    for directory in manifest_set :
+        stat = os.stat( f'{directory}/predict_manifest.json' )
+        if stat.st_mtime_ns != 0 :
+            result.add( directory )
+    return result
+#
+# main
+def main() :
+    #
+    # fit_dir
+    fit_dir = 'build/test/csv'
+    at_cascade.empty_directory(fit_dir)
+    #
+    # write csv files
+    for name in csv_file :
+        file_name = f'{fit_dir}/{name}'
+        file_ptr  = open(file_name, 'w')
+        file_ptr.write( csv_file[name] )
+        file_ptr.close()
+    #
+    # csv.fit, csv.predict
+    at_cascade.csv.fit(fit_dir)
+    at_cascade.csv.predict(fit_dir)
+    #
+    # manifest_set
+    manifest_set = reset_manifest(fit_dir)
+    assert len( manifest_set ) > 2
+    #
+    # nothing changed
+    at_cascade.csv.predict(fit_dir)
+    assert recomputed(manifest_set) == set()
+    #
+    # n2_directory
+    # change the n2.female fit database, so its sha256 changes
+    query        = at_cascade.csv.query_predict_class(fit_dir)
+    fit_database = query.get_fit('n2', 'female')[1]
+    n2_directory = os.path.dirname( fit_database )
+    assert n2_directory in manifest_set
+    connection   = dismod_at.create_connection(
+        fit_database, new = False, readonly = False
+    )
+    at_cascade.add_log_entry(connection, 'predict_manifest: change sha256')
+    connection.close()
+    #
+    # only the n2.female predictions are recomputed
+    reset_manifest(fit_dir)
+    at_cascade.csv.predict(fit_dir)
+    assert recomputed(manifest_set) == { n2_directory }
+    #
+    # n1_directory
+    # remove the fit_posterior.npz file for n1.female
+    fit_database = query.get_fit('n1', 'female')[1]
+    n1_directory = os.path.dirname( fit_database )
+    assert n1_directory in manifest_set
+    os.remove( f'{n1_directory}/fit_posterior.npz' )
+    #
+    # only the n1.female predictions are recomputed
+    reset_manifest(fit_dir)
+    at_cascade.csv.predict(fit_dir)
+    assert recomputed(manifest_set) == { n1_directory }
+    assert os.path.exists( f'{n1_directory}/fit_posterior.npz' )
+#
+if __name__ == '__main__' :
+    main()
+    print('predict_manifest: OK')
@@ -0,0 +1,222 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ----------------------------------------------------------------------------
+# Test csv.query_predict_class using the csv.predict results.
+#
+#  root_node :                n0
+#                            /  \
+#  fit_goal_set:            n1   n2
+#                          /  \
+#  no job:                n3   n4
+#
+# The query for n1.female uses its own fit (posterior predictions).
+# The query for n3.female uses the n1.female fit (prior predictions).
+# ----------------------------------------------------------------------------
+import os
+import sys
+import dismod_at
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+#
+# number_sample
+number_sample = 10
+#
+# csv_file
+csv_file = dict()
+#
+# node.csv
+csv_file['node.csv'] = \
+'''node_name,parent_name
+n0,
+n1,n0
+n2,n0
+n3,n1
+n4,n1
+'''
+#
+# option_fit.csv
+csv_file['option_fit.csv']  = \
+'''name,value
+sample_method,asymptotic
+'''
+csv_file['option_fit.csv'] += f'number_sample,{number_sample}\n'
+#
+# option_predict.csv
+csv_file['option_predict.csv']  = 'name,value\n'
+#
+# covariate.csv
+csv_file['covariate.csv'] = 'node_name,sex,age,time,omega\n'
+for node_name in [ 'n0', 'n1', 'n2', 'n3', 'n4' ] :
+    for sex in [ 'female', 'male' ] :
+        csv_file['covariate.csv'] += f'{node_name},{sex},50,2000,0.02\n'
+#
+# fit_goal.csv
+csv_file['fit_goal.csv'] = \
+'''node_name
+n1
+n2
+'''
+#
+# predict_integrand.csv
+csv_file['predict_integrand.csv'] = \
+'''integrand_name
+Sincidence
+'''
+#
+# prior.csv
+csv_file['prior.csv'] = \
+'''name,lower,upper,mean,std,density
+uniform_eps_1,1e-6,1.0,0.5,1.0,uniform
+gauss_01,,,0.0,1.0,gaussian
+'''
+#
+# parent_rate.csv
+csv_file['parent_rate.csv'] = \
+'''rate_name,age,time,value_prior,dage_prior,dtime_prior,const_value
+iota,0.0,0.0,uniform_eps_1,,,
+'''
+#
+# child_rate.csv
+csv_file['child_rate.csv'] = \
+'''rate_name,value_prior
+iota,gauss_01
+'''
+#
+# mulcov.csv
+csv_file['mulcov.csv']  = 'covariate,type,effected,value_prior,const_value\n'
+#
+# iota_true, data_in.csv
+iota_true = 0.01
+header    = 'data_id, integrand_name, node_name, sex, age_lower, age_upper, '
+header   += 'time_lower, time_upper, meas_value, meas_std, hold_out, '
+header   += 'density_name, eta, nu'
+csv_file['data_in.csv'] = header + \
+'''
+0, Sincidence, n1, female, 0,  10, 1990, 2000, 0.01,  1e-4, 0, gaussian, ,
+1, Sincidence, n1, male,   0,  10, 1990, 2000, 0.01,  1e-4, 0, gaussian, ,
+2, Sincidence, n3, female, 20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+3, Sincidence, n3, male,   20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+4, Sincidence, n2, female, 20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+5, Sincidence, n2, male,   20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+'''
+csv_file['data_in.csv'] = csv_file['data_in.csv'].replace(' ', '')
+#
+# main
+def main() :
+    #
+    # fit_dir
+    fit_dir = 'build/test/csv'
+    at_cascade.empty_directory(fit_dir)
+    #
+    # write csv files
+    for name in csv_file :
+        file_name = f'{fit_dir}/{name}'
+        file_ptr  = open(file_name, 'w')
+        file_ptr.write( csv_file[name] )
+        file_ptr.close()
+    #
+    # csv.fit, csv.predict
+    at_cascade.csv.fit(fit_dir)
+    at_cascade.csv.predict(fit_dir)
+    #
+    # fit_predict, sam_predict
+    # rows in csv.predict output for n1.female at age 50, time 2000
+    fit_predict = list()
+    sam_predict = list()
+    for prefix in [ 'fit', 'sam' ] :
+        table = at_cascade.csv.read_table(f'{fit_dir}/{prefix}_predict.csv')
+        for row in table :
+            if row['node_name'] == 'n1' and row['sex'] == 'female' :
+                assert row['fit_node_name'] == 'n1'
+                assert row['fit_sex'] == 'female'
+                assert float( row['age'] ) == 50.0
+                assert float( row['time'] ) == 2000.0
+                if prefix == 'fit' :
+                    fit_predict.append( row )
+                else :
+                    sam_predict.append( row )
+    assert len(fit_predict) == 1
+    assert len(sam_predict) == number_sample
+    #
+    # query_table
+    # n3 is first so that it would determine the fit_same value for
+    # the n1.female fit database if misses were grouped by database only.
+    query_table = list()
+    for node_name in [ 'n3', 'n1' ] :
+        query_table.append( {
+            'node_name'      : node_name ,
+            'sex'            : 'female' ,
+            'integrand_name' : 'Sincidence' ,
+            'age'            : 50.0 ,
+            'time'           : 2000.0 ,
+        } )
+    #
+    # result_table
+    query        = at_cascade.csv.query_predict_class(fit_dir)
+    result_table = query.predict(query_table)
+    assert len( query.cache ) == 2
+    #
+    # n3.female
+    # prior prediction using the n1.female fit
+    result = result_table[0]
+    assert result['fit_job_name'] == 'n1.female'
+    assert result['n_sample'] == number_sample
+    relerr = 1.0 - result['avg_integrand'] / iota_true
+    assert abs(relerr) < 1e-3
+    #
+    # n1.female
+    # same as csv.predict (which rounds to float_precision digits)
+    result = result_table[1]
+    assert result['fit_job_name'] == 'n1.female'
+    assert result['n_sample'] == number_sample
+    check  = float( fit_predict[0]['avg_integrand'] )
+    relerr = 1.0 - result['avg_integrand'] / check
+    assert abs(relerr) < 1e-4
+    check  = sum( float( row['avg_integrand'] ) for row in sam_predict )
+    check  = check / number_sample
+    relerr = 1.0 - result['sam_mean'] / check
+    assert abs(relerr) < 1e-4
+    #
+    # cache hit
+    # the second call does not compute any predictions
+    predict_fit = query.predict_fit
+    def no_predict_fit(fit_database, fit_same, point_list) :
+        assert False, 'query_predict: expected a cache hit'
+    query.predict_fit = no_predict_fit
+    assert query.predict(query_table) == result_table
+    assert len( query.cache ) == 2
+    query.predict_fit = predict_fit
+    #
+    # max_cache
+    small_query = at_cascade.csv.query_predict_class(fit_dir, max_cache = 1)
+    small_table = small_query.predict(query_table)
+    assert len( small_query.cache ) == 1
+    for (result, check) in zip(small_table, result_table) :
+        assert result['avg_integrand'] == check['avg_integrand']
+    #
+    # fit_database
+    # change the n1.female fit database, so its sha256 changes
+    fit_database = query.get_fit('n1', 'female')[1]
+    old_sha256   = query.fingerprint[fit_database][2]
+    connection   = dismod_at.create_connection(
+        fit_database, new = False, readonly = False
+    )
+    at_cascade.add_log_entry(connection, 'query_predict: change sha256')
+    connection.close()
+    #
+    # sha256 eviction
+    # both cache entries used the n1.female fit; only n1 is recomputed
+    result_table = query.predict( query_table[1 : 2] )
+    assert len( query.cache ) == 1
+    for key in query.cache :
+        assert key[0] != old_sha256
+    assert result_table[0]['fit_job_name'] == 'n1.female'
+#
+if __name__ == '__main__' :
+    main()
+    print('query_predict: OK')
@@ -0,0 +1,201 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ----------------------------------------------------------------------------
+# Test the csv.predict sample_output and summary_quantile options;
+# i.e., that sum_predict.csv is a summary of sam_predict.csv .
+#
+#  root_node :                n0
+#                            /  \
+#  fit_goal_set:            n1   n2
+#
+# ----------------------------------------------------------------------------
+import os
+import sys
+import numpy
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+#
+# number_sample
+number_sample = 20
+#
+# float_precision
+float_precision = 12
+#
+# quantile_level
+quantile_level = [ 0.1, 0.5, 0.9 ]
+#
+# csv_file
+csv_file = dict()
+#
+# node.csv
+csv_file['node.csv'] = \
+'''node_name,parent_name
+n0,
+n1,n0
+n2,n0
+'''
+#
+# option_fit.csv
+csv_file['option_fit.csv']  = \
+'''name,value
+sample_method,asymptotic
+'''
+csv_file['option_fit.csv'] += f'number_sample,{number_sample}\n'
+#
+# option_predict.csv
+csv_file['option_predict.csv']  = \
+'''name,value
+sample_output,both
+'''
+csv_file['option_predict.csv'] += f'float_precision,{float_precision}\n'
+summary_quantile = ' '.join( str(level) for level in quantile_level )
+csv_file['option_predict.csv'] += f'summary_quantile,{summary_quantile}\n'
+#
+# covariate.csv
+csv_file['covariate.csv'] = 'node_name,sex,age,time,omega\n'
+for node_name in [ 'n0', 'n1', 'n2' ] :
+    for sex in [ 'female', 'male' ] :
+        csv_file['covariate.csv'] += f'{node_name},{sex},50,2000,0.02\n'
+#
+# fit_goal.csv
+csv_file['fit_goal.csv'] = \
+'''node_name
+n1
+n2
+'''
+#
+# predict_integrand.csv
+csv_file['predict_integrand.csv'] = \
+'''integrand_name
+Sincidence
+'''
+#
+# prior.csv
+csv_file['prior.csv'] = \
+'''name,lower,upper,mean,std,density
+uniform_eps_1,1e-6,1.0,0.5,1.0,uniform
+gauss_01,,,0.0,1.0,gaussian
+'''
+#
+# parent_rate.csv
+csv_file['parent_rate.csv'] = \
+'''rate_name,age,time,value_prior,dage_prior,dtime_prior,const_value
+iota,0.0,0.0,uniform_eps_1,,,
+'''
+#
+# child_rate.csv
+csv_file['child_rate.csv'] = \
+'''rate_name,value_prior
+iota,gauss_01
+'''
+#
+# mulcov.csv
+csv_file['mulcov.csv']  = 'covariate,type,effected,value_prior,const_value\n'
+#
+# data_in.csv
+header    = 'data_id, integrand_name, node_name, sex, age_lower, age_upper, '
+header   += 'time_lower, time_upper, meas_value, meas_std, hold_out, '
+header   += 'density_name, eta, nu'
+csv_file['data_in.csv'] = header + \
+'''
+0, Sincidence, n1, female, 0,  10, 1990, 2000, 0.01,  1e-4, 0, gaussian, ,
+1, Sincidence, n1, male,   0,  10, 1990, 2000, 0.01,  1e-4, 0, gaussian, ,
+2, Sincidence, n2, female, 20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+3, Sincidence, n2, male,   20, 30, 2010, 2020, 0.01,  1e-4, 0, gaussian, ,
+'''
+csv_file['data_in.csv'] = csv_file['data_in.csv'].replace(' ', '')
+#
+# row_key
+# the columns that identify a row of fit_predict.csv
+def row_key(row) :
+    key = (
+        row['avgint_id'],
+        row['node_name'],
+        row['sex'],
+        row['fit_node_name'],
+        row['fit_sex'],
+    )
+    return key
+#
+# main
+def main() :
+    #
+    # fit_dir
+    fit_dir = 'build/test/csv'
+    at_cascade.empty_directory(fit_dir)
+    #
+    # write csv files
+    for name in csv_file :
+        file_name = f'{fit_dir}/{name}'
+        file_ptr  = open(file_name, 'w')
+        file_ptr.write( csv_file[name] )
+        file_ptr.close()
+    #
+    # csv.fit, csv.predict
+    at_cascade.csv.fit(fit_dir)
+    at_cascade.csv.predict(fit_dir)
+    #
+    # fit_table, sam_table, sum_table
+    fit_table = at_cascade.csv.read_table( f'{fit_dir}/fit_predict.csv' )
+    sam_table = at_cascade.csv.read_table( f'{fit_dir}/sam_predict.csv' )
+    sum_table = at_cascade.csv.read_table( f'{fit_dir}/sum_predict.csv' )
+    #
+    # quantile_name
+    quantile_name = [ f'quantile_{level:g}' for level in quantile_level ]
+    #
+    # sum_table columns
+    for name in [ 'n_sample', 'mean', 'std' ] + quantile_name :
+        assert name in sum_table[0]
+    assert 'avg_integrand' not in sum_table[0]
+    assert 'sample_index' not in sum_table[0]
+    #
+    # sum_table rows
+    # one row for each row of fit_predict.csv
+    assert len(sum_table) == len(fit_table)
+    fit_key_set = set( row_key(row) for row in fit_table )
+    sum_key_set = set( row_key(row) for row in sum_table )
+    assert len(sum_key_set) == len(sum_table)
+    assert sum_key_set == fit_key_set
+    #
+    # sample_dict
+    # sample_dict[key] is the list of avg_integrand samples for key
+    sample_dict = dict()
+    for row in sam_table :
+        key = row_key(row)
+        if key not in sample_dict :
+            sample_dict[key] = list()
+        sample_dict[key].append( float( row['avg_integrand'] ) )
+    assert set( sample_dict.keys() ) == sum_key_set
+    #
+    # check summary
+    for row in sum_table :
+        #
+        # value, tolerance
+        value     = numpy.array( sample_dict[ row_key(row) ] )
+        tolerance = 10.0 * 10.0 ** (-float_precision) * max(abs(value))
+        #
+        # n_sample
+        assert int( row['n_sample'] ) == number_sample
+        assert len(value) == number_sample
+        #
+        # check
+        check = {
+            'mean' : numpy.mean(value) ,
+            'std'  : numpy.std(value, ddof = 1) ,
+        }
+        for (k, level) in enumerate( quantile_level ) :
+            check[ quantile_name[k] ] = numpy.quantile(value, level)
+        for name in check :
+            if abs( float(row[name]) - check[name] ) > tolerance :
+                msg  = f'sum_predict.csv: {name} = {row[name]}, '
+                msg += f'check = {check[name]}'
+                assert False, msg
+#
+if __name__ == '__main__' :
+    main()
+    print('sample_summary: OK')
@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ----------------------------------------------------------------------------
+# Test that csv.simulate output does not depend on max_number_cpu.
+# ----------------------------------------------------------------------------
+import os
+import sys
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+#
+# csv_file
+csv_file = dict()
+#
+# option_sim.csv
+csv_file['option_sim.csv'] = \
+'''name,value
+absolute_tolerance,1e-4
+float_precision,6
+std_random_effects_iota,.1
+integrand_step_size,5.0
+random_depend_sex,true
+random_seed,1234
+'''
+#
+# node.csv
+csv_file['node.csv'] = \
+'''node_name,parent_name
+n0,
+n1,n0
+n2,n0
+'''
+#
+# covariate.csv
+csv_file['covariate.csv'] = 'node_name,sex,age,time,omega,haqi\n'
+for (node_name, haqi) in [ ('n0', 1.0), ('n1', 0.5), ('n2', 1.5) ] :
+    for sex in [ 'female', 'male' ] :
+        for age in [ 0, 100 ] :
+            csv_file['covariate.csv'] += \
+                f'{node_name},{sex},{age},2000,.03,{haqi}\n'
+#
+# no_effect_rate.csv
+csv_file['no_effect_rate.csv'] = \
+'''rate_name,age,time,rate_truth
+iota,0.0,1980.0,0.01
+chi,0.0,1980.0,0.02
+'''
+#
+# multiplier_sim.csv
+csv_file['multiplier_sim.csv'] = \
+'''multiplier_id,rate_name,covariate_or_sex,multiplier_truth
+0,iota,haqi,0.5
+1,iota,sex,0.2
+'''
+#
+# simulate.csv
+# enough rows so that there is more than one chunk per process
+header  = 'simulate_id,integrand_name,node_name,sex,age_lower,age_upper,'
+header += 'time_lower,time_upper,meas_std_cv,meas_std_min'
+csv_file['simulate.csv'] = header + '\n'
+simulate_id = 0
+for integrand_name in [ 'Sincidence', 'prevalence' ] :
+    for node_name in [ 'n0', 'n1', 'n2' ] :
+        for sex in [ 'female', 'male', 'both' ] :
+            for age_lower in [ 0, 20, 40, 60 ] :
+                age_upper = age_lower + 10
+                csv_file['simulate.csv'] += \
+                    f'{simulate_id},{integrand_name},{node_name},{sex},' + \
+                    f'{age_lower},{age_upper},1990,2000,0.2,0.0\n'
+                simulate_id += 1
+#
+# main
+def main() :
+    #
+    # output
+    # output[max_number_cpu][name] is the contents of the output file name
+    output = dict()
+    for max_number_cpu in [ 1, 3 ] :
+        #
+        # sim_dir
+        sim_dir = f'build/test/csv/cpu_{max_number_cpu}'
+        at_cascade.empty_directory(sim_dir)
+        #
+        # write csv files
+        for name in csv_file :
+            file_name = f'{sim_dir}/{name}'
+            file_ptr  = open(file_name, 'w')
+            file_ptr.write( csv_file[name] )
+            if name == 'option_sim.csv' :
+                file_ptr.write( f'max_number_cpu,{max_number_cpu}\n' )
+            file_ptr.close()
+        #
+        # simulate
+        at_cascade.csv.simulate(sim_dir)
+        #
+        # output
+        output[max_number_cpu] = dict()
+        for name in [ 'random_effect.csv', 'data_sim.csv' ] :
+            file_ptr = open( f'{sim_dir}/{name}', 'r' )
+            output[max_number_cpu][name] = file_ptr.read()
+            file_ptr.close()
+    #
+    # data_sim.csv
+    data_sim_table = at_cascade.csv.read_table(
+        'build/test/csv/cpu_1/data_sim.csv'
+    )
+    assert len( data_sim_table ) == simulate_id
+    #
+    # check
+    for name in output[1] :
+        assert output[1][name] == output[3][name]
+#
+if __name__ == '__main__' :
+    main()
+    print('simulate_cpu: OK')
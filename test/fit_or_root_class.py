@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ---------------------------------------------------------------------------
+# Test the fit_or_root_class root table cache.
+# ---------------------------------------------------------------------------
+import os
+import sys
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+#
+# create_database
+def create_database(file_name, age_list, data_list) :
+    connection = dismod_at.create_connection(
+        file_name, new = True, readonly = False
+    )
+    row_list = [ [ age ] for age in age_list ]
+    dismod_at.create_table(
+        connection, 'age', [ 'age' ], [ 'real' ], row_list
+    )
+    row_list = [ [ value ] for value in data_list ]
+    dismod_at.create_table(
+        connection, 'data', [ 'meas_value' ], [ 'real' ], row_list
+    )
+    connection.close()
+#
+# change_mtime
+# make sure the modification time changes even if the file system
+# has a coarse time resolution.
+def change_mtime(file_name) :
+    stat = os.stat(file_name)
+    os.utime(
+        file_name, ns = ( stat.st_atime_ns, stat.st_mtime_ns + 10**9 )
+    )
+#
+def main() :
+    #
+    # work_dir
+    work_dir = 'build/test'
+    at_cascade.empty_directory(work_dir)
+    os.chdir(work_dir)
+    #
+    # root.db, fit.db
+    create_database('root.db', [ 0.0, 50.0, 100.0 ], [ 1.0, 2.0 ] )
+    create_database('fit.db',  [ 0.0 ], [ 3.0 ] )
+    #
+    # age_table, data_table
+    fit_or_root = at_cascade.fit_or_root_class('fit.db', 'root.db')
+    age_table   = fit_or_root.get_table('age')
+    data_table  = fit_or_root.get_table('data')
+    assert [ row['age'] for row in age_table ] == [ 0.0, 50.0, 100.0 ]
+    assert [ row['meas_value'] for row in data_table ] == [ 1.0, 2.0 ]
+    #
+    # cache hit
+    # the cached tables are returned without copying them
+    assert fit_or_root.get_table('age') is age_table
+    assert fit_or_root.get_table('data') is data_table
+    fit_or_root.close()
+    #
+    # cache hit
+    # a different fit_or_root_class object uses the same cache
+    fit_or_root = at_cascade.fit_or_root_class('fit.db', 'root.db')
+    assert fit_or_root.get_table('age') is age_table
+    assert fit_or_root.get_table('data') is data_table
+    fit_or_root.close()
+    #
+    # root.db
+    # change the root database; i.e., its modification time and size
+    connection = dismod_at.create_connection(
+        'root.db', new = False, readonly = False
+    )
+    new_age_table  = [ { 'age' : float(age) } for age in range(0, 101, 10) ]
+    new_data_table = [ { 'meas_value' : 4.0 } ]
+    dismod_at.replace_table(connection, 'age', new_age_table)
+    dismod_at.replace_table(connection, 'data', new_data_table)
+    connection.close()
+    change_mtime('root.db')
+    #
+    # cache miss
+    # the tables are read again because root.db changed
+    fit_or_root = at_cascade.fit_or_root_class('fit.db', 'root.db')
+    age_table   = fit_or_root.get_table('age')
+    data_table  = fit_or_root.get_table('data')
+    assert [ row['age'] for row in age_table ] == list(
+        float(age) for age in range(0, 101, 10)
+    )
+    assert [ row['meas_value'] for row in data_table ] == [ 4.0 ]
+    assert fit_or_root.get_table('age') is age_table
+    fit_or_root.close()
+    #
+    # root.db
+    # only change the modification time
+    change_mtime('root.db')
+    fit_or_root = at_cascade.fit_or_root_class('fit.db', 'root.db')
+    assert fit_or_root.get_table('age') is not age_table
+    assert fit_or_root.get_table('age') == age_table
+    #
+    # fit.db
+    # tables that are not constant come from the fit database
+    connection = dismod_at.create_connection(
+        'fit.db', new = False, readonly = False
+    )
+    dismod_at.create_table(
+        connection, 'option', [ 'option_name' ], [ 'text' ], [ [ 'one' ] ]
+    )
+    connection.close()
+    assert fit_or_root.get_table('option') == [ { 'option_name' : 'one' } ]
+    fit_or_root.close()
+    return
+#
+if __name__ == '__main__' :
+    main()
+    print('fit_or_root_class: OK')
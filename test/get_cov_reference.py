@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
-# SPDX-FileContributor: 2021-24 Bradley M. Bell
+# SPDX-FileContributor: 2021-26 Bradley M. Bell
 # ----------------------------------------------------------------------------
 # imports
 # ----------------------------------------------------------------------------
@@ -165,6 +165,29 @@ def main() :
             #
             assert cov_reference_list[bmi_covariate_id] == avg
     #
+    # cov_reference_dict
+    # root_node_id = 0 so this includes all the nodes
+    cov_reference_dict = at_cascade.com_all_cov_reference(
+        option_all_table      = option_all_table,
+        split_reference_table = split_reference_table,
+        node_table            = node_table,
+        covariate_table       = covariate_table,
+        root_node_id          = 0,
+    )
+    assert len(cov_reference_dict) == 4 * 3
+    for node_id in range(4) :
+        for split_reference_id in range(3) :
+            cov_reference_list = at_cascade.com_cov_reference(
+                option_all_table      = option_all_table,
+                split_reference_table = split_reference_table,
+                node_table            = node_table,
+                covariate_table       = covariate_table,
+                shift_node_id         = node_id,
+                split_reference_id    = split_reference_id,
+            )
+            key = (node_id, split_reference_id)
+            assert cov_reference_dict[key] == cov_reference_list
+    #
     # connection
     connection.close()
 if __name__ == '__main__' :
@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ---------------------------------------------------------------------------
+# Test shared_data_class rows are the same as dismod_at.get_table_dict rows.
+# ---------------------------------------------------------------------------
+import os
+import sys
+import math
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+#
+# col_name, col_type
+col_name = [ 'integrand_id', 'meas_value', 'eta', 'c_comment' ]
+col_type = [ 'integer',      'real',       'real', 'text'     ]
+#
+# create_database
+def create_database(file_name, row_list) :
+    connection = dismod_at.create_connection(
+        file_name, new = True, readonly = False
+    )
+    dismod_at.create_table(
+        connection, 'data', col_name, col_type, row_list
+    )
+    connection.close()
+#
+# check_shared
+def check_shared(file_name, shared_name) :
+    #
+    # data_table
+    connection = dismod_at.create_connection(
+        file_name, new = False, readonly = True
+    )
+    data_table = dismod_at.get_table_dict(connection, 'data')
+    connection.close()
+    #
+    # shared_data
+    shared_data = at_cascade.shared_data_class(shared_name, file_name)
+    try :
+        #
+        # attached
+        # a second object attached to the same shared memory block
+        attached = at_cascade.shared_data_class(shared_name)
+        for shared in [ shared_data, attached ] :
+            assert shared.n_row == len(data_table)
+            #
+            # column
+            # all the columns in the schema, even if the table is empty
+            for name in col_name :
+                value = shared.column(name)
+                assert len(value) == len(data_table)
+            #
+            # row
+            for data_id in range( len(data_table) ) :
+                data_row = shared.row(data_id)
+                assert data_row == data_table[data_id]
+                for name in col_name :
+                    assert type( data_row[name] ) == \
+                        type( data_table[data_id][name] )
+        attached.close()
+    finally :
+        shared_data.close()
+        shared_data.unlink()
+#
+def main() :
+    #
+    # work_dir
+    work_dir = 'build/test'
+    at_cascade.empty_directory(work_dir)
+    os.chdir(work_dir)
+    #
+    # root.db
+    # includes null values and the empty string
+    row_list = [
+        [ 0,    1.5,  None,  'one'  ] ,
+        [ None, 2.0,  1e-5,  ''     ] ,
+        [ 2,    None, 0.0,   None   ] ,
+        [ 3,    -4.0, None,  'four' ] ,
+    ]
+    create_database('root.db', row_list)
+    check_shared('root.db', 'shared_data_class_test')
+    #
+    # empty.db
+    # an empty data table
+    create_database('empty.db', list() )
+    check_shared('empty.db', 'shared_data_class_empty')
+    #
+    # column
+    # null values for real columns are nan, text columns are the empty string
+    shared_data = at_cascade.shared_data_class(
+        'shared_data_class_test', 'root.db'
+    )
+    assert math.isnan( shared_data.column('integrand_id')[1] )
+    assert math.isnan( shared_data.column('eta')[0] )
+    assert shared_data.column('c_comment')[1] == ''
+    assert shared_data.column('c_comment')[2] == ''
+    shared_data.close()
+    shared_data.unlink()
+#
+if __name__ == '__main__' :
+    main()
+    print('shared_data_class: OK')
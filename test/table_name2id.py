@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2026 Bradley M. Bell
+# ---------------------------------------------------------------------------
+# Test the table_name2id name index cache.
+# ---------------------------------------------------------------------------
+import os
+import sys
+import copy
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+    sys.path.insert(0, current_directory)
+import at_cascade
+#
+# not_found
+# return true if row_name is not in the table
+def not_found(table, tbl_name, row_name) :
+    try :
+        at_cascade.table_name2id(table, tbl_name, row_name)
+    except AssertionError :
+        return True
+    return False
+#
+def main() :
+    #
+    # node_table
+    node_table = [
+        { 'node_name' : 'n0', 'parent' : None } ,
+        { 'node_name' : 'n1', 'parent' : 0    } ,
+        { 'node_name' : 'n2', 'parent' : 0    } ,
+    ]
+    for (row_id, row) in enumerate(node_table) :
+        node_name = row['node_name']
+        assert at_cascade.table_name2id(node_table, 'node', node_name) == row_id
+    assert not_found(node_table, 'node', 'n3')
+    #
+    # duplicate names
+    # the last row with a name is used
+    node_table.append( { 'node_name' : 'n1', 'parent' : 2 } )
+    assert at_cascade.table_name2id(node_table, 'node', 'n1') == 3
+    #
+    # renamed row
+    # the length does not change
+    node_table[2]['node_name'] = 'n4'
+    assert at_cascade.table_name2id(node_table, 'node', 'n4') == 2
+    assert not_found(node_table, 'node', 'n2')
+    assert at_cascade.table_name2id(node_table, 'node', 'n1') == 3
+    #
+    # renamed row
+    # the last row with a name is renamed
+    node_table[3]['node_name'] = 'n5'
+    assert at_cascade.table_name2id(node_table, 'node', 'n1') == 1
+    assert at_cascade.table_name2id(node_table, 'node', 'n5') == 3
+    #
+    # replaced table
+    # a new list with the rows in the reverse order has its own index
+    new_table = copy.deepcopy( node_table )
+    new_table.reverse()
+    n_row = len(new_table)
+    for (row_id, row) in enumerate(node_table) :
+        node_name = row['node_name']
+        assert at_cascade.table_name2id(node_table, 'node', node_name) == row_id
+        check     = n_row - row_id - 1
+        assert at_cascade.table_name2id(new_table, 'node', node_name) == check
+    #
+    # same table, different table name
+    # the index for each tbl_name is separate
+    for row in node_table :
+        row['integrand_name'] = row['node_name'].replace('n', 'i')
+    assert at_cascade.table_name2id(node_table, 'integrand', 'i4') == 2
+    assert at_cascade.table_name2id(node_table, 'node', 'n4') == 2
+    #
+    # n_table
+    # more tables than fit in the cache (which holds 64 tables)
+    n_table    = 200
+    table_list = list()
+    for i in range( n_table ) :
+        table = [ { 'node_name' : f'n{i}' }, { 'node_name' : 'last' } ]
+        table_list.append(table)
+        assert at_cascade.table_name2id(table, 'node', 'last') == 1
+    for (i, table) in enumerate(table_list) :
+        assert at_cascade.table_name2id(table, 'node', f'n{i}') == 0
+#
+if __name__ == '__main__' :
+    main()
+    print('table_name2id: OK')